@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database.connection import get_db
+from app.database.connection import get_async_db
 from app.services.auth_service import AuthService
 from app.schemas.auth import (
     UserCreate,
@@ -15,6 +16,7 @@ from app.schemas.auth import (
     PasswordChange
 )
 from app.core.auth import get_current_user, get_current_active_user
+from app.core.config import settings
 from app.models.auth import User
 from app.core.exceptions import AuthenticationError, ValidationError
 
@@ -23,19 +25,38 @@ router = APIRouter()
 auth_service = AuthService()
 
 
+def _client_key(request: Request) -> Optional[str]:
+    """Client address, used to share the password hashing pool fairly
+
+    Behind ``FORWARDED_TRUSTED_HOPS`` reverse proxies the peer is the nearest
+    proxy, so the client is read from X-Forwarded-For that many hops from the
+    right; entries further left are client-supplied and can't be trusted.
+    Leave it at 0 when uvicorn already rewrites the client address
+    (``--proxy-headers`` with ``--forwarded-allow-ips``).
+    """
+    peer = request.client.host if request.client else None
+    hops = settings.FORWARDED_TRUSTED_HOPS
+    if hops <= 0:
+        return peer
+    forwarded = [entry.strip() for entry in request.headers.get("x-forwarded-for", "").split(",") if entry.strip()]
+    chain = forwarded + [peer]
+    return chain[max(0, len(chain) - 1 - hops)]
+
+
 @router.post("/register", response_model=AuthResponse, status_code=status.HTTP_201_CREATED)
 async def register(
     user_create: UserCreate,
-    db: Session = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Register a new user"""
     try:
         # Create user
-        user = auth_service.create_user(db, user_create)
+        user = await auth_service.create_user(db, user_create, client=_client_key(request))
         
-        # Create tokens
-        user_login = UserLogin(email=user.email, password=user_create.password)
-        auth_data = auth_service.login_user(db, user_login)
+        # Create tokens (the password was just hashed, no need to verify it again)
+        user.update_last_login()  # Committed with the refresh token
+        auth_data = await auth_service.issue_tokens(db, user)
         
         return AuthResponse(
             user=UserResponse.model_validate(auth_data["user"]),
@@ -48,6 +69,8 @@ async def register(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    except HTTPException:
+        raise
     except Exception as e:
         # Log the actual error for debugging
         import traceback
@@ -62,11 +85,12 @@ async def register(
 @router.post("/login", response_model=AuthResponse)
 async def login(
     user_login: UserLogin,
-    db: Session = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Login user"""
     try:
-        auth_data = auth_service.login_user(db, user_login)
+        auth_data = await auth_service.login_user(db, user_login, client=_client_key(request))
         
         return AuthResponse(
             user=UserResponse.model_validate(auth_data["user"]),
@@ -79,6 +103,8 @@ async def login(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=str(e)
         )
+    except HTTPException:
+        raise
     except Exception as e:
         # Log the actual error for debugging
         import traceback
@@ -94,11 +120,11 @@ async def login(
 async def logout(
     token_refresh: TokenRefresh,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Logout user by revoking refresh token"""
     try:
-        auth_service.revoke_refresh_token(db, token_refresh.refresh_token)
+        await auth_service.revoke_refresh_token(db, token_refresh.refresh_token)
         return {"message": "Logout successful"}
         
     except Exception as e:
@@ -111,11 +137,11 @@ async def logout(
 @router.post("/refresh", response_model=TokenResponse)
 async def refresh_token(
     token_refresh: TokenRefresh,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Refresh JWT token"""
     try:
-        token_data = auth_service.refresh_access_token(db, token_refresh.refresh_token)
+        token_data = await auth_service.refresh_access_token(db, token_refresh.refresh_token)
         
         return TokenResponse(
             access_token=token_data["access_token"],
@@ -146,11 +172,11 @@ async def get_current_user_profile(
 @router.post("/password-reset")
 async def request_password_reset(
     password_reset: PasswordReset,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Request password reset"""
     try:
-        token = auth_service.generate_password_reset_token(db, password_reset.email)
+        token = await auth_service.generate_password_reset_token(db, password_reset.email)
         
         if token:
             # In production, send email with reset link
@@ -171,7 +197,7 @@ async def request_password_reset(
 @router.post("/forgot-password")
 async def forgot_password_alias(
     password_reset: PasswordReset,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Request password reset (alias for frontend compatibility)"""
     return await request_password_reset(password_reset, db)
@@ -180,14 +206,16 @@ async def forgot_password_alias(
 @router.post("/password-reset-confirm")
 async def confirm_password_reset(
     password_reset_confirm: PasswordResetConfirm,
-    db: Session = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Confirm password reset"""
     try:
-        user = auth_service.reset_password(
+        user = await auth_service.reset_password(
             db,
             password_reset_confirm.token,
-            password_reset_confirm.new_password
+            password_reset_confirm.new_password,
+            client=_client_key(request)
         )
         
         if user:
@@ -203,6 +231,8 @@ async def confirm_password_reset(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -213,16 +243,18 @@ async def confirm_password_reset(
 @router.post("/change-password")
 async def change_password(
     password_change: PasswordChange,
+    request: Request,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Change user password"""
     try:
-        success = auth_service.change_password(
+        success = await auth_service.change_password(
             db,
             str(current_user.id),
             password_change.current_password,
-            password_change.new_password
+            password_change.new_password,
+            client=_client_key(request)
         )
         
         if success:
@@ -238,6 +270,8 @@ async def change_password(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -245,14 +279,31 @@ async def change_password(
         )
 
 
+@router.post("/deactivate")
+async def deactivate_account(
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Deactivate the current user's account and sign them out everywhere"""
+    try:
+        await auth_service.deactivate_user(db, str(current_user.id))
+        return {"message": "Account deactivated"}
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Account deactivation failed"
+        )
+
+
 @router.post("/verify-email/{token}")
 async def verify_email(
     token: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Verify user email"""
     try:
-        user = auth_service.verify_user_email(db, token)
+        user = await auth_service.verify_user_email(db, token)
         
         if user:
             return {"message": "Email verified successfully"}
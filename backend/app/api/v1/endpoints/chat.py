@@ -1,35 +1,39 @@
-from fastapi import APIRouter, HTTPException, Depends, WebSocket, WebSocketDisconnect, status
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Depends, WebSocket, WebSocketDisconnect
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete
+from typing import Optional
 from datetime import datetime
 import json
-import asyncio
+import uuid
 
-from app.database.connection import get_db
-from app.core.auth import get_current_user
-from app.models.auth import User
-from app.models.chat import Conversation, ChatMessage, MessageRole as DBMessageRole
+from app.database.connection import get_async_db
+from app.core.auth import get_current_user_snapshot
+from app.schemas.auth import UserSnapshot
+from app.models.chat import Conversation, ChatMessage
 from app.services.ai_context_service import AIContextService
-from app.services.ollama_service import OllamaService
+from app.services.ollama_service import OllamaService, ollama_admission
+from app.services.chat_service import ChatService
+from app.services.summarizer_service import conversation_summarizer
+from app.services.daily_message_service import daily_message_service
+from app.jobs import enqueue_job
+from app.realtime import connection_manager
 from app.schemas.chat import (
     SendMessageRequest,
-    MessageResponse,
     ChatResponse,
+    ChatStreamComplete,
     ConversationSummary,
     ConversationDetail,
     ConversationListResponse,
-    ChatHistoryRequest,
     ChatHistoryResponse,
     ConversationCreate,
     ConversationUpdate,
     ConversationStarter,
     WebSocketMessage,
     WebSocketResponse,
-    AIGenerationRequest,
-    DailyMessage,
-    ErrorResponse
+    DailyMessage
 )
-from app.core.exceptions import NotFoundError, ValidationError
+from app.core.exceptions import TooManyRequestsError
 
 
 router = APIRouter()
@@ -37,269 +41,219 @@ router = APIRouter()
 # Initialize services
 ai_context_service = AIContextService()
 ollama_service = OllamaService()
+chat_service = ChatService(ai_context_service)
 
-# WebSocket connection manager
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
-        self.user_connections: dict = {}
-    
-    async def connect(self, websocket: WebSocket, user_id: str):
-        await websocket.accept()
-        self.active_connections.append(websocket)
-        self.user_connections[user_id] = websocket
-    
-    def disconnect(self, websocket: WebSocket, user_id: str):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-        if user_id in self.user_connections:
-            del self.user_connections[user_id]
-    
-    async def send_personal_message(self, message: str, user_id: str):
-        if user_id in self.user_connections:
-            await self.user_connections[user_id].send_text(message)
 
-manager = ConnectionManager()
+async def _enqueue_post_response_jobs(user_id, conversation, content: str, is_new_conversation: bool):
+    """Hand non-critical follow-up work for a committed turn to the job workers"""
+    conversation_id = str(conversation.id)
+    if is_new_conversation:
+        await enqueue_job("conversation_title", conversation_id=conversation_id, content=content)
+    await enqueue_job(
+        "log_activity",
+        user_id=str(user_id),
+        activity_type="chat",
+        activity_data={"conversation_id": conversation_id, "message_count": conversation.message_count}
+    )
+    await conversation_summarizer.schedule(conversation)
+
+
+async def _sync_other_devices(user_id, conversation, user_message, ai_message, ai_response, exclude: Optional[WebSocket] = None):
+    """Push a finished turn to the user's other open WebSockets, on any worker"""
+    frames = [
+        WebSocketResponse(
+            type="user_message",
+            content=user_message.content,
+            message_id=str(user_message.id),
+            conversation_id=str(conversation.id)
+        ),
+        WebSocketResponse(
+            type="ai_message",
+            content=ai_response.content,
+            message_id=str(ai_message.id),
+            conversation_id=str(conversation.id),
+            metadata={"model_used": ai_response.model_used}
+        )
+    ]
+    for frame in frames:
+        await connection_manager.send_personal_message(frame.model_dump_json(), str(user_id), exclude=exclude)
 
 
 @router.post("/send", response_model=ChatResponse)
 async def send_message(
     request: SendMessageRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user_snapshot),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Send a message to the Future Self AI"""
     try:
         # Get or create conversation
-        conversation = None
-        is_new_conversation = False
-        
-        if request.conversation_id:
-            conversation = db.query(Conversation).filter(
-                Conversation.id == request.conversation_id,
-                Conversation.user_id == current_user.id
-            ).first()
-            
-            if not conversation:
-                raise HTTPException(
-                    status_code=404,
-                    detail="Conversation not found"
-                )
-        else:
-            # Create new conversation
-            conversation = Conversation(
-                user_id=current_user.id,
-                title=f"Chat started {datetime.utcnow().strftime('%Y-%m-%d %H:%M')}"
-            )
-            db.add(conversation)
-            db.flush()  # Get the ID
-            is_new_conversation = True
-        
-        # Save user message
-        user_message = ChatMessage(
-            conversation_id=conversation.id,
-            role=DBMessageRole.USER,
-            content=request.content,
-            message_metadata=json.dumps(request.metadata) if request.metadata else None
+        conversation, is_new_conversation = await chat_service.get_or_create_conversation(
+            db, current_user.id, request.conversation_id
         )
-        db.add(user_message)
-        db.flush()
-        
-        # Get conversation history for context
-        recent_messages = db.query(ChatMessage).filter(
-            ChatMessage.conversation_id == conversation.id
-        ).order_by(ChatMessage.created_at.desc()).limit(10).all()
-        
-        # Reverse to get chronological order
-        recent_messages.reverse()
         
-        # Format conversation history for AI
-        conversation_history = []
-        for msg in recent_messages[:-1]:  # Exclude the just-added user message
-            conversation_history.append({
-                "role": msg.role.value,
-                "content": msg.content
-            })
-        
-        # Generate personalized system prompt
-        system_prompt = ai_context_service.generate_system_prompt(db, str(current_user.id))
-        
-        # Get user context for personalization
-        user_context = ai_context_service.generate_conversation_context(
-            db, str(current_user.id), [msg["content"] for msg in conversation_history[-3:]]
+        # Build the user message and prepare the AI request with history and personalization
+        turn = await chat_service.start_turn(
+            db, conversation, is_new_conversation, request.content, request.metadata
         )
-        
-        # Prepare AI generation request
-        ai_request = AIGenerationRequest(
-            user_message=request.content,
-            conversation_history=conversation_history,
-            user_context=user_context,
-            system_prompt=system_prompt
+        user_message = turn.user_message
+        ai_request = await chat_service.build_generation_request(
+            db, str(current_user.id), request.content, turn.history, conversation=conversation
         )
         
         # Generate AI response
         ai_response = await ollama_service.generate_response(ai_request)
         
-        # Save AI message
-        ai_message = ChatMessage(
-            conversation_id=conversation.id,
-            role=DBMessageRole.ASSISTANT,
-            content=ai_response.content,
-            token_count=str(ai_response.token_count) if ai_response.token_count else None,
-            message_metadata=json.dumps(ai_response.metadata) if ai_response.metadata else None
-        )
-        db.add(ai_message)
-        
-        # Update conversation title if it's new and we have a good first message
-        if is_new_conversation and len(request.content) > 10:
-            # Create a simple title from the first message
-            title_preview = request.content[:50]
-            if len(request.content) > 50:
-                title_preview += "..."
-            conversation.title = title_preview
-        
-        db.commit()
-        
-        # Create response objects
-        user_msg_response = MessageResponse(
-            id=str(user_message.id),
-            conversation_id=str(conversation.id),
-            role=user_message.role.value,
-            content=user_message.content,
-            message_type=request.message_type,
-            metadata=request.metadata,
-            token_count=None,
-            created_at=user_message.created_at
-        )
-        
-        ai_msg_response = MessageResponse(
-            id=str(ai_message.id),
-            conversation_id=str(conversation.id),
-            role=ai_message.role.value,
-            content=ai_message.content,
-            message_type="text",
-            metadata=ai_response.metadata,
-            token_count=ai_message.token_count,
-            created_at=ai_message.created_at
-        )
+        # Save the conversation and both messages in one transaction
+        ai_message = await chat_service.persist_turn(db, turn, ai_response)
+        await _enqueue_post_response_jobs(current_user.id, conversation, request.content, is_new_conversation)
+        await _sync_other_devices(current_user.id, conversation, user_message, ai_message, ai_response)
         
         return ChatResponse(
-            user_message=user_msg_response,
-            ai_message=ai_msg_response,
+            user_message=chat_service.to_message_response(
+                user_message, request.metadata, request.message_type
+            ),
+            ai_message=chat_service.to_message_response(ai_message, ai_response.metadata),
             conversation_id=str(conversation.id),
             is_new_conversation=is_new_conversation
         )
         
+    except HTTPException:
+        await db.rollback()
+        raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=500,
             detail=f"Error processing message: {str(e)}"
         )
 
 
+def _sse_event(event: str, data: str) -> str:
+    """Format a single Server-Sent Events frame"""
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+@router.post("/send/stream")
+async def send_message_stream(
+    request: SendMessageRequest,
+    current_user: UserSnapshot = Depends(get_current_user_snapshot),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Send a message and stream the Future Self reply as Server-Sent Events
+    
+    Emits a ``user_message`` event with the saved user message, ``ai_delta``
+    events with partial tokens, then a terminal ``ai_message`` event.
+    """
+    # Resolve the conversation before streaming so a bad ID is a plain 404
+    conversation, is_new_conversation = await chat_service.get_or_create_conversation(
+        db, current_user.id, request.conversation_id
+    )
+    
+    async def event_stream():
+        try:
+            turn = await chat_service.start_turn(
+                db, conversation, is_new_conversation, request.content, request.metadata
+            )
+            user_message = turn.user_message
+            user_msg_response = chat_service.to_message_response(
+                user_message, request.metadata, request.message_type
+            )
+            yield _sse_event("user_message", user_msg_response.model_dump_json())
+            
+            ai_request = await chat_service.build_generation_request(
+                db, str(current_user.id), request.content, turn.history, conversation=conversation
+            )
+            
+            ai_message_id = uuid.uuid4()
+            ai_response = None
+            async for chunk in ollama_service.stream_response(ai_request):
+                if chunk.done:
+                    ai_response = chunk.response
+                    break
+                if chunk.queue_position is not None:
+                    yield _sse_event("queue_position", json.dumps({"position": chunk.queue_position}))
+                    continue
+                yield _sse_event("ai_delta", json.dumps({
+                    "message_id": str(ai_message_id),
+                    "delta": chunk.delta
+                }))
+            
+            ai_message = await chat_service.persist_turn(db, turn, ai_response, ai_message_id)
+            await _enqueue_post_response_jobs(current_user.id, conversation, request.content, is_new_conversation)
+            await _sync_other_devices(current_user.id, conversation, user_message, ai_message, ai_response)
+            
+            done_event = ChatStreamComplete(
+                ai_message=chat_service.to_message_response(ai_message, ai_response.metadata),
+                conversation_id=str(conversation.id),
+                is_new_conversation=is_new_conversation,
+                generation_time_ms=ai_response.generation_time_ms,
+                time_to_first_token_ms=ai_response.time_to_first_token_ms
+            )
+            yield _sse_event("ai_message", done_event.model_dump_json())
+            
+        except TooManyRequestsError as e:
+            await db.rollback()
+            yield _sse_event("error", json.dumps({
+                "detail": e.detail,
+                "status_code": e.status_code,
+                "retry_after": e.retry_after
+            }))
+        except Exception as e:
+            await db.rollback()
+            yield _sse_event("error", json.dumps({
+                "detail": f"Error processing message: {str(e)}"
+            }))
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/conversations", response_model=ConversationListResponse)
 async def get_conversations(
     limit: int = 20,
     offset: int = 0,
     include_archived: bool = False,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    include_total: Optional[bool] = None,
+    current_user: UserSnapshot = Depends(get_current_user_snapshot),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get list of user's conversations"""
-    
-    query = db.query(Conversation).filter(Conversation.user_id == current_user.id)
-    
-    if not include_archived:
-        query = query.filter(Conversation.is_archived == False)
-    
-    total_count = query.count()
-    
-    conversations = query.order_by(
-        Conversation.updated_at.desc()
-    ).offset(offset).limit(limit).all()
-    
-    # Convert to response format with message counts
-    conversation_summaries = []
-    for conv in conversations:
-        message_count = db.query(ChatMessage).filter(
-            ChatMessage.conversation_id == conv.id
-        ).count()
-        
-        # Get last message timestamp
-        last_message = db.query(ChatMessage).filter(
-            ChatMessage.conversation_id == conv.id
-        ).order_by(ChatMessage.created_at.desc()).first()
-        
-        last_message_at = last_message.created_at if last_message else conv.created_at
-        
-        conversation_summaries.append(ConversationSummary(
-            id=str(conv.id),
-            title=conv.title,
-            summary=conv.summary,
-            message_count=message_count,
-            last_message_at=last_message_at,
-            is_archived=conv.is_archived,
-            created_at=conv.created_at
-        ))
-    
-    return ConversationListResponse(
-        conversations=conversation_summaries,
-        total_count=total_count,
-        has_more=offset + limit < total_count
+    """Get list of user's conversations
+    
+    Pass the previous page's ``next_cursor`` as ``cursor`` for keyset
+    pagination; ``offset`` is still supported. ``total_count`` is computed by
+    default in offset mode and only on request in cursor mode.
+    """
+    
+    return await chat_service.list_conversations(
+        db,
+        current_user.id,
+        limit=limit,
+        offset=offset,
+        include_archived=include_archived,
+        cursor=cursor,
+        include_total=include_total if include_total is not None else cursor is None
     )
 
 
 @router.get("/conversations/{conversation_id}", response_model=ConversationDetail)
 async def get_conversation_detail(
     conversation_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user_snapshot),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get detailed conversation with all messages"""
-    
-    conversation = db.query(Conversation).filter(
-        Conversation.id == conversation_id,
-        Conversation.user_id == current_user.id
-    ).first()
-    
-    if not conversation:
-        raise HTTPException(status_code=404, detail="Conversation not found")
+    """Get detailed conversation with all messages
     
-    # Get all messages for this conversation
-    messages = db.query(ChatMessage).filter(
-        ChatMessage.conversation_id == conversation_id
-    ).order_by(ChatMessage.created_at.asc()).all()
+    Messages are selected as plain rows and encoded straight to JSON;
+    returning the response directly skips re-validating every message
+    against ``response_model``, which still documents the shape.
+    """
     
-    message_responses = []
-    for msg in messages:
-        metadata = None
-        if msg.message_metadata:
-            try:
-                metadata = json.loads(msg.message_metadata)
-            except:
-                metadata = None
-        
-        message_responses.append(MessageResponse(
-            id=str(msg.id),
-            conversation_id=str(msg.conversation_id),
-            role=msg.role.value,
-            content=msg.content,
-            message_type="text",  # Default to text for now
-            metadata=metadata,
-            token_count=msg.token_count,
-            created_at=msg.created_at
-        ))
-    
-    return ConversationDetail(
-        id=str(conversation.id),
-        title=conversation.title,
-        summary=conversation.summary,
-        is_archived=conversation.is_archived,
-        created_at=conversation.created_at,
-        updated_at=conversation.updated_at,
-        messages=message_responses
-    )
+    return ORJSONResponse(await chat_service.get_conversation_detail(db, current_user.id, conversation_id))
 
 
 @router.get("/history", response_model=ChatHistoryResponse)
@@ -308,60 +262,40 @@ async def get_chat_history(
     limit: int = 50,
     offset: int = 0,
     include_system_messages: bool = False,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    include_total: Optional[bool] = None,
+    fallback_used: Optional[bool] = None,
+    current_user: UserSnapshot = Depends(get_current_user_snapshot),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get chat history for user or specific conversation"""
-    
-    query = db.query(ChatMessage).join(Conversation).filter(
-        Conversation.user_id == current_user.id
-    )
-    
-    if conversation_id:
-        query = query.filter(ChatMessage.conversation_id == conversation_id)
-    
-    if not include_system_messages:
-        query = query.filter(ChatMessage.role != DBMessageRole.SYSTEM)
-    
-    total_count = query.count()
-    
-    messages = query.order_by(
-        ChatMessage.created_at.desc()
-    ).offset(offset).limit(limit).all()
-    
-    message_responses = []
-    for msg in messages:
-        metadata = None
-        if msg.message_metadata:
-            try:
-                metadata = json.loads(msg.message_metadata)
-            except:
-                metadata = None
-        
-        message_responses.append(MessageResponse(
-            id=str(msg.id),
-            conversation_id=str(msg.conversation_id),
-            role=msg.role.value,
-            content=msg.content,
-            message_type="text",
-            metadata=metadata,
-            token_count=msg.token_count,
-            created_at=msg.created_at
-        ))
-    
-    return ChatHistoryResponse(
-        messages=message_responses,
+    """Get chat history for user or specific conversation
+    
+    Supports the same ``cursor``/``include_total`` pagination as
+    ``GET /conversations``, keyed on ``(created_at, id)``. Pass
+    ``fallback_used=true`` to list only the canned replies sent while the
+    AI was unavailable (``false`` excludes them). Like the conversation
+    detail, the page is encoded directly without re-validation.
+    """
+    
+    history = await chat_service.get_message_history(
+        db,
+        current_user.id,
         conversation_id=conversation_id,
-        total_count=total_count,
-        has_more=offset + limit < total_count
+        limit=limit,
+        offset=offset,
+        include_system_messages=include_system_messages,
+        cursor=cursor,
+        include_total=include_total if include_total is not None else cursor is None,
+        fallback_used=fallback_used
     )
+    return ORJSONResponse(history)
 
 
 @router.post("/conversations", response_model=ConversationSummary)
 async def create_conversation(
     request: ConversationCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user_snapshot),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new conversation"""
     
@@ -370,43 +304,33 @@ async def create_conversation(
         title=request.title or f"New Chat - {datetime.utcnow().strftime('%Y-%m-%d %H:%M')}"
     )
     db.add(conversation)
-    db.flush()
+    await db.flush()
     
     # Add initial message if provided
     if request.initial_message:
-        initial_msg = ChatMessage(
-            conversation_id=conversation.id,
-            role=DBMessageRole.USER,
-            content=request.initial_message
-        )
-        db.add(initial_msg)
-    
-    db.commit()
-    
-    return ConversationSummary(
-        id=str(conversation.id),
-        title=conversation.title,
-        summary=conversation.summary,
-        message_count=1 if request.initial_message else 0,
-        last_message_at=conversation.created_at,
-        is_archived=conversation.is_archived,
-        created_at=conversation.created_at
-    )
+        await chat_service.add_user_message(db, conversation, request.initial_message)
+    
+    await db.commit()
+    
+    return chat_service.to_conversation_summary(conversation)
 
 
 @router.put("/conversations/{conversation_id}", response_model=ConversationSummary)
 async def update_conversation(
     conversation_id: str,
     request: ConversationUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user_snapshot),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update conversation details"""
     
-    conversation = db.query(Conversation).filter(
-        Conversation.id == conversation_id,
-        Conversation.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Conversation).where(
+            Conversation.id == conversation_id,
+            Conversation.user_id == current_user.id
+        )
+    )
+    conversation = result.scalars().first()
     
     if not conversation:
         raise HTTPException(status_code=404, detail="Conversation not found")
@@ -417,70 +341,53 @@ async def update_conversation(
     if request.is_archived is not None:
         conversation.is_archived = request.is_archived
     
-    db.commit()
-    
-    # Get message count for response
-    message_count = db.query(ChatMessage).filter(
-        ChatMessage.conversation_id == conversation.id
-    ).count()
+    await db.commit()
     
-    # Get last message timestamp
-    last_message = db.query(ChatMessage).filter(
-        ChatMessage.conversation_id == conversation.id
-    ).order_by(ChatMessage.created_at.desc()).first()
-    
-    last_message_at = last_message.created_at if last_message else conversation.created_at
-    
-    return ConversationSummary(
-        id=str(conversation.id),
-        title=conversation.title,
-        summary=conversation.summary,
-        message_count=message_count,
-        last_message_at=last_message_at,
-        is_archived=conversation.is_archived,
-        created_at=conversation.created_at
-    )
+    return chat_service.to_conversation_summary(conversation)
 
 
 @router.delete("/conversations/{conversation_id}")
 async def delete_conversation(
     conversation_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user_snapshot),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a conversation and all its messages"""
     
-    conversation = db.query(Conversation).filter(
-        Conversation.id == conversation_id,
-        Conversation.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(Conversation).where(
+            Conversation.id == conversation_id,
+            Conversation.user_id == current_user.id
+        )
+    )
+    conversation = result.scalars().first()
     
     if not conversation:
         raise HTTPException(status_code=404, detail="Conversation not found")
     
     # Delete all messages first (should cascade, but being explicit)
-    db.query(ChatMessage).filter(
-        ChatMessage.conversation_id == conversation_id
-    ).delete()
+    await db.execute(
+        delete(ChatMessage).where(ChatMessage.conversation_id == conversation_id)
+    )
     
     # Delete conversation
-    db.delete(conversation)
-    db.commit()
+    await db.delete(conversation)
+    await db.commit()
     
     return {"message": "Conversation deleted successfully"}
 
 
 @router.get("/starter", response_model=ConversationStarter)
 async def get_conversation_starter(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user_snapshot),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a personalized conversation starter"""
     
-    starter_message = ai_context_service.get_conversation_starter(db, str(current_user.id))
+    starter_message = await ai_context_service.get_conversation_starter(db, str(current_user.id))
     
     # Get user context for suggested topics
-    user_context = ai_context_service.generate_conversation_context(db, str(current_user.id))
+    user_context = await ai_context_service.generate_conversation_context(db, str(current_user.id))
     
     suggested_topics = []
     if user_context.get("current_goals"):
@@ -503,20 +410,49 @@ async def get_conversation_starter(
     )
 
 
+@router.get("/daily-message", response_model=DailyMessage)
+async def get_daily_message(
+    current_user: UserSnapshot = Depends(get_current_user_snapshot),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Today's message from the user's Future Self, pre-generated by the nightly batch"""
+    message = await daily_message_service.get_daily_message(
+        db, current_user.id, datetime.utcnow().date()
+    )
+    if not message:
+        raise HTTPException(status_code=404, detail="No daily message for today")
+    
+    return DailyMessage(
+        id=message.id,
+        content=message.message,
+        message_type=message.message_type or "motivational",
+        is_read=message.is_read or False,
+        created_at=message.created_at
+    )
+
+
 @router.get("/health/ollama")
 async def check_ollama_health():
-    """Check Ollama service health"""
-    return await ollama_service.check_ollama_health()
+    """Check Ollama service health, including per-instance routing and admission state"""
+    health = await ollama_service.check_ollama_health()
+    health["pool"] = ollama_service.pool.stats()
+    health["admission"] = ollama_admission.stats()
+    return health
 
 
 @router.websocket("/ws")
 async def websocket_endpoint(
     websocket: WebSocket,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user_snapshot),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """WebSocket endpoint for real-time chat"""
-    await manager.connect(websocket, str(current_user.id))
+    """WebSocket endpoint for real-time chat
+    
+    A user may be connected from several devices at once; turns and typing
+    indicators from one are mirrored to the others.
+    """
+    user_id = str(current_user.id)
+    await connection_manager.connect(websocket, user_id)
     
     # Send connection confirmation
     connection_response = WebSocketResponse(
@@ -548,23 +484,25 @@ async def websocket_endpoint(
                     await process_websocket_message(websocket, ws_message, current_user, db)
                 
                 elif ws_message.type == "typing":
-                    # Handle user typing indicator (could broadcast to other connected devices)
+                    # Show the typing indicator on the user's other devices
                     typing_response = WebSocketResponse(
                         type="user_typing",
                         content="User is typing...",
                         conversation_id=ws_message.conversation_id,
-                        metadata={"user_id": str(current_user.id)}
+                        metadata={"user_id": user_id}
+                    )
+                    await connection_manager.send_personal_message(
+                        typing_response.model_dump_json(), user_id, exclude=websocket
                     )
-                    # For now, just acknowledge typing
-                    pass
                 
                 elif ws_message.type == "stop_typing":
-                    # Handle stop typing
                     stop_typing_response = WebSocketResponse(
                         type="user_stopped_typing",
                         conversation_id=ws_message.conversation_id
                     )
-                    pass
+                    await connection_manager.send_personal_message(
+                        stop_typing_response.model_dump_json(), user_id, exclude=websocket
+                    )
                 
             except json.JSONDecodeError:
                 error_response = WebSocketResponse(
@@ -582,55 +520,29 @@ async def websocket_endpoint(
                 await websocket.send_text(error_response.model_dump_json())
                 
     except WebSocketDisconnect:
-        manager.disconnect(websocket, str(current_user.id))
+        pass
+    finally:
+        await connection_manager.disconnect(websocket, user_id)
 
 
 async def process_websocket_message(
     websocket: WebSocket,
     ws_message: WebSocketMessage,
-    current_user: User,
-    db: Session
+    current_user: UserSnapshot,
+    db: AsyncSession
 ):
     """Process a WebSocket message through the AI service"""
     try:
-        # Get or create conversation
-        conversation = None
-        is_new_conversation = False
-        
-        if ws_message.conversation_id:
-            conversation = db.query(Conversation).filter(
-                Conversation.id == ws_message.conversation_id,
-                Conversation.user_id == current_user.id
-            ).first()
-            
-            if not conversation:
-                # Create new conversation if ID not found
-                conversation = Conversation(
-                    user_id=current_user.id,
-                    title=f"Chat started {datetime.utcnow().strftime('%Y-%m-%d %H:%M')}"
-                )
-                db.add(conversation)
-                db.flush()
-                is_new_conversation = True
-        else:
-            # Create new conversation
-            conversation = Conversation(
-                user_id=current_user.id,
-                title=f"Chat started {datetime.utcnow().strftime('%Y-%m-%d %H:%M')}"
-            )
-            db.add(conversation)
-            db.flush()
-            is_new_conversation = True
+        # Get or create conversation (unknown IDs start a new one)
+        conversation, is_new_conversation = await chat_service.get_or_create_conversation(
+            db, current_user.id, ws_message.conversation_id, create_if_missing=True
+        )
         
-        # Save user message
-        user_message = ChatMessage(
-            conversation_id=conversation.id,
-            role=DBMessageRole.USER,
-            content=ws_message.content,
-            message_metadata=json.dumps(ws_message.metadata) if ws_message.metadata else None
+        # Build the user message; it is saved with the reply once that's complete
+        turn = await chat_service.start_turn(
+            db, conversation, is_new_conversation, ws_message.content, ws_message.metadata
         )
-        db.add(user_message)
-        db.flush()
+        user_message = turn.user_message
         
         # Send user message confirmation
         user_msg_response = WebSocketResponse(
@@ -642,59 +554,38 @@ async def process_websocket_message(
         )
         await websocket.send_text(user_msg_response.model_dump_json())
         
-        # Get conversation history for context
-        recent_messages = db.query(ChatMessage).filter(
-            ChatMessage.conversation_id == conversation.id
-        ).order_by(ChatMessage.created_at.desc()).limit(10).all()
-        
-        # Reverse to get chronological order
-        recent_messages.reverse()
-        
-        # Format conversation history for AI
-        conversation_history = []
-        for msg in recent_messages[:-1]:  # Exclude the just-added user message
-            conversation_history.append({
-                "role": msg.role.value,
-                "content": msg.content
-            })
-        
-        # Generate personalized system prompt
-        system_prompt = ai_context_service.generate_system_prompt(db, str(current_user.id))
-        
-        # Get user context for personalization
-        user_context = ai_context_service.generate_conversation_context(
-            db, str(current_user.id), [msg["content"] for msg in conversation_history[-3:]]
-        )
-        
-        # Prepare AI generation request
-        ai_request = AIGenerationRequest(
-            user_message=ws_message.content,
-            conversation_history=conversation_history,
-            user_context=user_context,
-            system_prompt=system_prompt
+        # Prepare AI generation request with history and personalization
+        ai_request = await chat_service.build_generation_request(
+            db, str(current_user.id), ws_message.content, turn.history, conversation=conversation
         )
         
-        # Generate AI response
-        ai_response = await ollama_service.generate_response(ai_request)
-        
-        # Save AI message
-        ai_message = ChatMessage(
-            conversation_id=conversation.id,
-            role=DBMessageRole.ASSISTANT,
-            content=ai_response.content,
-            token_count=str(ai_response.token_count) if ai_response.token_count else None,
-            message_metadata=json.dumps(ai_response.metadata) if ai_response.metadata else None
-        )
-        db.add(ai_message)
-        
-        # Update conversation title if it's new and we have a good first message
-        if is_new_conversation and len(ws_message.content) > 10:
-            title_preview = ws_message.content[:50]
-            if len(ws_message.content) > 50:
-                title_preview += "..."
-            conversation.title = title_preview
+        # Stream AI response, forwarding partial tokens as they arrive.
+        # The id is assigned up front so deltas and the final message share it.
+        ai_message_id = uuid.uuid4()
+        ai_response = None
+        async for chunk in ollama_service.stream_response(ai_request):
+            if chunk.done:
+                ai_response = chunk.response
+                break
+            if chunk.queue_position is not None:
+                position_response = WebSocketResponse(
+                    type="queue_position",
+                    conversation_id=str(conversation.id),
+                    metadata={"position": chunk.queue_position}
+                )
+                await websocket.send_text(position_response.model_dump_json())
+                continue
+            delta_response = WebSocketResponse(
+                type="ai_delta",
+                content=chunk.delta,
+                message_id=str(ai_message_id),
+                conversation_id=str(conversation.id)
+            )
+            await websocket.send_text(delta_response.model_dump_json())
         
-        db.commit()
+        # Save the conversation and both messages once the full response has been assembled
+        ai_message = await chat_service.persist_turn(db, turn, ai_response, ai_message_id)
+        await _enqueue_post_response_jobs(current_user.id, conversation, ws_message.content, is_new_conversation)
         
         # Send AI response
         ai_msg_response = WebSocketResponse(
@@ -705,13 +596,23 @@ async def process_websocket_message(
             metadata={
                 "token_count": ai_response.token_count,
                 "model_used": ai_response.model_used,
-                "generation_time_ms": ai_response.generation_time_ms
+                "generation_time_ms": ai_response.generation_time_ms,
+                "time_to_first_token_ms": ai_response.time_to_first_token_ms
             }
         )
         await websocket.send_text(ai_msg_response.model_dump_json())
+        await _sync_other_devices(current_user.id, conversation, user_message, ai_message, ai_response, exclude=websocket)
         
+    except TooManyRequestsError as e:
+        await db.rollback()
+        error_response = WebSocketResponse(
+            type="error",
+            content=e.detail,
+            metadata={"error_code": "AI_BUSY", "retry_after": e.retry_after}
+        )
+        await websocket.send_text(error_response.model_dump_json())
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         error_response = WebSocketResponse(
             type="error",
             content=f"Error processing message: {str(e)}",
@@ -722,21 +623,26 @@ async def process_websocket_message(
 
 @router.delete("/history")
 async def clear_chat_history(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user_snapshot),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Clear all chat history for the user"""
     
     # Delete all messages for user's conversations
-    db.query(ChatMessage).join(Conversation).filter(
+    user_conversation_ids = select(Conversation.id).where(
         Conversation.user_id == current_user.id
-    ).delete(synchronize_session=False)
+    )
+    await db.execute(
+        delete(ChatMessage).where(
+            ChatMessage.conversation_id.in_(user_conversation_ids)
+        ).execution_options(synchronize_session=False)
+    )
     
     # Delete all conversations
-    db.query(Conversation).filter(
-        Conversation.user_id == current_user.id
-    ).delete()
+    await db.execute(
+        delete(Conversation).where(Conversation.user_id == current_user.id)
+    )
     
-    db.commit()
+    await db.commit()
     
     return {"message": "All chat history cleared successfully"} 
\ No newline at end of file
@@ -1,16 +1,24 @@
 from fastapi import APIRouter
 from app.core.config import settings
+from app.core.cache import get_cache_stats
+from app.core.singleflight import SingleFlight, get_singleflight_stats
+from app.jobs import get_job_stats
+from app.realtime import get_connection_stats
+from app.services.auth_service import password_hasher
 from app.database.connection import check_database_health, check_supabase_health
 
 router = APIRouter()
 
+# Load balancer probes arrive many times per second; they share one round of checks
+health_flight = SingleFlight("health_checks", ttl=settings.HEALTH_CHECK_CACHE_TTL)
+
 
 @router.get("/")
 async def health_check():
     """Detailed health check endpoint"""
     # Check database health
-    db_health = await check_database_health()
-    supabase_health = await check_supabase_health()
+    db_health = await health_flight.do("database", check_database_health)
+    supabase_health = await health_flight.do("supabase", check_supabase_health)
     
     # Overall health status
     overall_status = "healthy"
@@ -39,10 +47,40 @@ async def ping():
 @router.get("/database")
 async def database_health():
     """Database-specific health check"""
-    return await check_database_health()
+    return await health_flight.do("database", check_database_health)
 
 
 @router.get("/supabase")
 async def supabase_health():
     """Supabase-specific health check"""
-    return await check_supabase_health() 
\ No newline at end of file
+    return await health_flight.do("supabase", check_supabase_health)
+
+
+@router.get("/cache")
+async def cache_health():
+    """Hit/miss metrics for the in-process caches"""
+    return get_cache_stats()
+
+
+@router.get("/coalescing")
+async def coalescing_health():
+    """How many calls each single-flight group ran, shared or served from its short cache"""
+    return get_singleflight_stats()
+
+
+@router.get("/password-hashing")
+async def password_hashing_health():
+    """bcrypt pool size, queue depth and rejected login attempts"""
+    return password_hasher.stats()
+
+
+@router.get("/websockets")
+async def websockets_health():
+    """Open WebSockets on this worker and cross-worker fan-out counters"""
+    return get_connection_stats()
+
+
+@router.get("/jobs")
+async def jobs_health():
+    """Background job queue depth, outcomes and recent dead letters"""
+    return await get_job_stats()
@@ -1,8 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Dict, Any
 
-from app.database.connection import get_db
+from app.database.connection import get_async_db
 from app.services.onboarding_service import OnboardingService
 from app.schemas.onboarding import (
     OnboardingStepUpdate,
@@ -13,8 +13,8 @@ from app.schemas.onboarding import (
     OnboardingComplete,
     OnboardingStepValidation
 )
-from app.core.auth import get_current_user
-from app.models.auth import User
+from app.core.auth import get_current_user_snapshot
+from app.schemas.auth import UserSnapshot
 from app.core.exceptions import ValidationError, NotFoundError
 
 
@@ -24,12 +24,12 @@ onboarding_service = OnboardingService()
 
 @router.post("/start", response_model=OnboardingStart, status_code=status.HTTP_201_CREATED)
 async def start_onboarding(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user_snapshot),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Initialize onboarding process for the current user"""
     try:
-        onboarding = onboarding_service.start_onboarding(db, str(current_user.id))
+        onboarding = await onboarding_service.start_onboarding(db, str(current_user.id))
         return OnboardingStart(message="Onboarding started successfully")
         
     except NotFoundError as e:
@@ -48,12 +48,12 @@ async def start_onboarding(
 async def update_onboarding_step(
     step_number: int,
     step_update: OnboardingStepUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user_snapshot),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a specific onboarding step"""
     try:
-        onboarding = onboarding_service.update_step(
+        onboarding = await onboarding_service.update_step(
             db, 
             str(current_user.id), 
             step_number, 
@@ -61,7 +61,7 @@ async def update_onboarding_step(
         )
         
         # Check if the step is now complete
-        validation = onboarding_service.validate_step(db, str(current_user.id), step_number)
+        validation = await onboarding_service.validate_step(db, str(current_user.id), step_number)
         completion_percentage = onboarding.get_completion_percentage()
         
         return OnboardingStepResponse(
@@ -86,12 +86,12 @@ async def update_onboarding_step(
 
 @router.get("/progress", response_model=OnboardingProgress)
 async def get_onboarding_progress(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user_snapshot),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get current user's onboarding progress"""
     try:
-        progress = onboarding_service.get_progress(db, str(current_user.id))
+        progress = await onboarding_service.get_progress(db, str(current_user.id))
         return progress
         
     except Exception as e:
@@ -103,12 +103,12 @@ async def get_onboarding_progress(
 
 @router.get("/data", response_model=OnboardingDataResponse)
 async def get_onboarding_data(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user_snapshot),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get current user's complete onboarding data"""
     try:
-        data = onboarding_service.get_onboarding_data(db, str(current_user.id))
+        data = await onboarding_service.get_onboarding_data(db, str(current_user.id))
         return data
         
     except Exception as e:
@@ -121,12 +121,12 @@ async def get_onboarding_data(
 @router.get("/step/{step_number}/validate", response_model=OnboardingStepValidation)
 async def validate_onboarding_step(
     step_number: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user_snapshot),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Validate if a specific step is complete and get missing fields"""
     try:
-        validation = onboarding_service.validate_step(db, str(current_user.id), step_number)
+        validation = await onboarding_service.validate_step(db, str(current_user.id), step_number)
         return validation
         
     except ValidationError as e:
@@ -143,12 +143,12 @@ async def validate_onboarding_step(
 
 @router.post("/complete", response_model=OnboardingComplete)
 async def complete_onboarding(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user_snapshot),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Mark onboarding as complete if requirements are met"""
     try:
-        onboarding = onboarding_service.complete_onboarding(db, str(current_user.id))
+        onboarding = await onboarding_service.complete_onboarding(db, str(current_user.id))
         
         return OnboardingComplete(
             user_id=str(onboarding.user_id),
@@ -171,12 +171,12 @@ async def complete_onboarding(
 
 @router.get("/next-step")
 async def get_next_step(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user_snapshot),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get the next incomplete step number"""
     try:
-        next_step = onboarding_service.get_next_step(db, str(current_user.id))
+        next_step = await onboarding_service.get_next_step(db, str(current_user.id))
         return {"next_step": next_step}
         
     except Exception as e:
@@ -188,12 +188,12 @@ async def get_next_step(
 
 @router.get("/summary")
 async def get_step_summary(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserSnapshot = Depends(get_current_user_snapshot),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get summary of all steps with completion status"""
     try:
-        summary = onboarding_service.get_step_summary(db, str(current_user.id))
+        summary = await onboarding_service.get_step_summary(db, str(current_user.id))
         return {"steps": summary}
         
     except Exception as e:
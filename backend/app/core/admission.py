@@ -0,0 +1,185 @@
+"""
+Admission control: a concurrency limit with a bounded, per-user fair wait queue
+"""
+
+import asyncio
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Hashable, Optional
+
+from app.core.exceptions import TooManyRequestsError
+
+
+class AdmissionController:
+    """Lets at most ``max_concurrent`` callers run at once
+
+    Callers that can't start wait in a per-key (per-user) queue. Freed slots
+    go round-robin across keys, and no key holds more than ``max_per_key``
+    slots, so one busy user can't starve the rest. Waiting is bounded in
+    both queue length and time: over either limit the caller gets a
+    ``TooManyRequestsError`` instead of piling more work on the backend.
+
+    Not thread-safe; meant to be used from the event loop.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrent: int = 2,
+        max_per_key: int = 1,
+        max_queue: int = 32,
+        max_queue_per_key: int = 4,
+        max_wait: float = 30.0,
+        poll_interval: float = 1.0
+    ):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_per_key = max_per_key
+        self.max_queue = max_queue
+        self.max_queue_per_key = max_queue_per_key
+        self.max_wait = max_wait
+        self.poll_interval = poll_interval  # How often a waiter re-checks its position
+
+        self._active: Dict[Hashable, int] = {}
+        self._waiting: "OrderedDict[Hashable, Deque[asyncio.Future]]" = OrderedDict()
+
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0  # Queue full
+        self.timed_out = 0  # Waited longer than max_wait
+        self.max_wait_seen = 0.0
+
+    @property
+    def active(self) -> int:
+        return sum(self._active.values())
+
+    @property
+    def waiting(self) -> int:
+        return sum(len(waiters) for waiters in self._waiting.values())
+
+    async def admit(self, key: Hashable, max_wait: Optional[float] = None) -> AsyncIterator[int]:
+        """Wait for a slot, yielding the caller's 1-based queue position whenever it changes
+
+        Yields nothing if a slot is free. Once the iteration finishes the
+        caller holds a slot and must ``release(key)`` it.
+        """
+        if self.waiting >= self.max_queue or len(self._waiting.get(key, ())) >= self.max_queue_per_key:
+            self.rejected += 1
+            raise TooManyRequestsError("Server is busy, please try again shortly", self._retry_after())
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = started + (self.max_wait if max_wait is None else max_wait)
+        waiter = loop.create_future()
+        self._waiting.setdefault(key, deque()).append(waiter)
+        self._dispatch()
+
+        if not waiter.done():
+            self.queued += 1
+        last_position = None
+        try:
+            while not waiter.done():
+                position = self._position(key, waiter)
+                if position != last_position:
+                    last_position = position
+                    yield position
+
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    self.timed_out += 1
+                    raise TooManyRequestsError("Server is busy, please try again shortly", self._retry_after())
+                try:
+                    await asyncio.wait_for(asyncio.shield(waiter), min(self.poll_interval, remaining))
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                self.release(key)  # Granted just as the caller gave up
+            else:
+                waiter.cancel()
+                self._remove(key, waiter)
+            raise
+
+        self.max_wait_seen = max(self.max_wait_seen, loop.time() - started)
+
+    async def acquire(self, key: Hashable, max_wait: Optional[float] = None):
+        """Wait for a slot without position updates"""
+        async for _ in self.admit(key, max_wait):
+            pass
+
+    def release(self, key: Hashable):
+        count = self._active.get(key, 0) - 1
+        if count > 0:
+            self._active[key] = count
+        else:
+            self._active.pop(key, None)
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, key: Hashable, max_wait: Optional[float] = None):
+        await self.acquire(key, max_wait)
+        try:
+            yield
+        finally:
+            self.release(key)
+
+    def _dispatch(self):
+        """Hand free slots to waiting keys in round-robin order"""
+        while self.active < self.max_concurrent:
+            for key, waiters in self._waiting.items():
+                if self._active.get(key, 0) < self.max_per_key:
+                    break
+            else:
+                return  # Everyone waiting is at their per-key limit
+
+            waiter = waiters.popleft()
+            if waiters:
+                self._waiting.move_to_end(key)  # Next turn goes to another key
+            else:
+                del self._waiting[key]
+            self._active[key] = self._active.get(key, 0) + 1
+            self.admitted += 1
+            waiter.set_result(True)
+
+    def _remove(self, key: Hashable, waiter: asyncio.Future):
+        waiters = self._waiting.get(key)
+        if waiters is None:
+            return
+        try:
+            waiters.remove(waiter)
+        except ValueError:
+            pass
+        if not waiters:
+            del self._waiting[key]
+        self._dispatch()
+
+    def _position(self, key: Hashable, waiter: asyncio.Future) -> int:
+        """Estimated place in line under round-robin dispatch"""
+        own = self._waiting.get(key)
+        if own is None or waiter not in own:
+            return 1
+        index = own.index(waiter)
+        ahead = index
+        before_key = True
+        for other, waiters in self._waiting.items():
+            if other == key:
+                before_key = False
+                continue
+            ahead += min(len(waiters), index + (1 if before_key else 0))
+        return ahead + 1
+
+    def _retry_after(self) -> int:
+        return max(1, int(self.max_wait_seen) or 5)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "max_concurrent": self.max_concurrent,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "max_wait_seconds": round(self.max_wait_seen, 3)
+        }
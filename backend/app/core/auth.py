@@ -4,13 +4,14 @@ Authentication middleware and dependencies
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 from jose import JWTError, jwt
 
 from app.core.config import settings
-from app.database.connection import get_db
+from app.database.connection import get_async_db
 from app.models.auth import User
+from app.schemas.auth import UserSnapshot
 from app.services.auth_service import AuthService
 from app.core.exceptions import AuthenticationError
 
@@ -22,7 +23,7 @@ auth_service = AuthService()
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
     """
     Get current authenticated user from JWT token
@@ -47,7 +48,7 @@ async def get_current_user(
             raise credentials_exception
         
         # Get user from database
-        user = auth_service.get_user_by_id(db, user_id)
+        user = await auth_service.get_user_by_id(db, user_id)
         if user is None:
             raise credentials_exception
         
@@ -66,6 +67,52 @@ async def get_current_user(
         raise credentials_exception
 
 
+async def get_current_user_snapshot(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> UserSnapshot:
+    """
+    Get current authenticated user as a cached snapshot
+    
+    For endpoints that only need the user's id and flags: within
+    AUTH_USER_CACHE_TTL of the last lookup this verifies the JWT without a
+    database round trip. Use get_current_user when the ORM User is needed.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    
+    try:
+        payload = jwt.decode(
+            credentials.credentials,
+            settings.SECRET_KEY,
+            algorithms=[settings.ALGORITHM]
+        )
+        
+        user_id: str = payload.get("sub")
+        if user_id is None:
+            raise credentials_exception
+        
+        user = await auth_service.get_user_snapshot(db, user_id)
+        if user is None:
+            raise credentials_exception
+        
+        if not user.is_active:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="User account is disabled"
+            )
+        
+        return user
+        
+    except JWTError:
+        raise credentials_exception
+    except AuthenticationError:
+        raise credentials_exception
+
+
 async def get_current_active_user(
     current_user: User = Depends(get_current_user)
 ) -> User:
@@ -89,9 +136,9 @@ async def get_current_verified_user(
     return current_user
 
 
-def get_optional_current_user(
+async def get_optional_current_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Optional[User]:
     """
     Get current user if authenticated, otherwise return None
@@ -110,7 +157,7 @@ def get_optional_current_user(
         if user_id is None:
             return None
         
-        user = auth_service.get_user_by_id(db, user_id)
+        user = await auth_service.get_user_by_id(db, user_id)
         if user is None or not user.is_active:
             return None
         
@@ -0,0 +1,100 @@
+"""
+In-process LRU/TTL cache with hit/miss metrics
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+_MISSING = object()
+
+# Every named cache, so their metrics can be reported together
+cache_registry: Dict[str, "LRUCache"] = {}
+
+
+class LRUCache:
+    """Bounded least-recently-used cache whose entries expire after ``ttl`` seconds
+
+    Not thread-safe; meant to be used from the event loop. Each worker process
+    has its own copy, so cached values must be safe to serve slightly stale or
+    be validated by the caller (e.g. against a version stamp).
+    """
+
+    def __init__(self, name: str, max_size: int = 1024, ttl: Optional[float] = 300.0):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0  # Misses caused by a version mismatch
+        self.evictions = 0
+        self.invalidations = 0
+
+        cache_registry[name] = self
+
+    def get(self, key: Hashable, default: Any = None, version: Any = _MISSING) -> Any:
+        """Return the cached value, or ``default`` if missing or expired
+
+        When ``version`` is given, an entry stored under a different version
+        is treated as stale: it is dropped and counted as a miss.
+        """
+        entry = self._entries.get(key, _MISSING)
+        if entry is not _MISSING:
+            value, entry_version, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+            elif version is not _MISSING and version != entry_version:
+                del self._entries[key]
+                self.stale += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+
+        self.misses += 1
+        return default
+
+    def set(self, key: Hashable, value: Any, version: Any = None):
+        """Store a value, evicting the least recently used entry when full"""
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        self._entries[key] = (value, version, expires_at)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> bool:
+        """Drop one entry; returns whether it was cached"""
+        if self._entries.pop(key, _MISSING) is _MISSING:
+            return False
+        self.invalidations += 1
+        return True
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+def get_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Metrics for every registered cache"""
+    return {name: cache.stats() for name, cache in cache_registry.items()}
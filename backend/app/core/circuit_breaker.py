@@ -0,0 +1,196 @@
+"""
+Circuit breaker for calls to a dependency that can go down or get slow
+"""
+
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit is open"""
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker driven by error rate and latency
+
+    While closed, the outcome of each call is kept in a rolling window of
+    ``window`` calls. Once the window holds ``min_calls`` outcomes and either
+    the failure rate reaches ``failure_rate`` or the share of calls slower
+    than ``slow_call_seconds`` reaches ``slow_call_rate``, the circuit opens
+    and calls fail fast with ``CircuitOpenError`` for ``open_seconds``. Then
+    it goes half-open and lets ``half_open_calls`` trial calls through: a
+    healthy trial closes it, a failed or slow one opens it again. Out-of-band
+    health probes open a closed circuit only after ``probe_failures`` of them
+    fail in a row, so one slow poll doesn't eject a working dependency.
+
+    Not thread-safe; meant to be used from the event loop.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = 0.5,
+        slow_call_seconds: float = 60.0,
+        slow_call_rate: float = 0.8,
+        window: int = 20,
+        min_calls: int = 5,
+        open_seconds: float = 30.0,
+        half_open_calls: int = 1,
+        probe_failures: int = 3,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.probe_failures = probe_failures
+        self.clock = clock
+
+        self.state = self.CLOSED
+        self._outcomes: Deque[Tuple[bool, bool]] = deque(maxlen=window)  # (failed, slow)
+        self._opened_at: Optional[float] = None
+        self._trials = 0  # Trial calls let through while half-open
+        self._trial_at = 0.0
+        self._failed_probes = 0  # Consecutive failed probes while closed
+
+        self.short_circuited = 0
+        self.times_opened = 0
+        self.last_error: Optional[str] = None
+
+    def available(self) -> bool:
+        """Whether ``before_call`` would let a call through right now"""
+        if self.state == self.OPEN:
+            return self._reset_due()
+        if self.state == self.HALF_OPEN:
+            return self._trial_free()
+        return True
+
+    def check(self):
+        """Fail fast if the circuit is open, without using up a half-open trial"""
+        if self.state == self.OPEN and not self._reset_due():
+            self.short_circuited += 1
+            raise CircuitOpenError(f"{self.name} circuit is open")
+
+    def before_call(self):
+        """Reserve the right to make one call, or raise ``CircuitOpenError``"""
+        if self.state == self.OPEN:
+            if not self._reset_due():
+                self.short_circuited += 1
+                raise CircuitOpenError(f"{self.name} circuit is open")
+            self._half_open()
+
+        if self.state == self.HALF_OPEN:
+            if not self._trial_free():
+                self.short_circuited += 1
+                raise CircuitOpenError(f"{self.name} circuit is half-open, trial call in progress")
+            self._trials += 1
+            self._trial_at = self.clock()
+
+    def record_success(self, duration: float):
+        slow = duration >= self.slow_call_seconds
+        self._failed_probes = 0  # The dependency answered; earlier probes were flukes
+        if self.state == self.HALF_OPEN:
+            if slow:
+                self._open(f"Slow trial call ({duration:.1f}s)")
+            else:
+                self._close()
+            return
+        self._record(failed=False, slow=slow)
+
+    def record_failure(self, error: Optional[str] = None):
+        self.last_error = error
+        if self.state == self.HALF_OPEN:
+            self._open(error)
+            return
+        self._record(failed=True, slow=False)
+
+    def record_probe(self, healthy: bool, error: Optional[str] = None):
+        """Feed an out-of-band health check into the breaker
+
+        ``probe_failures`` failed probes in a row open a closed circuit, and
+        one failed probe reopens a half-open one. A passing probe on an open
+        circuit moves it to half-open so the next call can test it.
+        """
+        if not healthy:
+            self.last_error = error or "Health probe failed"
+            self._failed_probes += 1
+            if self.state == self.HALF_OPEN or (
+                self.state == self.CLOSED and self._failed_probes >= self.probe_failures
+            ):
+                self._open(self.last_error)
+            return
+        self._failed_probes = 0
+        if self.state == self.OPEN:
+            self._half_open()
+
+    def _record(self, failed: bool, slow: bool):
+        if self.state != self.CLOSED:
+            return
+        self._outcomes.append((failed, slow))
+        if len(self._outcomes) < self.min_calls:
+            return
+        failure_rate, slow_rate = self._rates()
+        if failure_rate >= self.failure_rate:
+            self._open(f"Failure rate {failure_rate:.0%} over the last {len(self._outcomes)} calls")
+        elif slow_rate >= self.slow_call_rate:
+            self._open(f"{slow_rate:.0%} of the last {len(self._outcomes)} calls were slow")
+
+    def _rates(self) -> Tuple[float, float]:
+        if not self._outcomes:
+            return 0.0, 0.0
+        total = len(self._outcomes)
+        failures = sum(1 for failed, _ in self._outcomes if failed)
+        slow = sum(1 for _, is_slow in self._outcomes if is_slow)
+        return failures / total, slow / total
+
+    def _trial_free(self) -> bool:
+        if self._trials >= self.half_open_calls and self.clock() - self._trial_at >= self.open_seconds:
+            self._trials = 0  # The trial never reported back (e.g. it was cancelled)
+        return self._trials < self.half_open_calls
+
+    def _reset_due(self) -> bool:
+        return self._opened_at is not None and self.clock() - self._opened_at >= self.open_seconds
+
+    def _open(self, reason: Optional[str]):
+        self.state = self.OPEN
+        self._opened_at = self.clock()
+        self._trials = 0
+        self.times_opened += 1
+        if reason:
+            self.last_error = reason
+
+    def _half_open(self):
+        self.state = self.HALF_OPEN
+        self._trials = 0
+
+    def _close(self):
+        self.state = self.CLOSED
+        self._opened_at = None
+        self._trials = 0
+        self._failed_probes = 0
+        self._outcomes.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        failure_rate, slow_rate = self._rates()
+        retry_in = None
+        if self.state == self.OPEN and self._opened_at is not None:
+            retry_in = round(max(0.0, self.open_seconds - (self.clock() - self._opened_at)), 1)
+        return {
+            "name": self.name,
+            "state": self.state,
+            "failure_rate": round(failure_rate, 3),
+            "slow_call_rate": round(slow_rate, 3),
+            "window_calls": len(self._outcomes),
+            "retry_in_seconds": retry_in,
+            "times_opened": self.times_opened,
+            "short_circuited": self.short_circuited,
+            "last_error": self.last_error
+        }
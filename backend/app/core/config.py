@@ -1,4 +1,5 @@
 from typing import List, Optional
+import json
 import os
 from pydantic_settings import BaseSettings
 from pydantic import validator
@@ -15,11 +16,21 @@ class Settings(BaseSettings):
     ENVIRONMENT: str = "development"
     DEBUG: bool = True
     API_V1_STR: str = "/api/v1"
+    HEALTH_CHECK_CACHE_TTL: float = 2.0  # seconds a health check result is shared between probes
     
     # Security
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    AUTH_USER_CACHE_SIZE: int = 4096  # user snapshots kept for the auth fast path
+    AUTH_USER_CACHE_TTL: float = 60.0  # seconds; bounds staleness across workers
+    PASSWORD_HASH_WORKERS: int = 2  # threads running bcrypt; leave cores for chat traffic
+    PASSWORD_HASH_MAX_PER_CLIENT: int = 1  # hashes one client IP may run at once
+    PASSWORD_HASH_MAX_PER_EMAIL: int = 3  # hashes queued or running per account (room for a double submit)
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+    PASSWORD_HASH_MAX_QUEUE_PER_CLIENT: int = 4
+    PASSWORD_HASH_QUEUE_TIMEOUT: float = 10.0  # seconds before a waiting login gets HTTP 429
+    FORWARDED_TRUSTED_HOPS: int = 0  # reverse proxies in front of the app that append to X-Forwarded-For
     
     # Database
     SUPABASE_URL: str
@@ -30,10 +41,74 @@ class Settings(BaseSettings):
     # External APIs
     OPENAI_API_KEY: Optional[str] = None
     OLLAMA_BASE_URL: str = "http://localhost:11434"
+    OLLAMA_BASE_URLS: str = ""  # comma-separated (or JSON list) Ollama instances to balance across; see ollama_base_urls
+    OLLAMA_POOL_REFRESH_SECONDS: float = 15.0  # how often each instance's /api/ps is polled
+    
+    # Ollama HTTP client pool (one client for the app lifetime)
+    OLLAMA_MAX_CONNECTIONS: int = 50
+    OLLAMA_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    OLLAMA_KEEPALIVE_EXPIRY: float = 60.0  # seconds an idle connection is kept
+    OLLAMA_CONNECT_TIMEOUT: float = 5.0
+    OLLAMA_READ_TIMEOUT: float = 120.0  # generation can take a while
+    OLLAMA_WRITE_TIMEOUT: float = 10.0
+    OLLAMA_POOL_TIMEOUT: float = 10.0  # wait for a free connection
+    OLLAMA_HTTP2: bool = False  # only negotiated over TLS (e.g. Ollama behind a proxy)
+    
+    # Admission control in front of Ollama
+    OLLAMA_MAX_CONCURRENT: int = 2  # generations sent to each Ollama instance at once
+    OLLAMA_MAX_PER_USER: int = 1  # slots one user (or the background lane) may hold
+    OLLAMA_MAX_QUEUE: int = 32  # callers allowed to wait for a slot
+    OLLAMA_MAX_QUEUE_PER_USER: int = 4
+    OLLAMA_QUEUE_TIMEOUT: float = 30.0  # seconds a caller may wait before being turned away
+    OLLAMA_QUEUE_OVERFLOW: str = "reject"  # "reject" (HTTP 429) or "fallback" (canned reply)
+    
+    # Circuit breaker around Ollama calls
+    OLLAMA_BREAKER_FAILURE_RATE: float = 0.5  # share of failed calls that opens the circuit
+    OLLAMA_BREAKER_SLOW_CALL_SECONDS: float = 60.0  # a call (or first streamed token) slower than this counts as slow
+    OLLAMA_BREAKER_SLOW_CALL_RATE: float = 0.8  # share of slow calls that opens the circuit
+    OLLAMA_BREAKER_WINDOW: int = 20  # recent calls considered
+    OLLAMA_BREAKER_MIN_CALLS: int = 5  # calls needed before the rates are trusted
+    OLLAMA_BREAKER_OPEN_SECONDS: float = 30.0  # how long to fail fast before a trial call
+    OLLAMA_BREAKER_PROBE_FAILURES: int = 3  # consecutive failed health probes that open the circuit
+    
+    # Ollama KV-cache reuse across turns of a conversation
+    OLLAMA_REUSE_CONTEXT: bool = True
+    OLLAMA_KEEP_ALIVE: str = "30m"  # how long Ollama keeps the model loaded after a request
+    OLLAMA_CONTEXT_CACHE_SIZE: int = 512  # conversations whose context is kept in memory
+    OLLAMA_CONTEXT_TTL: int = 1800  # seconds; matches OLLAMA_KEEP_ALIVE
+    
+    # Per-user compiled system prompt cache
+    PROMPT_CACHE_MAX_SIZE: int = 1024
+    PROMPT_CACHE_TTL: int = 3600  # seconds; also bounds staleness of age-based text
+    USER_CONTEXT_COALESCE_TTL: float = 2.0  # seconds a coalesced context lookup is reused
+    
+    # Recent turns kept per conversation so active chats build history without a read
+    CONVERSATION_WINDOW_CACHE_SIZE: int = 1024  # conversations kept per worker
+    CONVERSATION_WINDOW_TTL: int = 900  # seconds without a turn before a window is dropped
     
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
     
+    # Background jobs (titles, summaries, activity logging)
+    JOB_QUEUE_BACKEND: str = "auto"  # "redis", "memory", or "auto" (Redis unless on the SQLite fallback)
+    JOB_QUEUE_PREFIX: str = "future_self:jobs"
+    JOB_WORKERS: int = 2
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BASE_DELAY: float = 2.0  # seconds; doubles on each retry
+    JOB_DEDUP_TTL: int = 600  # seconds a dedup key is held if its job is lost
+    JOB_VISIBILITY_TIMEOUT: float = 600.0  # seconds before a job whose worker died is requeued (Redis)
+    
+    # WebSocket fan-out across API workers
+    WS_PUBSUB_BACKEND: str = "auto"  # "redis", "memory", or "auto" (Redis unless on the SQLite fallback)
+    WS_PUBSUB_PREFIX: str = "future_self:ws"
+    
+    # Nightly daily-message batch (enable on one instance when running several)
+    DAILY_MESSAGE_SCHEDULER_ENABLED: bool = True
+    DAILY_MESSAGE_BATCH_HOUR: int = 3  # UTC hour to pre-generate the day's messages (off-peak)
+    DAILY_MESSAGE_WEEKLY_DAY: int = 0  # weekday for "weekly" users (0 = Monday)
+    DAILY_MESSAGE_CONCURRENCY: int = 4  # simultaneous Ollama generations
+    DAILY_MESSAGE_BATCH_SIZE: int = 100  # users per bulk insert
+    
     # CORS
     CORS_ORIGINS: List[str] = ["*"] if os.getenv("ENVIRONMENT", "development") == "development" else [
         "http://localhost:3000", 
@@ -64,6 +139,21 @@ class Settings(BaseSettings):
     LOG_LEVEL: str = "INFO"
     LOG_FILE: str = "./logs/app.log"
     
+    @property
+    def ollama_base_urls(self) -> List[str]:
+        """Ollama instances to route across, defaulting to OLLAMA_BASE_URL
+
+        OLLAMA_BASE_URLS is a plain string so pydantic-settings doesn't
+        JSON-decode it before it can be split; both the comma-separated and
+        the JSON list forms are accepted here.
+        """
+        value = self.OLLAMA_BASE_URLS.strip()
+        if value.startswith("["):
+            urls = json.loads(value)
+        else:
+            urls = value.split(",")
+        return [url.strip() for url in urls if url.strip()] or [self.OLLAMA_BASE_URL]
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
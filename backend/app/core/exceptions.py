@@ -48,4 +48,14 @@ class ConflictError(HTTPException):
         super().__init__(
             status_code=status.HTTP_409_CONFLICT,
             detail=detail,
-        ) 
\ No newline at end of file
+        ) 
+
+class TooManyRequestsError(HTTPException):
+    """Too many requests / service saturated exception"""
+    def __init__(self, detail: str = "Too many requests", retry_after: int = 5):
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail,
+            headers={"Retry-After": str(retry_after)},
+        )
+        self.retry_after = retry_after
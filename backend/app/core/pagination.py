@@ -0,0 +1,44 @@
+"""
+Keyset (cursor) pagination helpers
+"""
+
+import base64
+import json
+import uuid
+from datetime import datetime, timezone
+from typing import Tuple
+
+from sqlalchemy import tuple_
+
+from app.core.exceptions import ValidationError
+
+
+def encode_cursor(sort_value: datetime, row_id) -> str:
+    """Encode the last row's sort key as an opaque, URL-safe cursor"""
+    payload = json.dumps({"t": sort_value.isoformat(), "id": str(row_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """Decode a cursor produced by ``encode_cursor``
+
+    The sort value comes back as naive UTC, like the (timezone-less) ORM
+    columns it is compared with. PostgreSQL's TIMESTAMPTZ columns load as
+    aware datetimes and are encoded with their offset; binding one against
+    a ``TIMESTAMP WITHOUT TIME ZONE`` parameter makes asyncpg fail.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        sort_value = datetime.fromisoformat(payload["t"])
+        if sort_value.tzinfo is not None:
+            sort_value = sort_value.astimezone(timezone.utc).replace(tzinfo=None)
+        return sort_value, uuid.UUID(payload["id"])
+    except (ValueError, KeyError, TypeError):
+        raise ValidationError("Invalid pagination cursor")
+
+
+def after_cursor(sort_column, id_column, cursor: str):
+    """Filter for rows after ``cursor`` when ordering by (sort_column, id_column) descending"""
+    sort_value, row_id = decode_cursor(cursor)
+    return tuple_(sort_column, id_column) < (sort_value, row_id)
@@ -0,0 +1,111 @@
+"""
+Password hashing off the event loop, in a bounded and fairly shared thread pool
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from passlib.context import CryptContext
+
+from app.core.admission import AdmissionController
+from app.core.exceptions import TooManyRequestsError
+
+
+class PasswordHasher:
+    """Runs bcrypt hashing and verification in ``workers`` threads
+
+    bcrypt costs ~250 ms of CPU by design; run inline it freezes the event
+    loop and every WebSocket on the worker. bcrypt releases the GIL, so a
+    thread pool is enough to keep the loop responsive, and capping it at
+    ``workers`` leaves the remaining cores for chat traffic.
+
+    Callers queue in an ``AdmissionController`` keyed by client (IP), so one
+    client can hold at most ``max_per_client`` threads and a login storm is
+    turned away with ``TooManyRequestsError`` once the queue is full. On top
+    of that, at most ``max_per_email`` hashes per account may be queued or
+    running at once, which stops password guessing against one account from
+    piling up work.
+    """
+
+    def __init__(
+        self,
+        context: CryptContext,
+        workers: int = 2,
+        max_per_client: int = 1,
+        max_per_email: int = 3,
+        max_queue: int = 64,
+        max_queue_per_client: int = 4,
+        max_wait: float = 10.0
+    ):
+        self.context = context
+        self.workers = workers
+        self.max_per_email = max_per_email
+        self.admission = AdmissionController(
+            "password_hash",
+            max_concurrent=workers,
+            max_per_key=max_per_client,
+            max_queue=max_queue,
+            max_queue_per_key=max_queue_per_client,
+            max_wait=max_wait
+        )
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._emails: Dict[str, int] = {}  # Hashes queued or running per account
+
+        self.completed = 0
+        self.rejected_email = 0
+        self.total_seconds = 0.0
+
+    async def hash(self, password: str, client: Optional[str] = None) -> str:
+        return await self._run(self.context.hash, password, client=client)
+
+    async def verify(self, password: str, hashed: str, client: Optional[str] = None, email: Optional[str] = None) -> bool:
+        return await self._run(self.context.verify, password, hashed, client=client, email=email)
+
+    async def _run(self, fn: Callable, *args, client: Optional[str], email: Optional[str] = None) -> Any:
+        email_key = email.lower() if email else None
+        if email_key is not None:
+            if self._emails.get(email_key, 0) >= self.max_per_email:
+                self.rejected_email += 1
+                raise TooManyRequestsError("Too many attempts for this account, please try again shortly", 1)
+            self._emails[email_key] = self._emails.get(email_key, 0) + 1
+
+        try:
+            async with self.admission.slot(client or "anonymous"):
+                start = time.perf_counter()
+                result = await asyncio.get_running_loop().run_in_executor(self._get_executor(), fn, *args)
+                self.total_seconds += time.perf_counter() - start
+                self.completed += 1
+                return result
+        finally:
+            if email_key is not None:
+                count = self._emails[email_key] - 1
+                if count > 0:
+                    self._emails[email_key] = count
+                else:
+                    del self._emails[email_key]
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        return self._executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        admission = self.admission.stats()
+        return {
+            "workers": self.workers,
+            "running": admission["active"],
+            "queue_depth": admission["waiting"],
+            "completed": self.completed,
+            "avg_hash_ms": round(self.total_seconds / self.completed * 1000, 1) if self.completed else 0.0,
+            "rejected_queue_full": admission["rejected"],
+            "rejected_timeout": admission["timed_out"],
+            "rejected_per_account": self.rejected_email,
+            "max_wait_seconds": admission["max_wait_seconds"],
+        }
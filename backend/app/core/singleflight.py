@@ -0,0 +1,113 @@
+"""
+Single-flight request coalescing with an optional short-lived result cache
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+from app.core.cache import LRUCache
+
+T = TypeVar("T")
+
+_MISSING = object()
+
+# Every named group, so their metrics can be reported together
+singleflight_registry: Dict[str, "SingleFlight"] = {}
+
+
+class SingleFlight:
+    """Runs at most one computation per key at a time
+
+    Callers asking for a key that is already being computed wait for that
+    computation and get its result (or its exception) instead of starting
+    their own. With ``ttl`` set, a successful result is also kept in an
+    ``LRUCache`` and served to later callers for ``ttl`` seconds; errors are
+    never cached.
+
+    The computation runs as its own task, so one caller being cancelled
+    doesn't fail the others. It runs the first caller's function, so only
+    coalesce work whose result doesn't depend on who asked, and don't let it
+    use request-scoped resources such as the caller's DB session (see
+    ``connection.shared_session``).
+
+    Not thread-safe; meant to be used from the event loop. Each worker process
+    has its own groups, so ``ttl`` bounds how stale another worker can be.
+    """
+
+    def __init__(self, name: str, ttl: float = 0.0, max_size: int = 1024):
+        self.name = name
+        self.ttl = ttl
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self._results: Optional[LRUCache] = LRUCache(f"singleflight:{name}", max_size=max_size, ttl=ttl) if ttl else None
+
+        self.calls = 0
+        self.executions = 0  # Calls that actually ran the computation
+        self.shared = 0  # Calls that joined one already in flight
+        self.cached = 0  # Calls served from the result cache
+        self.errors = 0
+
+        singleflight_registry[name] = self
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Return ``fn()``'s result for ``key``, sharing it with concurrent callers"""
+        self.calls += 1
+        if self._results is not None:
+            value = self._results.get(key, _MISSING)
+            if value is not _MISSING:
+                self.cached += 1
+                return value
+
+        task = self._in_flight.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(self._run(key, fn))
+            task.add_done_callback(_consume_exception)
+            self._in_flight[key] = task
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    async def _run(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        current = asyncio.current_task()
+        try:
+            value = await fn()
+        except BaseException:
+            self.errors += 1
+            raise
+        else:
+            # Don't cache a result that ``forget`` made obsolete while it ran
+            if self._results is not None and self._in_flight.get(key) is current:
+                self._results.set(key, value)
+            return value
+        finally:
+            if self._in_flight.get(key) is current:
+                del self._in_flight[key]
+
+    def forget(self, key: Hashable):
+        """Drop the cached result for ``key``; a computation in flight is left
+        to finish for its callers, but later calls start a fresh one"""
+        self._in_flight.pop(key, None)
+        if self._results is not None:
+            self._results.invalidate(key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ttl_seconds": self.ttl,
+            "in_flight": len(self._in_flight),
+            "calls": self.calls,
+            "executions": self.executions,
+            "shared": self.shared,
+            "cached": self.cached,
+            "errors": self.errors,
+        }
+
+
+def _consume_exception(task: asyncio.Task):
+    """Mark a failed computation's exception as retrieved even if every caller left"""
+    if not task.cancelled():
+        task.exception()
+
+
+def get_singleflight_stats() -> Dict[str, Dict[str, Any]]:
+    """Metrics for every registered single-flight group"""
+    return {name: group.stats() for name, group in singleflight_registry.items()}
@@ -1,7 +1,12 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from supabase import create_client, Client
+from typing import AsyncGenerator
 import logging
+import os
+import tempfile
 
 from app.core.config import settings
 from app.models.base import Base
@@ -12,6 +17,16 @@ logger = logging.getLogger(__name__)
 engine = None
 SessionLocal = None
 
+# Async database engine (used by all request paths)
+async_engine = None
+AsyncSessionLocal = None
+
+# SQLite fallback: a temporary on-disk database in WAL mode, so the sync
+# engine (scripts, maintenance) and the async engine see the same data while
+# every session still gets its own pooled connection and transaction
+SQLITE_FALLBACK_DATABASE = os.path.join(tempfile.gettempdir(), f"future_self_{os.getpid()}.db")
+SQLITE_BUSY_TIMEOUT = 30  # Seconds a connection waits for another one's write lock
+
 # Supabase client
 supabase: Client = None
 
@@ -32,6 +47,28 @@ def get_database_url() -> str:
     raise ValueError("No database URL configured")
 
 
+def get_async_database_url() -> str:
+    """Database URL using the asyncpg driver"""
+    database_url = get_database_url()
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if database_url.startswith(prefix):
+            return "postgresql+asyncpg://" + database_url[len(prefix):]
+    return database_url
+
+
+def _enable_sqlite_wal(sync_engine):
+    """Put every new connection of ``sync_engine`` in WAL mode
+
+    WAL lets readers proceed while another connection writes, so concurrent
+    sessions on the fallback database don't serialize on each other.
+    """
+    @event.listens_for(sync_engine, "connect")
+    def set_journal_mode(dbapi_connection, _):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.close()
+
+
 def init_database():
     """Initialize database connection and create tables"""
     global engine, SessionLocal, supabase
@@ -71,12 +108,13 @@ def init_database():
             
         except Exception as e:
             logger.warning(f"⚠️ Real database connection failed: {e} (using SQLite fallback)")
-            # Use SQLite in-memory database for testing
+            # Use a temporary SQLite database for testing
             engine = create_engine(
-                "sqlite:///:memory:",
+                f"sqlite:///{SQLITE_FALLBACK_DATABASE}",
                 echo=settings.DEBUG,
-                connect_args={"check_same_thread": False},
+                connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT},
             )
+            _enable_sqlite_wal(engine)
         
         # Create session factory
         SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -104,6 +142,92 @@ def get_db() -> Session:
         db.close()
 
 
+async def init_async_database():
+    """Initialize the async database engine used by request handlers
+    
+    Uses asyncpg against the real database, or aiosqlite against the same
+    temporary database as the sync engine when running on the SQLite fallback.
+    """
+    global async_engine, AsyncSessionLocal
+    
+    try:
+        use_sqlite = engine is None or engine.dialect.name == "sqlite"
+        
+        if not use_sqlite:
+            try:
+                async_engine = create_async_engine(
+                    get_async_database_url(),
+                    pool_size=20,
+                    max_overflow=0,
+                    pool_recycle=3600,
+                    pool_pre_ping=False,
+                    echo=settings.DEBUG,
+                )
+                
+                # Test connection
+                async with async_engine.connect() as conn:
+                    from sqlalchemy import text
+                    await conn.execute(text("SELECT 1"))
+                
+                logger.info("✅ Connected to real database (async)")
+                
+            except Exception as e:
+                logger.warning(f"⚠️ Async database connection failed: {e} (using SQLite fallback)")
+                if async_engine is not None:
+                    await async_engine.dispose()
+                use_sqlite = True
+        
+        if use_sqlite:
+            async_engine = create_async_engine(
+                f"sqlite+aiosqlite:///{SQLITE_FALLBACK_DATABASE}",
+                echo=settings.DEBUG,
+                connect_args={"timeout": SQLITE_BUSY_TIMEOUT},
+                poolclass=AsyncAdaptedQueuePool,  # aiosqlite defaults to a new connection per session
+                pool_size=20,
+                max_overflow=0,
+            )
+            _enable_sqlite_wal(async_engine.sync_engine)
+        
+        # Create async session factory. Objects stay loaded after commit since
+        # lazy refreshes are not possible outside of an awaited call.
+        AsyncSessionLocal = async_sessionmaker(
+            bind=async_engine,
+            class_=AsyncSession,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+        
+        # Create tables
+        async with async_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        
+        logger.info("✅ Async database initialized successfully")
+        
+    except Exception as e:
+        logger.error(f"❌ Failed to initialize async database: {e}")
+        raise
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Get async database session dependency for FastAPI"""
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Async database not initialized. Call init_async_database() first.")
+    
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def shared_session(db: AsyncSession) -> AsyncSession:
+    """A new session on ``db``'s engine, for work shared between requests
+
+    Single-flight loads serve every coalesced caller, so they must not run
+    on the session of whichever request started them: cancelling that
+    request, or its dependency teardown closing the session, would fail all
+    the others.
+    """
+    return AsyncSession(bind=db.bind, autoflush=False, expire_on_commit=False)
+
+
 def get_supabase() -> Client:
     """Get Supabase client"""
     if supabase is None:
@@ -118,24 +242,34 @@ def close_database():
     if engine:
         engine.dispose()
         logger.info("🔌 Database connections closed")
+    
+    # The fallback database only lives as long as this process
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(SQLITE_FALLBACK_DATABASE + suffix):
+            os.remove(SQLITE_FALLBACK_DATABASE + suffix)
+
+
+async def close_async_database():
+    """Close async database connections"""
+    global async_engine
+    if async_engine:
+        await async_engine.dispose()
+        logger.info("🔌 Async database connections closed")
 
 
 # Health check function
 async def check_database_health() -> dict:
     """Check database connectivity"""
     try:
-        if SessionLocal is None:
+        if AsyncSessionLocal is None:
             return {"status": "error", "message": "Database not initialized"}
         
-        db = SessionLocal()
-        try:
+        async with AsyncSessionLocal() as db:
             # Simple query to test connection
             from sqlalchemy import text
-            result = db.execute(text("SELECT 1"))
+            result = await db.execute(text("SELECT 1"))
             result.fetchone()
             return {"status": "healthy", "message": "Database connection OK"}
-        finally:
-            db.close()
             
     except Exception as e:
         return {"status": "error", "message": f"Database connection failed: {str(e)}"}
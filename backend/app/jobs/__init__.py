@@ -0,0 +1,21 @@
+"""
+Background jobs for work that should not delay a response
+"""
+
+from .base import Job, JobQueue
+from .memory import InMemoryJobQueue
+from .worker import JobWorker, job_handler, job_handlers
+from .queue import init_job_queue, close_job_queue, enqueue_job, get_job_stats
+
+__all__ = [
+    "Job",
+    "JobQueue",
+    "InMemoryJobQueue",
+    "JobWorker",
+    "job_handler",
+    "job_handlers",
+    "init_job_queue",
+    "close_job_queue",
+    "enqueue_job",
+    "get_job_stats",
+]
@@ -0,0 +1,64 @@
+"""
+Job model and the broker interface every queue backend implements
+"""
+
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class Job(BaseModel):
+    """A unit of background work, serializable so any broker can carry it"""
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    name: str = Field(description="Registered handler name")
+    payload: Dict[str, Any] = Field(default_factory=dict)
+    attempts: int = 0
+    max_attempts: int = 3
+    enqueued_at: datetime = Field(default_factory=datetime.utcnow)
+    last_error: Optional[str] = None
+    dedup_key: Optional[str] = Field(None, description="Held while the job is pending, so equal work isn't queued twice")
+
+
+class JobQueue(ABC):
+    """Broker interface: FIFO delivery, delayed retries and a dead-letter list"""
+
+    @abstractmethod
+    async def enqueue(self, job: Job, delay: float = 0.0):
+        """Make ``job`` available to workers, optionally after ``delay`` seconds"""
+
+    @abstractmethod
+    async def dequeue(self, timeout: float = 1.0) -> Optional[Job]:
+        """Next ready job, or None if nothing arrived within ``timeout`` seconds"""
+
+    @abstractmethod
+    async def ack(self, job: Job):
+        """Mark a dequeued job as finished (succeeded, rescheduled or dead-lettered)"""
+
+    @abstractmethod
+    async def dead_letter(self, job: Job):
+        """Park a job that exhausted its attempts"""
+
+    @abstractmethod
+    async def dead_letters(self, limit: int = 100) -> List[Job]:
+        """Most recent dead-lettered jobs"""
+
+    @abstractmethod
+    async def claim(self, key: str, ttl: float) -> bool:
+        """Hold ``key`` for a pending job; False if another job already holds it
+
+        The hold expires after ``ttl`` seconds in case the job is lost.
+        """
+
+    @abstractmethod
+    async def release(self, key: str):
+        """Drop the hold on ``key`` once its job is finished"""
+
+    @abstractmethod
+    async def size(self) -> int:
+        """Jobs waiting to run, including delayed retries"""
+
+    async def close(self):
+        """Release broker resources"""
@@ -0,0 +1,36 @@
+"""
+Post-response chat work, run by the job workers instead of the request
+"""
+
+from typing import Any, Dict, Optional
+
+from app.database import connection
+from app.jobs.worker import job_handler
+from app.models.ai_personality import UserActivity
+from app.services.chat_service import ChatService
+from app.services.summarizer_service import conversation_summarizer
+
+chat_service = ChatService()
+
+
+@job_handler("conversation_title")
+async def conversation_title(conversation_id: str, content: str):
+    async with connection.AsyncSessionLocal() as db:
+        await chat_service.update_title_from_message(db, conversation_id, content)
+
+
+@job_handler("summarize_conversation")
+async def summarize_conversation(conversation_id: str):
+    async with connection.AsyncSessionLocal() as db:
+        await conversation_summarizer.summarize_conversation(db, conversation_id)
+
+
+@job_handler("log_activity")
+async def log_activity(user_id: str, activity_type: str, activity_data: Optional[Dict[str, Any]] = None):
+    async with connection.AsyncSessionLocal() as db:
+        db.add(UserActivity(
+            user_id=user_id,
+            activity_type=activity_type,
+            activity_data=activity_data or None
+        ))
+        await db.commit()
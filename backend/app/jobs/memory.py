@@ -0,0 +1,72 @@
+"""
+In-process asyncio job queue, for tests, development and the SQLite fallback
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set
+
+from app.jobs.base import Job, JobQueue
+
+
+class InMemoryJobQueue(JobQueue):
+    """Job queue backed by an ``asyncio.Queue``; jobs are lost on restart"""
+
+    def __init__(self, dead_letter_limit: int = 1000):
+        self._queue: "asyncio.Queue[Job]" = asyncio.Queue()
+        self._delayed: Set[asyncio.TimerHandle] = set()
+        self._dead: Deque[Job] = deque(maxlen=dead_letter_limit)
+        self._claims: Dict[str, float] = {}  # Dedup key -> when the hold expires
+
+    async def enqueue(self, job: Job, delay: float = 0.0):
+        if delay <= 0:
+            self._queue.put_nowait(job)
+            return
+
+        loop = asyncio.get_running_loop()
+
+        def release():
+            self._delayed.discard(handle)
+            self._queue.put_nowait(job)
+
+        handle = loop.call_later(delay, release)
+        self._delayed.add(handle)
+
+    async def dequeue(self, timeout: float = 1.0) -> Optional[Job]:
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def ack(self, job: Job):
+        self._queue.task_done()
+
+    async def dead_letter(self, job: Job):
+        self._dead.append(job)
+
+    async def dead_letters(self, limit: int = 100) -> List[Job]:
+        return list(self._dead)[-limit:]
+
+    async def claim(self, key: str, ttl: float) -> bool:
+        now = time.monotonic()
+        if self._claims.get(key, 0.0) > now:
+            return False
+        self._claims[key] = now + ttl
+        return True
+
+    async def release(self, key: str):
+        self._claims.pop(key, None)
+
+    async def size(self) -> int:
+        return self._queue.qsize() + len(self._delayed)
+
+    async def join(self):
+        """Wait until every enqueued job (not delayed retries) has been acked"""
+        await self._queue.join()
+
+    async def close(self):
+        for handle in self._delayed:
+            handle.cancel()
+        self._delayed.clear()
+        self._claims.clear()
@@ -0,0 +1,126 @@
+"""
+Application job queue: broker selection, lifecycle and enqueueing
+"""
+
+import logging
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.database import connection
+from app.jobs.base import Job, JobQueue
+from app.jobs.memory import InMemoryJobQueue
+from app.jobs.worker import JobWorker
+
+logger = logging.getLogger(__name__)
+
+# Owned by the application lifespan
+job_queue: Optional[JobQueue] = None
+job_worker: Optional[JobWorker] = None
+
+
+async def create_job_queue() -> JobQueue:
+    """Pick the broker from JOB_QUEUE_BACKEND ("redis", "memory" or "auto")
+
+    "auto" uses Redis when it answers a ping and the app is not running on
+    the SQLite fallback; otherwise jobs stay in process.
+    """
+    backend = settings.JOB_QUEUE_BACKEND
+    use_redis = backend == "redis" or (backend == "auto" and not _using_sqlite_fallback())
+
+    if use_redis:
+        from app.jobs.redis_queue import RedisJobQueue
+
+        queue = RedisJobQueue(
+            settings.REDIS_URL,
+            prefix=settings.JOB_QUEUE_PREFIX,
+            visibility_timeout=settings.JOB_VISIBILITY_TIMEOUT
+        )
+        try:
+            await queue.ping()
+            logger.info("✅ Job queue using Redis")
+            return queue
+        except Exception as e:
+            await queue.close()
+            if backend == "redis":
+                raise
+            logger.warning(f"⚠️ Redis unavailable for jobs: {e} (using in-process queue)")
+
+    return InMemoryJobQueue()
+
+
+def _using_sqlite_fallback() -> bool:
+    return connection.engine is not None and connection.engine.dialect.name == "sqlite"
+
+
+async def init_job_queue():
+    """Create the job queue and start the worker pool"""
+    global job_queue, job_worker
+    if job_queue is not None:
+        return
+
+    # Register the application's handlers
+    import app.jobs.handlers  # noqa: F401
+
+    job_queue = await create_job_queue()
+    job_worker = JobWorker(
+        job_queue,
+        concurrency=settings.JOB_WORKERS,
+        retry_base_delay=settings.JOB_RETRY_BASE_DELAY
+    )
+    job_worker.start()
+
+
+async def close_job_queue():
+    """Stop the workers and release the broker"""
+    global job_queue, job_worker
+    if job_worker is not None:
+        await job_worker.stop()
+        job_worker = None
+    if job_queue is not None:
+        await job_queue.close()
+        job_queue = None
+
+
+async def enqueue_job(name: str, delay: float = 0.0, dedup_key: Optional[str] = None, **payload: Any) -> Optional[Job]:
+    """Queue background work; payload values must be JSON-serializable
+
+    With a ``dedup_key``, nothing is queued while an earlier job with the
+    same key is still waiting, retrying or running. Never raises: losing an
+    enrichment job must not fail the request that produced it.
+    """
+    if job_queue is None:
+        logger.warning(f"⚠️ Job queue not initialized, dropping job {name}")
+        return None
+
+    job = Job(name=name, payload=payload, max_attempts=settings.JOB_MAX_ATTEMPTS, dedup_key=dedup_key)
+    try:
+        if dedup_key and not await job_queue.claim(dedup_key, settings.JOB_DEDUP_TTL):
+            return None
+        await job_queue.enqueue(job, delay=delay)
+        return job
+    except Exception as e:
+        logger.warning(f"⚠️ Could not enqueue job {name}: {e}")
+        if dedup_key:
+            try:
+                await job_queue.release(dedup_key)
+            except Exception:
+                pass
+        return None
+
+
+async def get_job_stats() -> Dict[str, Any]:
+    """Queue depth, worker counters and recent dead letters"""
+    if job_queue is None:
+        return {"status": "stopped"}
+
+    dead = await job_queue.dead_letters(limit=10)
+    return {
+        "status": "running",
+        "backend": type(job_queue).__name__,
+        "queued": await job_queue.size(),
+        **(job_worker.stats() if job_worker else {}),
+        "recent_dead_letters": [
+            {"id": job.id, "name": job.name, "attempts": job.attempts, "error": job.last_error}
+            for job in dead
+        ]
+    }
@@ -0,0 +1,141 @@
+"""
+Redis-backed job queue for production (shared by every API worker)
+"""
+
+import time
+from typing import Dict, List, Optional
+
+import redis.asyncio as redis
+
+from app.jobs.base import Job, JobQueue
+
+
+# Move due delayed jobs onto the ready list atomically
+_PROMOTE_DUE = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, 100)
+for _, raw in ipairs(due) do
+    redis.call('ZREM', KEYS[1], raw)
+    redis.call('LPUSH', KEYS[2], raw)
+end
+return #due
+"""
+
+# Put jobs whose worker died mid-run back on the ready list. Each dequeued
+# job has a lease (its dequeue time) in a sorted set; one found in the
+# processing list without a lease (the worker died right after dequeuing)
+# gets one now. Expired leases are requeued at the front of the ready list.
+_REQUEUE_EXPIRED = """
+local now = tonumber(ARGV[1])
+for _, raw in ipairs(redis.call('LRANGE', KEYS[1], 0, -1)) do
+    if not redis.call('ZSCORE', KEYS[2], raw) then
+        redis.call('ZADD', KEYS[2], now, raw)
+    end
+end
+local requeued = 0
+for _, raw in ipairs(redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now - tonumber(ARGV[2]))) do
+    redis.call('ZREM', KEYS[2], raw)
+    if redis.call('LREM', KEYS[1], 1, raw) > 0 then
+        redis.call('RPUSH', KEYS[3], raw)
+        requeued = requeued + 1
+    end
+end
+return requeued
+"""
+
+
+class RedisJobQueue(JobQueue):
+    """Reliable-list job queue
+
+    Ready jobs live in a list and are atomically moved to a processing list
+    when dequeued, with a lease recording when. A job still in the processing
+    list after ``visibility_timeout`` (its worker crashed or was killed) is
+    put back on the ready list, so delivery is at-least-once: handlers must
+    be safe to run twice, and the timeout must exceed the longest job.
+    Delayed retries wait in a sorted set scored by their due time.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        prefix: str = "future_self:jobs",
+        dead_letter_limit: int = 1000,
+        visibility_timeout: float = 600.0
+    ):
+        self.client = redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self.ready_key = f"{prefix}:ready"
+        self.processing_key = f"{prefix}:processing"
+        self.leases_key = f"{prefix}:leases"
+        self.delayed_key = f"{prefix}:delayed"
+        self.dead_key = f"{prefix}:dead"
+        self.dead_letter_limit = dead_letter_limit
+        self.visibility_timeout = visibility_timeout
+        self._promote = self.client.register_script(_PROMOTE_DUE)
+        self._requeue_expired = self.client.register_script(_REQUEUE_EXPIRED)
+        self._next_reap = 0.0
+        self._raw: Dict[str, str] = {}  # Job id -> exact payload in the processing list
+
+    async def ping(self) -> bool:
+        return await self.client.ping()
+
+    async def enqueue(self, job: Job, delay: float = 0.0):
+        raw = job.model_dump_json()
+        if delay <= 0:
+            await self.client.lpush(self.ready_key, raw)
+        else:
+            await self.client.zadd(self.delayed_key, {raw: time.time() + delay})
+
+    async def dequeue(self, timeout: float = 1.0) -> Optional[Job]:
+        now = time.time()
+        await self._promote(keys=[self.delayed_key, self.ready_key], args=[now])
+        if now >= self._next_reap:
+            await self.requeue_expired(now)
+        raw = await self.client.brpoplpush(self.ready_key, self.processing_key, timeout=max(1, int(timeout)))
+        if raw is None:
+            return None
+        await self.client.zadd(self.leases_key, {raw: time.time()})
+        job = Job.model_validate_json(raw)
+        self._raw[job.id] = raw
+        return job
+
+    async def requeue_expired(self, now: Optional[float] = None) -> int:
+        """Put jobs whose lease has expired back on the ready list; returns how many"""
+        now = now if now is not None else time.time()
+        self._next_reap = now + min(60.0, self.visibility_timeout / 2)
+        return await self._requeue_expired(
+            keys=[self.processing_key, self.leases_key, self.ready_key], args=[now, self.visibility_timeout]
+        )
+
+    async def ack(self, job: Job):
+        raw = self._raw.pop(job.id, None)
+        if raw is not None:
+            async with self.client.pipeline(transaction=True) as pipe:
+                pipe.lrem(self.processing_key, 1, raw)
+                pipe.zrem(self.leases_key, raw)
+                await pipe.execute()
+
+    async def dead_letter(self, job: Job):
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.lpush(self.dead_key, job.model_dump_json())
+            pipe.ltrim(self.dead_key, 0, self.dead_letter_limit - 1)
+            await pipe.execute()
+
+    async def dead_letters(self, limit: int = 100) -> List[Job]:
+        raws = await self.client.lrange(self.dead_key, 0, limit - 1)
+        return [Job.model_validate_json(raw) for raw in raws]
+
+    async def claim(self, key: str, ttl: float) -> bool:
+        return bool(await self.client.set(f"{self.prefix}:dedup:{key}", "1", nx=True, ex=max(1, int(ttl))))
+
+    async def release(self, key: str):
+        await self.client.delete(f"{self.prefix}:dedup:{key}")
+
+    async def size(self) -> int:
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.llen(self.ready_key)
+            pipe.zcard(self.delayed_key)
+            ready, delayed = await pipe.execute()
+        return ready + delayed
+
+    async def close(self):
+        await self.client.aclose()
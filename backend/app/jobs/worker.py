@@ -0,0 +1,117 @@
+"""
+Job handler registry and the worker pool that runs them
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List
+
+from app.jobs.base import Job, JobQueue
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[..., Awaitable[None]]
+
+# Handler name -> coroutine function taking the job payload as keyword arguments
+job_handlers: Dict[str, JobHandler] = {}
+
+
+def job_handler(name: str):
+    """Register a coroutine function as the handler for jobs called ``name``"""
+    def register(func: JobHandler) -> JobHandler:
+        job_handlers[name] = func
+        return func
+    return register
+
+
+class JobWorker:
+    """Pool of asyncio tasks pulling jobs from a queue
+
+    A failing job is re-enqueued with exponential backoff until it has used
+    ``max_attempts``, then moved to the dead-letter list. A job's dedup key
+    is released once it is finished, not between retries.
+    """
+
+    def __init__(self, queue: JobQueue, concurrency: int = 2, retry_base_delay: float = 2.0):
+        self.queue = queue
+        self.concurrency = concurrency
+        self.retry_base_delay = retry_base_delay
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = False
+
+        self.succeeded = 0
+        self.retried = 0
+        self.dead_lettered = 0
+
+    def start(self):
+        self._stopping = False
+        self._tasks = [asyncio.create_task(self._loop()) for _ in range(self.concurrency)]
+
+    async def stop(self, timeout: float = 10.0):
+        """Let running jobs finish (up to ``timeout``), then cancel the workers"""
+        self._stopping = True
+        if not self._tasks:
+            return
+        done, pending = await asyncio.wait(self._tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        self._tasks = []
+
+    async def _loop(self):
+        while not self._stopping:
+            try:
+                job = await self.queue.dequeue(timeout=1.0)
+            except Exception as e:
+                logger.warning(f"⚠️ Job queue unavailable: {e}")
+                await asyncio.sleep(self.retry_base_delay)
+                continue
+            if job is None:
+                continue
+            try:
+                await self.run(job)
+            except Exception as e:
+                # The broker failed to ack, retry or release; the worker must survive it
+                logger.error(f"❌ Job {job.name} ({job.id}) could not be settled: {e}")
+                await asyncio.sleep(self.retry_base_delay)
+
+    async def run(self, job: Job):
+        """Run one job, handling its retry or dead-lettering, then ack it"""
+        retrying = False
+        try:
+            handler = job_handlers.get(job.name)
+            if handler is None:
+                job.attempts = job.max_attempts  # Retrying cannot help
+                raise LookupError(f"No handler registered for job '{job.name}'")
+            job.attempts += 1
+            await handler(**job.payload)
+            self.succeeded += 1
+        except Exception as e:
+            job.last_error = f"{type(e).__name__}: {e}"
+            retrying = await self._handle_failure(job)
+        finally:
+            await self.queue.ack(job)
+            if job.dedup_key and not retrying:
+                await self.queue.release(job.dedup_key)
+
+    async def _handle_failure(self, job: Job) -> bool:
+        """Schedule a retry or dead-letter the job; returns whether it will run again"""
+        if job.attempts < job.max_attempts:
+            delay = self.retry_base_delay * (2 ** (job.attempts - 1))
+            logger.info(f"🔁 Job {job.name} ({job.id}) failed, retry {job.attempts}/{job.max_attempts} in {delay:.0f}s: {job.last_error}")
+            await self.queue.enqueue(job, delay=delay)
+            self.retried += 1
+            return True
+        else:
+            logger.error(f"❌ Job {job.name} ({job.id}) dead-lettered after {job.attempts} attempts: {job.last_error}")
+            await self.queue.dead_letter(job)
+            self.dead_lettered += 1
+            return False
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "workers": len(self._tasks),
+            "succeeded": self.succeeded,
+            "retried": self.retried,
+            "dead_lettered": self.dead_lettered
+        }
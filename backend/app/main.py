@@ -1,13 +1,24 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
+from fastapi.responses import ORJSONResponse
 import uvicorn
 import logging
 from contextlib import asynccontextmanager
 
 from app.core.config import settings
 from app.api.v1.router import api_router
-from app.database.connection import init_database, close_database
+from app.database.connection import (
+    init_database,
+    close_database,
+    init_async_database,
+    close_async_database,
+)
+from app.services.ollama_service import init_ollama_client, close_ollama_client, get_ollama_client, ollama_pool
+from app.jobs import init_job_queue, close_job_queue
+from app.realtime import init_realtime, close_realtime
+from app.services.daily_message_service import daily_message_scheduler
+from app.services.auth_service import password_hasher
 
 
 # Configure logging
@@ -34,6 +45,7 @@ async def lifespan(app: FastAPI):
     # Initialize database
     try:
         init_database()
+        await init_async_database()
         logger.info("📊 Database initialization completed")
     except Exception as e:
         logger.error(f"❌ Failed to initialize database: {e}")
@@ -42,10 +54,38 @@ async def lifespan(app: FastAPI):
         if settings.ENVIRONMENT == "production":
             raise
     
+    # Shared, pooled HTTP client for Ollama
+    await init_ollama_client()
+    logger.info("🤖 Ollama HTTP client pool ready")
+    
+    # Keep each Ollama instance's loaded models and health up to date for routing
+    ollama_pool.start(get_ollama_client, settings.OLLAMA_POOL_REFRESH_SECONDS)
+    logger.info(f"🔀 Routing across {len(ollama_pool.backends)} Ollama instance(s)")
+    
+    # Workers for post-response jobs (titles, summaries, activity logging)
+    await init_job_queue()
+    logger.info("🧵 Background job workers started")
+    
+    # Fan-out of WebSocket messages to users' sockets on every worker
+    await init_realtime()
+    logger.info("📡 WebSocket fan-out ready")
+    
+    # Off-peak pre-generation of daily messages
+    if settings.DAILY_MESSAGE_SCHEDULER_ENABLED:
+        daily_message_scheduler.start()
+        logger.info(f"📬 Daily message batch scheduled for {settings.DAILY_MESSAGE_BATCH_HOUR:02d}:00 UTC")
+    
     yield
     
     # Shutdown
     logger.info("🛑 Future Self API shutting down...")
+    await daily_message_scheduler.stop()
+    await close_realtime()
+    await close_job_queue()
+    await ollama_pool.stop()
+    await close_ollama_client()
+    password_hasher.shutdown()
+    await close_async_database()
     close_database()
 
 
@@ -57,6 +97,7 @@ app = FastAPI(
     openapi_url=f"{settings.API_V1_STR}/openapi.json" if settings.DEBUG else None,
     docs_url=f"{settings.API_V1_STR}/docs" if settings.DEBUG else None,
     redoc_url=f"{settings.API_V1_STR}/redoc" if settings.DEBUG else None,
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
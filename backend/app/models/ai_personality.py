@@ -1,6 +1,7 @@
 from sqlalchemy import Column, String, Text, Boolean, Integer, ForeignKey
+from sqlalchemy.ext.mutable import MutableDict
 from sqlalchemy.orm import relationship
-from .base import BaseModel, UUID
+from .base import BaseModel, UUID, JSONType
 
 
 class AIPersonalityProfile(BaseModel):
@@ -19,8 +20,8 @@ class AIPersonalityProfile(BaseModel):
     
     # Context and background
     background_story = Column(Text)
-    core_values = Column(Text)  # JSON string of values
-    speaking_patterns = Column(Text)  # JSON string of patterns
+    core_values = Column(JSONType)  # List of values
+    speaking_patterns = Column(JSONType)  # List of patterns
     
     # Behavioral settings
     proactivity_level = Column(Integer, default=5)  # How often AI initiates conversations
@@ -57,7 +58,7 @@ class UserActivity(BaseModel):
     
     user_id = Column(UUID(), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     activity_type = Column(String(100), nullable=False)  # 'chat', 'journal', 'goal_update', 'daily_message_read'
-    activity_data = Column(Text)  # JSON string for activity data
+    activity_data = Column(MutableDict.as_mutable(JSONType))  # Tracks in-place updates from add_activity_data
     
     # Relationships
     user = relationship("User", back_populates="activities")
@@ -81,7 +82,7 @@ class FileUpload(BaseModel):
     file_size = Column(Integer, nullable=False)
     file_path = Column(Text, nullable=False)
     upload_purpose = Column(String(100))  # 'profile_photo', 'future_self_photo', 'voice_message', 'journal_attachment'
-    file_metadata = Column(Text)  # JSON string for metadata
+    file_metadata = Column(MutableDict.as_mutable(JSONType))  # Tracks in-place updates from add_metadata
     
     # Relationships
     user = relationship("User", back_populates="file_uploads")
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, DateTime, TypeDecorator, CHAR, String, text
-from sqlalchemy.dialects.postgresql import UUID as PostgreSQL_UUID
+from sqlalchemy import Column, DateTime, TypeDecorator, CHAR, JSON, String, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID as PostgreSQL_UUID
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import Mapped
 
@@ -41,6 +41,25 @@ class UUID(TypeDecorator):
             return value
 
 
+class JSONType(TypeDecorator):
+    """Platform-independent JSON type.
+    
+    Uses PostgreSQL's JSONB type when available, otherwise the generic
+    JSON type (stored as text on SQLite and queried with its JSON1
+    functions). Values are dicts/lists in Python; keys can be queried
+    server-side, e.g. ``column["fallback_used"].as_boolean()``. ``None``
+    is stored as SQL NULL rather than a JSON ``null``.
+    """
+    impl = JSON
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'postgresql':
+            return dialect.type_descriptor(JSONB(none_as_null=True))
+        else:
+            return dialect.type_descriptor(JSON(none_as_null=True))
+
+
 Base = declarative_base()
 
 
@@ -1,6 +1,6 @@
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Boolean, Enum as SQLEnum
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Boolean, Index, Integer, Enum as SQLEnum
 from sqlalchemy.orm import relationship
-from .base import BaseModel, UUID
+from .base import BaseModel, UUID, JSONType
 import enum
 
 
@@ -18,8 +18,14 @@ class Conversation(BaseModel):
     user_id = Column(UUID(), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     title = Column(String(255), nullable=False)
     summary = Column(Text)
+    summary_message_count = Column(Integer, default=0, server_default="0", nullable=False)  # Oldest messages covered by summary
     is_archived = Column(Boolean, default=False)
     
+    # Denormalized message stats, maintained by ChatService on every insert
+    message_count = Column(Integer, default=0, server_default="0", nullable=False)
+    last_message_at = Column(DateTime)
+    last_message_preview = Column(String(255))
+    
     # Relationships
     user = relationship("User", back_populates="conversations")
     messages = relationship("ChatMessage", back_populates="conversation", cascade="all, delete-orphan")
@@ -33,8 +39,30 @@ class ChatMessage(BaseModel):
     conversation_id = Column(UUID(), ForeignKey("conversations.id", ondelete="CASCADE"), nullable=False)
     role = Column(SQLEnum(MessageRole), nullable=False)
     content = Column(Text, nullable=False)
-    message_metadata = Column(Text)  # JSON string for additional data
+    message_metadata = Column(JSONType)  # Additional data, e.g. model_used, fallback_used
     token_count = Column(Text)  # Store as text for flexibility
     
     # Relationships
-    conversation = relationship("Conversation", back_populates="messages") 
\ No newline at end of file
+    conversation = relationship("Conversation", back_populates="messages")
+
+
+# Indexes matching the hot query shapes. Declared after the classes so the
+# columns inherited from BaseModel can be ordered DESC like the queries.
+
+# Conversation list: WHERE user_id = ? AND is_archived = ? ORDER BY updated_at DESC, id DESC
+Index(
+    "idx_conversations_user_archived_updated",
+    Conversation.user_id,
+    Conversation.is_archived,
+    Conversation.updated_at.desc(),
+    Conversation.id.desc()
+)
+
+# History window, conversation detail, message pages and summaries:
+# WHERE conversation_id = ? ORDER BY created_at [DESC], id [DESC]
+Index(
+    "idx_chat_messages_conversation_created",
+    ChatMessage.conversation_id,
+    ChatMessage.created_at.desc(),
+    ChatMessage.id.desc()
+)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, Boolean, DateTime, ForeignKey, Integer, Enum as SQLEnum
+from sqlalchemy import Column, String, Text, Boolean, Date, DateTime, ForeignKey, Index, Integer, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from .base import BaseModel, UUID
 import enum
@@ -18,11 +18,18 @@ class DailyMessage(BaseModel):
     
     user_id = Column(UUID(), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     message = Column(Text, nullable=False)
+    message_type = Column(String(20), default="motivational")
     mood_context = Column(String(50))
+    scheduled_for = Column(Date)  # Day the message is for; filled by the nightly batch
     is_read = Column(Boolean, default=False)
     
     # Relationships
     user = relationship("User", back_populates="daily_messages")
+    
+    __table_args__ = (
+        # One message per user per day; also serves the daily-message lookup
+        Index("idx_daily_messages_user_scheduled", "user_id", "scheduled_for", unique=True),
+    )
 
 
 class UserGoal(BaseModel):
@@ -0,0 +1,19 @@
+"""
+Real-time delivery to users' WebSockets across devices and API workers
+"""
+
+from .base import PubSub
+from .memory import InMemoryBroker, InMemoryPubSub
+from .manager import ConnectionManager
+from .connections import connection_manager, init_realtime, close_realtime, get_connection_stats
+
+__all__ = [
+    "PubSub",
+    "InMemoryBroker",
+    "InMemoryPubSub",
+    "ConnectionManager",
+    "connection_manager",
+    "init_realtime",
+    "close_realtime",
+    "get_connection_stats",
+]
@@ -0,0 +1,35 @@
+"""
+Pub/sub interface used to fan WebSocket messages out across API workers
+"""
+
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable
+
+MessageHandler = Callable[[str, str], Awaitable[None]]  # (channel, data)
+
+
+class PubSub(ABC):
+    """Broker interface: channel subscriptions and fire-and-forget publishing
+
+    Delivery is at most once; a worker that isn't subscribed when a message
+    is published never sees it.
+    """
+
+    @abstractmethod
+    async def start(self, handler: MessageHandler):
+        """Begin delivering messages for subscribed channels to ``handler``"""
+
+    @abstractmethod
+    async def publish(self, channel: str, data: str):
+        """Send ``data`` to every subscriber of ``channel``"""
+
+    @abstractmethod
+    async def subscribe(self, channel: str):
+        """Start receiving messages published to ``channel``"""
+
+    @abstractmethod
+    async def unsubscribe(self, channel: str):
+        """Stop receiving messages published to ``channel``"""
+
+    async def close(self):
+        """Release broker resources"""
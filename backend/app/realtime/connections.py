@@ -0,0 +1,63 @@
+"""
+Application WebSocket connections: pub/sub selection and lifecycle
+"""
+
+import logging
+from typing import Any, Dict
+
+from app.core.config import settings
+from app.database import connection
+from app.realtime.base import PubSub
+from app.realtime.manager import ConnectionManager
+from app.realtime.memory import InMemoryPubSub
+
+logger = logging.getLogger(__name__)
+
+# Tracks this worker's sockets; its pub/sub backend is attached by the lifespan
+connection_manager = ConnectionManager(channel_prefix=settings.WS_PUBSUB_PREFIX)
+
+
+async def create_pubsub() -> PubSub:
+    """Pick the backend from WS_PUBSUB_BACKEND ("redis", "memory" or "auto")
+
+    "auto" uses Redis when it answers a ping and the app is not running on
+    the SQLite fallback; otherwise messages only reach sockets on this
+    worker, which is fine with a single uvicorn worker.
+    """
+    backend = settings.WS_PUBSUB_BACKEND
+    use_redis = backend == "redis" or (backend == "auto" and not _using_sqlite_fallback())
+
+    if use_redis:
+        from app.realtime.redis_pubsub import RedisPubSub
+
+        pubsub = RedisPubSub(settings.REDIS_URL)
+        try:
+            await pubsub.ping()
+            logger.info("✅ WebSocket fan-out using Redis")
+            return pubsub
+        except Exception as e:
+            await pubsub.close()
+            if backend == "redis":
+                raise
+            logger.warning(f"⚠️ Redis unavailable for WebSocket fan-out: {e} (single-worker delivery only)")
+
+    return InMemoryPubSub()
+
+
+def _using_sqlite_fallback() -> bool:
+    return connection.engine is not None and connection.engine.dialect.name == "sqlite"
+
+
+async def init_realtime():
+    """Connect the WebSocket manager to its pub/sub backend"""
+    if connection_manager.pubsub is None:
+        await connection_manager.start(await create_pubsub())
+
+
+async def close_realtime():
+    await connection_manager.stop()
+
+
+def get_connection_stats() -> Dict[str, Any]:
+    """Sockets and fan-out counters for this worker"""
+    return connection_manager.stats()
@@ -0,0 +1,142 @@
+"""
+WebSocket connection tracking per user, with fan-out across API workers
+"""
+
+import json
+import logging
+import uuid
+from typing import Any, Dict, Optional, Set
+
+from fastapi import WebSocket
+
+from app.realtime.base import PubSub
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionManager:
+    """This worker's WebSockets, grouped by user
+
+    Each user maps to a set of sockets (one per device), so connecting and
+    disconnecting are O(1) and a second device no longer replaces the first.
+
+    ``send_personal_message`` writes to the user's sockets on this worker
+    and publishes the message on the user's channel for the other workers.
+    A worker is subscribed to a user's channel only while it holds one of
+    their sockets, and ignores its own publications.
+
+    Without a pub/sub backend (before ``start``), delivery is local only.
+    """
+
+    def __init__(self, channel_prefix: str = "future_self:ws"):
+        self.channel_prefix = channel_prefix
+        self.worker_id = uuid.uuid4().hex
+        self.user_connections: Dict[str, Set[WebSocket]] = {}
+        self.pubsub: Optional[PubSub] = None
+
+        self.delivered = 0  # Frames written to sockets on this worker
+        self.published = 0
+        self.received = 0  # Messages from other workers
+        self.failed_sends = 0
+
+    @property
+    def active_connections(self) -> int:
+        return sum(len(sockets) for sockets in self.user_connections.values())
+
+    def _channel(self, user_id: str) -> str:
+        return f"{self.channel_prefix}:user:{user_id}"
+
+    async def start(self, pubsub: PubSub):
+        """Attach a pub/sub backend and subscribe for users already connected"""
+        self.pubsub = pubsub
+        await pubsub.start(self._on_message)
+        for user_id in list(self.user_connections):
+            await self._subscribe(user_id)
+
+    async def stop(self):
+        if self.pubsub is not None:
+            await self.pubsub.close()
+            self.pubsub = None
+
+    async def connect(self, websocket: WebSocket, user_id: str):
+        await websocket.accept()
+        sockets = self.user_connections.get(user_id)
+        if sockets is None:
+            sockets = self.user_connections[user_id] = set()
+            sockets.add(websocket)
+            await self._subscribe(user_id)
+        else:
+            sockets.add(websocket)
+
+    async def disconnect(self, websocket: WebSocket, user_id: str):
+        sockets = self.user_connections.get(user_id)
+        if sockets is None:
+            return
+        sockets.discard(websocket)
+        if not sockets:
+            del self.user_connections[user_id]
+            await self._unsubscribe(user_id)
+
+    async def send_personal_message(self, message: str, user_id: str, exclude: Optional[WebSocket] = None):
+        """Send a text frame to every socket the user has open, on any worker
+
+        ``exclude`` skips one local socket, typically the one the message is
+        a reply to. Never raises: a dead socket or broker must not fail the
+        turn that produced the message.
+        """
+        await self._deliver(user_id, message, exclude)
+
+        if self.pubsub is None:
+            return
+        envelope = json.dumps({"origin": self.worker_id, "user_id": user_id, "message": message})
+        try:
+            await self.pubsub.publish(self._channel(user_id), envelope)
+            self.published += 1
+        except Exception as e:
+            logger.warning(f"⚠️ Could not publish WebSocket message for user {user_id}: {e}")
+
+    async def _deliver(self, user_id: str, message: str, exclude: Optional[WebSocket] = None):
+        for websocket in list(self.user_connections.get(user_id, ())):
+            if websocket is exclude:
+                continue
+            try:
+                await websocket.send_text(message)
+                self.delivered += 1
+            except Exception:
+                self.failed_sends += 1
+                await self.disconnect(websocket, user_id)
+
+    async def _on_message(self, channel: str, data: str):
+        envelope = json.loads(data)
+        if envelope.get("origin") == self.worker_id:
+            return
+        self.received += 1
+        await self._deliver(envelope["user_id"], envelope["message"])
+
+    async def _subscribe(self, user_id: str):
+        if self.pubsub is None:
+            return
+        try:
+            await self.pubsub.subscribe(self._channel(user_id))
+        except Exception as e:
+            logger.warning(f"⚠️ Could not subscribe to WebSocket channel for user {user_id}: {e}")
+
+    async def _unsubscribe(self, user_id: str):
+        if self.pubsub is None:
+            return
+        try:
+            await self.pubsub.unsubscribe(self._channel(user_id))
+        except Exception as e:
+            logger.warning(f"⚠️ Could not unsubscribe from WebSocket channel for user {user_id}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "worker_id": self.worker_id,
+            "pubsub": type(self.pubsub).__name__ if self.pubsub else None,
+            "users": len(self.user_connections),
+            "connections": self.active_connections,
+            "delivered": self.delivered,
+            "published": self.published,
+            "received": self.received,
+            "failed_sends": self.failed_sends,
+        }
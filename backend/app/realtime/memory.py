@@ -0,0 +1,62 @@
+"""
+In-process pub/sub, for development, tests and single-worker deployments
+"""
+
+import logging
+from typing import Dict, Optional, Set
+
+from app.realtime.base import MessageHandler, PubSub
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryBroker:
+    """Channel registry shared by the ``InMemoryPubSub`` endpoints attached to it"""
+
+    def __init__(self):
+        self.subscribers: Dict[str, Set["InMemoryPubSub"]] = {}
+
+
+class InMemoryPubSub(PubSub):
+    """One endpoint on an ``InMemoryBroker``
+
+    Each endpoint stands in for one API worker, so tests can run several
+    workers in one process by attaching them to the same broker.
+    """
+
+    def __init__(self, broker: Optional[InMemoryBroker] = None):
+        self.broker = broker or InMemoryBroker()
+        self._channels: Set[str] = set()
+        self._handler: Optional[MessageHandler] = None
+
+    async def start(self, handler: MessageHandler):
+        self._handler = handler
+
+    async def publish(self, channel: str, data: str):
+        for endpoint in list(self.broker.subscribers.get(channel, ())):
+            await endpoint._deliver(channel, data)
+
+    async def _deliver(self, channel: str, data: str):
+        if self._handler is None:
+            return
+        try:
+            await self._handler(channel, data)
+        except Exception as e:
+            logger.warning(f"⚠️ Pub/sub handler failed for {channel}: {e}")
+
+    async def subscribe(self, channel: str):
+        self._channels.add(channel)
+        self.broker.subscribers.setdefault(channel, set()).add(self)
+
+    async def unsubscribe(self, channel: str):
+        self._channels.discard(channel)
+        endpoints = self.broker.subscribers.get(channel)
+        if endpoints is not None:
+            endpoints.discard(self)
+            if not endpoints:
+                del self.broker.subscribers[channel]
+
+    async def close(self):
+        for channel in list(self._channels):
+            await self.unsubscribe(channel)
+        self._handler = None
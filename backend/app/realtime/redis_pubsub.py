@@ -0,0 +1,67 @@
+"""
+Redis pub/sub for production, so every API worker sees every user's messages
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+import redis.asyncio as redis
+
+from app.realtime.base import MessageHandler, PubSub
+
+logger = logging.getLogger(__name__)
+
+
+class RedisPubSub(PubSub):
+    """Redis PUBLISH/SUBSCRIBE over one dedicated connection per worker
+
+    A reader task pulls messages off the subscription connection and hands
+    them to the handler in order.
+    """
+
+    def __init__(self, url: str):
+        self.client = redis.from_url(url, decode_responses=True)
+        self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        self._handler: Optional[MessageHandler] = None
+        self._reader: Optional[asyncio.Task] = None
+
+    async def ping(self) -> bool:
+        return await self.client.ping()
+
+    async def start(self, handler: MessageHandler):
+        self._handler = handler
+        if self._reader is None:
+            self._reader = asyncio.create_task(self._read())
+
+    async def publish(self, channel: str, data: str):
+        await self.client.publish(channel, data)
+
+    async def subscribe(self, channel: str):
+        await self._pubsub.subscribe(channel)
+
+    async def unsubscribe(self, channel: str):
+        await self._pubsub.unsubscribe(channel)
+
+    async def _read(self):
+        while True:
+            try:
+                if not self._pubsub.subscribed:
+                    await asyncio.sleep(0.05)  # get_message needs an open subscription
+                    continue
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message and message["type"] == "message" and self._handler is not None:
+                    await self._handler(message["channel"], message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ Redis pub/sub read failed: {e}")
+                await asyncio.sleep(1.0)
+
+    async def close(self):
+        if self._reader is not None:
+            self._reader.cancel()
+            await asyncio.gather(self._reader, return_exceptions=True)
+            self._reader = None
+        await self._pubsub.aclose()
+        await self.client.aclose()
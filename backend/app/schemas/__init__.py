@@ -40,6 +40,7 @@ from .chat import (
     SendMessageRequest,
     MessageResponse,
     ChatResponse,
+    ChatStreamComplete,
     ConversationSummary,
     ConversationDetail,
     ConversationListResponse,
@@ -49,6 +50,7 @@ from .chat import (
     ConversationUpdate,
     AIGenerationRequest,
     AIGenerationResponse,
+    AIStreamChunk,
     WebSocketMessage,
     WebSocketResponse,
     ConversationStarter,
@@ -96,6 +98,7 @@ __all__ = [
     "SendMessageRequest",
     "MessageResponse",
     "ChatResponse",
+    "ChatStreamComplete",
     "ConversationSummary",
     "ConversationDetail",
     "ConversationListResponse",
@@ -105,6 +108,7 @@ __all__ = [
     "ConversationUpdate",
     "AIGenerationRequest",
     "AIGenerationResponse",
+    "AIStreamChunk",
     "WebSocketMessage",
     "WebSocketResponse",
     "ConversationStarter",
@@ -56,6 +56,21 @@ class UserResponse(UserBase):
         return v
 
 
+class UserSnapshot(BaseModel):
+    """Immutable copy of the user fields most authenticated requests need
+    
+    Cached per process by AuthService.get_user_snapshot, so it deliberately
+    holds no credentials or profile data.
+    """
+    id: UUID
+    email: str
+    full_name: str
+    is_active: bool
+    is_verified: bool
+    
+    model_config = {"from_attributes": True, "frozen": True}
+
+
 class UserUpdate(BaseModel):
     """Schema for user profile updates"""
     full_name: Optional[str] = Field(None, min_length=1, max_length=255)
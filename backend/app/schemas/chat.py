@@ -58,6 +58,15 @@ class ChatResponse(BaseModel):
     is_new_conversation: bool = Field(description="Whether this created a new conversation")
 
 
+class ChatStreamComplete(BaseModel):
+    """Terminal event for streamed chat responses"""
+    ai_message: MessageResponse
+    conversation_id: str
+    is_new_conversation: bool = Field(description="Whether this created a new conversation")
+    generation_time_ms: Optional[int] = None
+    time_to_first_token_ms: Optional[int] = None
+
+
 class ConversationSummary(BaseModel):
     """Summary of a conversation"""
     id: str
@@ -65,6 +74,7 @@ class ConversationSummary(BaseModel):
     summary: Optional[str]
     message_count: int
     last_message_at: datetime
+    last_message_preview: Optional[str] = None
     is_archived: bool
     created_at: datetime
     
@@ -103,15 +113,18 @@ class ConversationDetail(BaseModel):
 class ConversationListResponse(BaseModel):
     """Response for listing conversations"""
     conversations: List[ConversationSummary]
-    total_count: int
+    total_count: Optional[int] = Field(None, description="Only computed when include_total is set")
     has_more: bool
+    next_cursor: Optional[str] = Field(None, description="Pass as cursor to fetch the next page")
 
 
 class ChatHistoryRequest(BaseModel):
     """Request schema for chat history"""
     conversation_id: Optional[str] = Field(None, description="Specific conversation ID")
     limit: int = Field(default=50, ge=1, le=100, description="Number of messages to retrieve")
-    offset: int = Field(default=0, ge=0, description="Number of messages to skip")
+    offset: int = Field(default=0, ge=0, description="Number of messages to skip (ignored when cursor is set)")
+    cursor: Optional[str] = Field(None, description="Opaque next_cursor from the previous page")
+    include_total: Optional[bool] = Field(None, description="Compute total_count (default: offset mode only)")
     include_system_messages: bool = Field(default=False, description="Include system messages in history")
 
 
@@ -119,8 +132,9 @@ class ChatHistoryResponse(BaseModel):
     """Response schema for chat history"""
     messages: List[MessageResponse]
     conversation_id: Optional[str]
-    total_count: int
+    total_count: Optional[int] = Field(None, description="Only computed when include_total is set")
     has_more: bool
+    next_cursor: Optional[str] = Field(None, description="Pass as cursor to fetch the next page")
 
 
 class ConversationCreate(BaseModel):
@@ -138,20 +152,34 @@ class ConversationUpdate(BaseModel):
 class AIGenerationRequest(BaseModel):
     """Internal schema for AI response generation"""
     user_message: str
-    conversation_history: List[Dict[str, str]] = Field(default=[], description="Recent conversation context")
+    conversation_history: List[Dict[str, Any]] = Field(default=[], description="Recent conversation context (role, content, token_count)")
     user_context: Dict[str, Any] = Field(default={}, description="User personalization context")
     system_prompt: str = Field(description="Personalized system prompt")
+    conversation_id: Optional[str] = Field(None, description="Conversation the turn belongs to")
+    history_length: Optional[int] = Field(None, description="Messages stored before this turn, to validate saved model context")
+    conversation_summary: Optional[str] = Field(None, description="Summary of turns older than conversation_history")
+    user_id: Optional[str] = Field(None, description="Requesting user, for fair queueing in front of Ollama")
 
 
 class AIGenerationResponse(BaseModel):
     """Internal schema for AI response"""
     content: str
     token_count: Optional[int]
+    prompt_token_count: Optional[int] = None  # Tokens the user's turn added to the prompt
     model_used: str
     generation_time_ms: Optional[int]
+    time_to_first_token_ms: Optional[int] = None
     metadata: Optional[Dict[str, Any]]
 
 
+class AIStreamChunk(BaseModel):
+    """Internal schema for a piece of a streamed AI response"""
+    delta: str = Field(default="", description="Partial response text")
+    done: bool = Field(default=False, description="Whether this is the final chunk")
+    response: Optional[AIGenerationResponse] = Field(default=None, description="Assembled response, set on the final chunk")
+    queue_position: Optional[int] = Field(default=None, description="Place in line while waiting for a generation slot")
+
+
 class WebSocketMessage(BaseModel):
     """Schema for WebSocket messages"""
     type: str = Field(..., description="Message type: 'message', 'typing', 'error', 'connected'")
@@ -1,9 +1,33 @@
-from sqlalchemy.orm import Session
-from typing import Dict, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, date
+import copy
 
 from app.models.onboarding import OnboardingData
 from app.models.auth import User
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.singleflight import SingleFlight
+from app.database.connection import shared_session
+
+
+# Compiled system prompt and base context per user, versioned by OnboardingData.updated_at
+prompt_cache = LRUCache(
+    "system_prompt",
+    max_size=settings.PROMPT_CACHE_MAX_SIZE,
+    ttl=settings.PROMPT_CACHE_TTL
+)
+
+# Concurrent context lookups for one user share a single query, and the result
+# is reused briefly (e.g. by the several lookups of one /chat/starter request)
+context_flight = SingleFlight("user_context", ttl=settings.USER_CONTEXT_COALESCE_TTL)
+
+
+def invalidate_user_context(user_id):
+    """Drop a user's compiled prompt after their onboarding data changes"""
+    prompt_cache.invalidate(str(user_id))
+    context_flight.forget(str(user_id))
 
 
 class AIContextService:
@@ -44,18 +68,61 @@ Examples of BAD responses (too AI-like):
             "as_needed": "You're their on-demand counselor - present when they need support, but respond naturally to their actual needs."
         }
     
-    def generate_system_prompt(self, db: Session, user_id: str) -> str:
+    async def get_user_context(self, db: AsyncSession, user_id: str) -> Tuple[str, Dict]:
+        """System prompt and base conversation context for a user
+        
+        Served from ``prompt_cache`` while the onboarding row's ``updated_at``
+        is unchanged, so a hit costs one scalar lookup instead of loading the
+        profile and rebuilding the prompt. Lookups within
+        ``USER_CONTEXT_COALESCE_TTL`` of each other skip even that.
+        """
+        system_prompt, context, _ = await self._cached_user_context(db, user_id)
+        return system_prompt, copy.deepcopy(context)
+    
+    async def _cached_user_context(self, db: AsyncSession, user_id: str) -> Tuple[str, Dict, str]:
+        """Prompt, context and starter, coalesced per user through ``context_flight``"""
+        return await context_flight.do(str(user_id), lambda: self._load_user_context(db, user_id))
+    
+    async def _load_user_context(self, db: AsyncSession, user_id: str) -> Tuple[str, Dict, str]:
+        async with shared_session(db) as own_db:
+            version = await own_db.scalar(
+                select(OnboardingData.updated_at).where(OnboardingData.user_id == user_id)
+            )
+            cached = prompt_cache.get(str(user_id), version=version)
+            if cached is None:
+                version, system_prompt, context, starter = await self._compile_user_context(own_db, user_id)
+                cached = (system_prompt, context, starter)
+                prompt_cache.set(str(user_id), cached, version=version)
+            return cached
+    
+    async def generate_system_prompt(self, db: AsyncSession, user_id: str) -> str:
         """Generate a comprehensive system prompt for the AI based on user's onboarding data"""
+        system_prompt, _ = await self.get_user_context(db, user_id)
+        return system_prompt
+    
+    async def _compile_user_context(self, db: AsyncSession, user_id: str):
+        """Build the prompt, context and starter from the database, returning them with their version"""
         
         # Get user and onboarding data
-        onboarding = db.query(OnboardingData).filter(
-            OnboardingData.user_id == user_id
-        ).first()
+        result = await db.execute(
+            select(OnboardingData).where(OnboardingData.user_id == user_id)
+        )
+        onboarding = result.scalars().first()
+        
+        result = await db.execute(select(User).where(User.id == user_id))
+        user = result.scalars().first()
         
-        user = db.query(User).filter(User.id == user_id).first()
+        version = onboarding.updated_at if onboarding else None
+        context = self._build_conversation_context(onboarding)
+        starter = self._build_conversation_starter(onboarding)
         
         if not onboarding or not user:
-            return self._get_default_prompt()
+            return version, self._get_default_prompt(), context, starter
+        
+        return version, self._build_system_prompt(onboarding), context, starter
+    
+    def _build_system_prompt(self, onboarding: OnboardingData) -> str:
+        """Assemble the personalized prompt from the onboarding answers"""
         
         # Build personalized prompt
         prompt_parts = [
@@ -221,12 +288,13 @@ Respond to what they're actually asking. If they say "hi", just say "hi" back na
 
 You can provide thoughtful insights about growth and self-discovery, but only when it naturally fits the conversation. Always maintain a tone of gentle wisdom and forward-looking hope, but keep it human and relatable."""
     
-    def generate_conversation_context(self, db: Session, user_id: str, recent_messages: List[str] = None) -> Dict:
+    async def generate_conversation_context(self, db: AsyncSession, user_id: str, recent_messages: List[str] = None) -> Dict:
         """Generate context for ongoing conversations"""
-        onboarding = db.query(OnboardingData).filter(
-            OnboardingData.user_id == user_id
-        ).first()
-        
+        _, context = await self.get_user_context(db, user_id)
+        return context
+    
+    def _build_conversation_context(self, onboarding: Optional[OnboardingData]) -> Dict:
+        """Base conversation context from the onboarding answers"""
         context = {
             "user_name": onboarding.name if onboarding and onboarding.name else "friend",
             "current_goals": [],
@@ -243,12 +311,13 @@ You can provide thoughtful insights about growth and self-discovery, but only wh
         
         return context
     
-    def get_conversation_starter(self, db: Session, user_id: str) -> str:
+    async def get_conversation_starter(self, db: AsyncSession, user_id: str) -> str:
         """Generate a personalized conversation starter"""
-        onboarding = db.query(OnboardingData).filter(
-            OnboardingData.user_id == user_id
-        ).first()
-        
+        _, _, starter = await self._cached_user_context(db, user_id)
+        return starter
+    
+    def _build_conversation_starter(self, onboarding: Optional[OnboardingData]) -> str:
+        """Personalized conversation starter from the onboarding answers"""
         if not onboarding:
             return "Hey there! What's on your mind today?"
         
@@ -4,33 +4,79 @@ import secrets
 import hashlib
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, select, update
 
 from app.core.config import settings
+from app.core.password_hashing import PasswordHasher
+from app.core.singleflight import SingleFlight
+from app.database.connection import shared_session
 from app.models.auth import User, RefreshToken
-from app.schemas.auth import UserCreate, UserLogin, Token
+from app.schemas.auth import UserCreate, UserLogin, Token, UserSnapshot
 from app.core.exceptions import AuthenticationError, ValidationError
 
 
+# Per-user snapshots for the auth fast path; concurrent lookups (e.g. a burst
+# of WebSocket connects) share one query. Each worker keeps its own copy, so
+# AUTH_USER_CACHE_TTL bounds how long another worker can miss an invalidation.
+user_snapshot_flight = SingleFlight(
+    "user_snapshot",
+    ttl=settings.AUTH_USER_CACHE_TTL,
+    max_size=settings.AUTH_USER_CACHE_SIZE
+)
+
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# bcrypt runs here instead of on the event loop
+password_hasher = PasswordHasher(
+    pwd_context,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_per_client=settings.PASSWORD_HASH_MAX_PER_CLIENT,
+    max_per_email=settings.PASSWORD_HASH_MAX_PER_EMAIL,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+    max_queue_per_client=settings.PASSWORD_HASH_MAX_QUEUE_PER_CLIENT,
+    max_wait=settings.PASSWORD_HASH_QUEUE_TIMEOUT
+)
+
+
+def invalidate_user_snapshot(user_id):
+    """Drop a user's cached snapshot after their account or credentials change"""
+    user_snapshot_flight.forget(str(user_id))
+
+
 class AuthService:
     """Authentication service for handling user auth operations"""
     
     def __init__(self):
-        self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+        self.pwd_context = pwd_context
         self.algorithm = settings.ALGORITHM
         self.secret_key = settings.SECRET_KEY
         self.access_token_expire_minutes = settings.ACCESS_TOKEN_EXPIRE_MINUTES
         self.refresh_token_expire_days = 30  # 30 days for refresh tokens
     
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        """Verify a plain password against a hashed password"""
+        """Verify a plain password against a hashed password (blocks; see check_password)"""
         return self.pwd_context.verify(plain_password, hashed_password)
     
     def get_password_hash(self, password: str) -> str:
-        """Hash a password"""
+        """Hash a password (blocks; see hash_password)"""
         return self.pwd_context.hash(password)
     
+    async def check_password(
+        self,
+        plain_password: str,
+        hashed_password: str,
+        client: Optional[str] = None,
+        email: Optional[str] = None
+    ) -> bool:
+        """Verify a password in the hashing pool, queued fairly per client and account"""
+        return await password_hasher.verify(plain_password, hashed_password, client=client, email=email)
+    
+    async def hash_password(self, password: str, client: Optional[str] = None) -> str:
+        """Hash a password in the hashing pool, queued fairly per client"""
+        return await password_hasher.hash(password, client=client)
+    
     def create_access_token(self, data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
         """Create JWT access token"""
         to_encode = data.copy()
@@ -43,7 +89,7 @@ class AuthService:
         encoded_jwt = jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
         return encoded_jwt
     
-    def create_refresh_token(self, db: Session, user_id: str) -> str:
+    async def create_refresh_token(self, db: AsyncSession, user_id: str) -> str:
         """Create and store refresh token"""
         # Generate secure random token
         token_data = secrets.token_urlsafe(32)
@@ -56,7 +102,7 @@ class AuthService:
         )
         
         db.add(refresh_token)
-        db.commit()
+        await db.commit()
         
         return token_data
     
@@ -68,23 +114,34 @@ class AuthService:
         except JWTError:
             return None
     
-    def get_user_by_email(self, db: Session, email: str) -> Optional[User]:
+    async def get_user_by_email(self, db: AsyncSession, email: str) -> Optional[User]:
         """Get user by email"""
-        return db.query(User).filter(User.email == email).first()
+        result = await db.execute(select(User).where(User.email == email))
+        return result.scalars().first()
     
-    def get_user_by_id(self, db: Session, user_id: str) -> Optional[User]:
+    async def get_user_by_id(self, db: AsyncSession, user_id: str) -> Optional[User]:
         """Get user by ID"""
-        return db.query(User).filter(User.id == user_id).first()
+        result = await db.execute(select(User).where(User.id == user_id))
+        return result.scalars().first()
+    
+    async def get_user_snapshot(self, db: AsyncSession, user_id: str) -> Optional[UserSnapshot]:
+        """Get a user's snapshot, from the per-process cache when possible"""
+        return await user_snapshot_flight.do(str(user_id), lambda: self._load_user_snapshot(db, user_id))
     
-    def create_user(self, db: Session, user_create: UserCreate) -> User:
+    async def _load_user_snapshot(self, db: AsyncSession, user_id: str) -> Optional[UserSnapshot]:
+        async with shared_session(db) as own_db:
+            user = await self.get_user_by_id(own_db, user_id)
+            return UserSnapshot.model_validate(user) if user else None
+    
+    async def create_user(self, db: AsyncSession, user_create: UserCreate, client: Optional[str] = None) -> User:
         """Create a new user"""
         # Check if user already exists
-        existing_user = self.get_user_by_email(db, user_create.email)
+        existing_user = await self.get_user_by_email(db, user_create.email)
         if existing_user:
             raise ValidationError("User with this email already exists")
         
         # Hash password
-        hashed_password = self.get_password_hash(user_create.password)
+        hashed_password = await self.hash_password(user_create.password, client=client)
         
         # Create user
         user = User(
@@ -96,18 +153,24 @@ class AuthService:
         )
         
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
         
         return user
     
-    def authenticate_user(self, db: Session, email: str, password: str) -> Optional[User]:
+    async def authenticate_user(
+        self,
+        db: AsyncSession,
+        email: str,
+        password: str,
+        client: Optional[str] = None
+    ) -> Optional[User]:
         """Authenticate user with email and password"""
-        user = self.get_user_by_email(db, email)
+        user = await self.get_user_by_email(db, email)
         if not user:
             return None
         
-        if not self.verify_password(password, user.hashed_password):
+        if not await self.check_password(password, user.hashed_password, client=client, email=email):
             return None
         
         if not user.is_active:
@@ -115,19 +178,22 @@ class AuthService:
         
         # Update last login
         user.update_last_login()
-        db.commit()
+        await db.commit()
         
         return user
     
-    def login_user(self, db: Session, user_login: UserLogin) -> Dict[str, Any]:
+    async def login_user(self, db: AsyncSession, user_login: UserLogin, client: Optional[str] = None) -> Dict[str, Any]:
         """Login user and return tokens"""
-        user = self.authenticate_user(db, user_login.email, user_login.password)
+        user = await self.authenticate_user(db, user_login.email, user_login.password, client=client)
         if not user:
             raise AuthenticationError("Invalid email or password")
         
-        # Create tokens
+        return await self.issue_tokens(db, user)
+    
+    async def issue_tokens(self, db: AsyncSession, user: User) -> Dict[str, Any]:
+        """Create access and refresh tokens for an already authenticated user"""
         access_token = self.create_access_token(data={"sub": str(user.id)})
-        refresh_token = self.create_refresh_token(db, str(user.id))
+        refresh_token = await self.create_refresh_token(db, str(user.id))
         
         return {
             "user": user,
@@ -139,21 +205,24 @@ class AuthService:
             )
         }
     
-    def refresh_access_token(self, db: Session, refresh_token: str) -> Dict[str, Any]:
+    async def refresh_access_token(self, db: AsyncSession, refresh_token: str) -> Dict[str, Any]:
         """Refresh access token using refresh token"""
         # Find refresh token
-        token_record = db.query(RefreshToken).filter(
-            and_(
-                RefreshToken.token == refresh_token,
-                RefreshToken.is_revoked == False
+        result = await db.execute(
+            select(RefreshToken).where(
+                and_(
+                    RefreshToken.token == refresh_token,
+                    RefreshToken.is_revoked == False
+                )
             )
-        ).first()
+        )
+        token_record = result.scalars().first()
         
         if not token_record or not token_record.is_valid():
             raise AuthenticationError("Invalid or expired refresh token")
         
         # Get user
-        user = self.get_user_by_id(db, str(token_record.user_id))
+        user = await self.get_user_by_id(db, str(token_record.user_id))
         if not user or not user.is_active:
             raise AuthenticationError("User not found or inactive")
         
@@ -166,84 +235,121 @@ class AuthService:
             "expires_in": self.access_token_expire_minutes * 60
         }
     
-    def revoke_refresh_token(self, db: Session, refresh_token: str) -> bool:
+    async def revoke_refresh_token(self, db: AsyncSession, refresh_token: str) -> bool:
         """Revoke refresh token"""
-        token_record = db.query(RefreshToken).filter(
-            RefreshToken.token == refresh_token
-        ).first()
+        result = await db.execute(
+            select(RefreshToken).where(RefreshToken.token == refresh_token)
+        )
+        token_record = result.scalars().first()
         
         if token_record:
             token_record.revoke()
-            db.commit()
+            await db.commit()
             return True
         
         return False
     
-    def revoke_all_user_tokens(self, db: Session, user_id: str) -> int:
-        """Revoke all refresh tokens for a user"""
-        count = db.query(RefreshToken).filter(
-            and_(
-                RefreshToken.user_id == user_id,
-                RefreshToken.is_revoked == False
-            )
-        ).update({"is_revoked": True})
+    async def revoke_all_user_tokens(self, db: AsyncSession, user_id: str) -> int:
+        """Revoke all refresh tokens for a user
         
-        db.commit()
-        return count
+        Also drops the user's cached snapshot; password changes and
+        deactivation go through here.
+        """
+        result = await db.execute(
+            update(RefreshToken).where(
+                and_(
+                    RefreshToken.user_id == user_id,
+                    RefreshToken.is_revoked == False
+                )
+            ).values(is_revoked=True)
+        )
+        
+        await db.commit()
+        invalidate_user_snapshot(user_id)
+        return result.rowcount
+    
+    async def deactivate_user(self, db: AsyncSession, user_id: str) -> bool:
+        """Disable a user's account and revoke their refresh tokens
+
+        This worker's cached snapshot is dropped at once. Other workers keep
+        theirs in ``user_snapshot_flight``, so they may still accept the
+        user's access tokens for up to AUTH_USER_CACHE_TTL.
+        """
+        result = await db.execute(
+            update(User).where(User.id == user_id).values(is_active=False)
+        )
+        await self.revoke_all_user_tokens(db, user_id)
+        return result.rowcount > 0
     
-    def verify_user_email(self, db: Session, token: str) -> Optional[User]:
+    async def verify_user_email(self, db: AsyncSession, token: str) -> Optional[User]:
         """Verify user email using verification token"""
-        user = db.query(User).filter(User.verification_token == token).first()
+        result = await db.execute(select(User).where(User.verification_token == token))
+        user = result.scalars().first()
         if user:
             user.is_verified = True
             user.verification_token = None
-            db.commit()
+            await db.commit()
+            invalidate_user_snapshot(user.id)
             return user
         return None
     
-    def generate_password_reset_token(self, db: Session, email: str) -> Optional[str]:
+    async def generate_password_reset_token(self, db: AsyncSession, email: str) -> Optional[str]:
         """Generate password reset token"""
-        user = self.get_user_by_email(db, email)
+        user = await self.get_user_by_email(db, email)
         if not user:
             return None
         
         token = secrets.token_urlsafe(32)
         user.set_password_reset_token(token)
-        db.commit()
+        await db.commit()
         
         return token
     
-    def reset_password(self, db: Session, token: str, new_password: str) -> Optional[User]:
+    async def reset_password(
+        self,
+        db: AsyncSession,
+        token: str,
+        new_password: str,
+        client: Optional[str] = None
+    ) -> Optional[User]:
         """Reset password using reset token"""
-        user = db.query(User).filter(User.password_reset_token == token).first()
+        result = await db.execute(select(User).where(User.password_reset_token == token))
+        user = result.scalars().first()
         if not user or not user.is_password_reset_valid():
             return None
         
         # Update password
-        user.hashed_password = self.get_password_hash(new_password)
+        user.hashed_password = await self.hash_password(new_password, client=client)
         user.clear_password_reset_token()
         
         # Revoke all refresh tokens
-        self.revoke_all_user_tokens(db, str(user.id))
+        await self.revoke_all_user_tokens(db, str(user.id))
         
-        db.commit()
+        await db.commit()
         return user
     
-    def change_password(self, db: Session, user_id: str, current_password: str, new_password: str) -> bool:
+    async def change_password(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        current_password: str,
+        new_password: str,
+        client: Optional[str] = None
+    ) -> bool:
         """Change user password"""
-        user = self.get_user_by_id(db, user_id)
+        user = await self.get_user_by_id(db, user_id)
         if not user:
             return False
         
         # Verify current password
-        if not self.verify_password(current_password, user.hashed_password):
+        if not await self.check_password(current_password, user.hashed_password, client=client, email=user.email):
             return False
         
         # Update password
-        user.hashed_password = self.get_password_hash(new_password)
+        user.hashed_password = await self.hash_password(new_password, client=client)
         
         # Revoke all refresh tokens
-        self.revoke_all_user_tokens(db, user_id)
+        await self.revoke_all_user_tokens(db, user_id)
         
-        db.commit()
+        await db.commit()
         return True 
\ No newline at end of file
@@ -0,0 +1,556 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, func, text
+from sqlalchemy.orm.attributes import set_committed_value
+from typing import Dict, List, Optional, Any, Tuple
+from collections import deque
+from datetime import datetime
+import uuid
+
+from app.models.chat import Conversation, ChatMessage, MessageRole as DBMessageRole
+from app.schemas.chat import (
+    AIGenerationRequest,
+    AIGenerationResponse,
+    MessageResponse,
+    ConversationSummary,
+    ConversationListResponse
+)
+from app.services.ai_context_service import AIContextService
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.exceptions import NotFoundError
+from app.core.pagination import encode_cursor, after_cursor
+
+
+# Ring buffer of each active conversation's most recent messages, filled as
+# turns are written so the next turn builds its history without a read.
+# Entries are versioned by the conversation's (message_count,
+# summary_message_count): a turn written on another worker, or a new
+# summary, bumps the row's counts and the stale window is reloaded.
+conversation_windows = LRUCache(
+    "conversation_window",
+    max_size=settings.CONVERSATION_WINDOW_CACHE_SIZE,
+    ttl=settings.CONVERSATION_WINDOW_TTL
+)
+
+
+# A message as the list endpoints return it, selected as a plain row instead
+# of an ORM entity so the rows can go straight to the JSON encoder
+MESSAGE_COLUMNS = (
+    ChatMessage.id,
+    ChatMessage.conversation_id,
+    ChatMessage.role,
+    ChatMessage.content,
+    ChatMessage.message_metadata,
+    ChatMessage.token_count,
+    ChatMessage.created_at,
+)
+
+
+class ChatTurn:
+    """One exchange: the user's message, the history it is answered with, and the reply
+
+    Nothing is added to the session until ``ChatService.persist_turn``, so a
+    new conversation, both messages and the conversation's stats reach the
+    database in one short transaction after generation instead of being
+    flushed (and re-read) piecemeal while the model runs.
+    """
+
+    def __init__(
+        self,
+        conversation: Conversation,
+        is_new_conversation: bool,
+        user_message: ChatMessage,
+        history: List[Dict[str, Any]]
+    ):
+        self.conversation = conversation
+        self.is_new_conversation = is_new_conversation
+        self.user_message = user_message
+        self.history = history
+        self.ai_message: Optional[ChatMessage] = None
+
+
+class ChatService:
+    """Service for the conversation and message persistence shared by every chat transport"""
+
+    def __init__(self, ai_context_service: Optional[AIContextService] = None):
+        self.ai_context_service = ai_context_service or AIContextService()
+        self.history_window = 30  # Most messages loaded per turn; the token budget picks what fits
+        self.preview_length = 100  # Characters kept in Conversation.last_message_preview
+
+    async def get_or_create_conversation(
+        self,
+        db: AsyncSession,
+        user_id,
+        conversation_id: Optional[str] = None,
+        create_if_missing: bool = False
+    ) -> Tuple[Conversation, bool]:
+        """Load the user's conversation or start a new one
+
+        Returns the conversation and whether it was newly created. An unknown
+        ``conversation_id`` raises ``NotFoundError`` unless ``create_if_missing``
+        is set. A new conversation gets its ID client-side and is not added to
+        the session; ``persist_turn`` inserts it along with its first turn.
+
+        The row is always reloaded from the select: a session held across
+        turns (the WebSocket handler's) keeps its identity map, which would
+        otherwise hand back counts from before other sessions' turns.
+        """
+        if conversation_id:
+            result = await db.execute(
+                select(Conversation).where(
+                    Conversation.id == conversation_id,
+                    Conversation.user_id == user_id
+                ).execution_options(populate_existing=True)
+            )
+            conversation = result.scalars().first()
+
+            if conversation:
+                return conversation, False
+
+            if not create_if_missing:
+                raise NotFoundError("Conversation not found")
+
+        conversation = Conversation(
+            id=uuid.uuid4(),
+            user_id=user_id,
+            title=f"Chat started {datetime.utcnow().strftime('%Y-%m-%d %H:%M')}",
+            message_count=0,
+            summary_message_count=0
+        )
+        return conversation, True
+
+    async def start_turn(
+        self,
+        db: AsyncSession,
+        conversation: Conversation,
+        is_new_conversation: bool,
+        content: str,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> ChatTurn:
+        """Build the user's message and load the history to answer it with
+
+        History comes from ``conversation_windows`` while its version matches
+        the conversation row, so an active conversation needs no history
+        read. On a miss it is read once, before the user's message exists,
+        and cached for the next turn.
+        """
+        user_message = ChatMessage(
+            id=uuid.uuid4(),
+            conversation_id=conversation.id,
+            role=DBMessageRole.USER,
+            content=content,
+            message_metadata=metadata or None,
+            created_at=datetime.utcnow()
+        )
+
+        if is_new_conversation:
+            history = []
+        else:
+            history = await self.get_recent_history(db, conversation)
+        return ChatTurn(conversation, is_new_conversation, user_message, history)
+
+    async def persist_turn(
+        self,
+        db: AsyncSession,
+        turn: ChatTurn,
+        ai_response: AIGenerationResponse,
+        message_id: Optional[uuid.UUID] = None
+    ) -> ChatMessage:
+        """Write the turn in one transaction and return the assistant's message
+
+        The conversation (when new) and both messages carry client-side IDs,
+        so the turn is a conversation INSERT or stats UPDATE plus a single
+        batched INSERT of both messages, then COMMIT. The conversation's
+        window is advanced once the commit succeeds.
+        """
+        user_message = turn.user_message
+        if ai_response.prompt_token_count:
+            user_message.token_count = str(ai_response.prompt_token_count)
+
+        ai_message = ChatMessage(
+            id=message_id or uuid.uuid4(),
+            conversation_id=turn.conversation.id,
+            role=DBMessageRole.ASSISTANT,
+            content=ai_response.content,
+            token_count=str(ai_response.token_count) if ai_response.token_count else None,
+            message_metadata=ai_response.metadata or None
+        )
+        turn.ai_message = ai_message
+
+        conversation = turn.conversation
+        count, summarized = self._window_version(conversation)
+        if turn.is_new_conversation:
+            self.record_message(conversation, user_message)
+            self.record_message(conversation, ai_message)
+            db.add(conversation)
+        else:
+            await self.record_messages(db, conversation, [user_message, ai_message])
+        db.add_all([user_message, ai_message])
+        await db.commit()
+
+        # Only extend the window if no other turn landed since its history was read
+        if self._window_version(conversation) == (count + 2, summarized):
+            window = deque(turn.history, maxlen=self.history_window)
+            window.append(self._history_entry(user_message))
+            window.append(self._history_entry(ai_message))
+            conversation_windows.set(conversation.id, window, version=self._window_version(conversation))
+        else:
+            conversation_windows.invalidate(conversation.id)
+        return ai_message
+
+    async def get_recent_history(self, db: AsyncSession, conversation: Conversation) -> List[Dict[str, Any]]:
+        """Recent messages as AI context, from the conversation's window or the database"""
+        version = self._window_version(conversation)
+        window = conversation_windows.get(conversation.id, version=version)
+        if window is None:
+            window = deque(await self.get_conversation_history(db, conversation), maxlen=self.history_window)
+            conversation_windows.set(conversation.id, window, version=version)
+        return list(window)
+
+    def _window_version(self, conversation: Conversation) -> Tuple[int, int]:
+        return conversation.message_count or 0, conversation.summary_message_count or 0
+
+    def _history_entry(self, message: ChatMessage) -> Dict[str, Any]:
+        return {"role": message.role.value, "content": message.content, "token_count": message.token_count}
+
+    async def add_user_message(
+        self,
+        db: AsyncSession,
+        conversation: Conversation,
+        content: str,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> ChatMessage:
+        """Save the user's message"""
+        user_message = ChatMessage(
+            conversation_id=conversation.id,
+            role=DBMessageRole.USER,
+            content=content,
+            message_metadata=metadata or None,
+            created_at=datetime.utcnow()
+        )
+        db.add(user_message)
+        await self.record_messages(db, conversation, [user_message])
+        return user_message
+
+    async def get_conversation_history(self, db: AsyncSession, conversation: Conversation) -> List[Dict[str, Any]]:
+        """Load recent messages as AI context, before the new turn is stored
+        
+        Messages already folded into ``conversation.summary`` are skipped.
+        """
+        unsummarized = (conversation.message_count or 0) - (conversation.summary_message_count or 0)
+        if unsummarized <= 0:
+            return []
+        result = await db.execute(
+            select(ChatMessage).where(
+                ChatMessage.conversation_id == conversation.id
+            ).order_by(ChatMessage.created_at.desc()).limit(min(self.history_window, unsummarized))
+        )
+        recent_messages = list(result.scalars().all())
+
+        # Reverse to get chronological order
+        recent_messages.reverse()
+
+        return [self._history_entry(msg) for msg in recent_messages]
+
+    async def build_generation_request(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        user_message: str,
+        conversation_history: List[Dict[str, Any]],
+        conversation: Optional[Conversation] = None
+    ) -> AIGenerationRequest:
+        """Prepare the personalized AI generation request
+        
+        Passing the conversation (before the turn is persisted) lets the
+        Ollama service reuse the model context saved from the previous turn.
+        """
+        system_prompt, user_context = await self.ai_context_service.get_user_context(db, user_id)
+
+        return AIGenerationRequest(
+            user_message=user_message,
+            conversation_history=conversation_history,
+            user_context=user_context,
+            system_prompt=system_prompt,
+            conversation_id=str(conversation.id) if conversation else None,
+            history_length=(conversation.message_count or 0) if conversation else None,
+            conversation_summary=conversation.summary if conversation else None,
+            user_id=str(user_id)
+        )
+
+    def title_from_message(self, content: str) -> Optional[str]:
+        """Title for a new conversation from its first message, if it's descriptive enough"""
+        if len(content) <= 10:
+            return None
+        title_preview = content[:50]
+        if len(content) > 50:
+            title_preview += "..."
+        return title_preview
+
+    async def update_title_from_message(self, db: AsyncSession, conversation_id: str, content: str) -> bool:
+        """Title a conversation after its first message; run as a background job"""
+        title = self.title_from_message(content)
+        if title is None:
+            return False
+        result = await db.execute(
+            update(Conversation)
+            .where(Conversation.id == conversation_id)
+            .values(title=title, updated_at=Conversation.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return result.rowcount == 1
+
+    def record_message(self, conversation: Conversation, message: ChatMessage):
+        """Keep a new (not yet inserted) conversation's message stats in step with a message
+
+        Stored conversations go through ``record_messages`` instead.
+        """
+        if message.created_at is None:
+            message.created_at = datetime.utcnow()
+        conversation.message_count = (conversation.message_count or 0) + 1
+        conversation.last_message_at = message.created_at
+        conversation.last_message_preview = message.content[:self.preview_length]
+
+    async def record_messages(self, db: AsyncSession, conversation: Conversation, messages: List[ChatMessage]):
+        """Add new messages to a stored conversation's stats in one UPDATE
+
+        The count is incremented in SQL rather than written back from this
+        session's copy, so concurrent turns on one conversation (two tabs, or
+        REST and a WebSocket) can't lose increments. The conversation is set
+        from the returned row without being marked dirty. Runs in the
+        caller's transaction; ``repair_conversation_stats`` recomputes the
+        columns from ``chat_messages`` if they ever drift.
+        """
+        for message in messages:
+            if message.created_at is None:
+                message.created_at = datetime.utcnow()
+        latest = messages[-1]
+
+        result = await db.execute(
+            update(Conversation)
+            .where(Conversation.id == conversation.id)
+            .values(
+                message_count=Conversation.message_count + len(messages),
+                last_message_at=latest.created_at,
+                last_message_preview=latest.content[:self.preview_length]
+            )
+            .returning(
+                Conversation.message_count,
+                Conversation.summary_message_count,
+                Conversation.last_message_at,
+                Conversation.last_message_preview,
+                Conversation.updated_at
+            )
+            .execution_options(synchronize_session=False)
+        )
+        for key, value in result.one()._mapping.items():
+            set_committed_value(conversation, key, value)
+
+    async def repair_conversation_stats(self, db: AsyncSession, user_id=None) -> int:
+        """Recompute message_count/last_message_at/last_message_preview from chat_messages
+
+        Returns the number of conversations updated. Used by the backfill script.
+        """
+        messages = select(ChatMessage).where(ChatMessage.conversation_id == Conversation.id)
+        latest = messages.order_by(ChatMessage.created_at.desc()).limit(1)
+
+        statement = update(Conversation).values(
+            message_count=select(func.count(ChatMessage.id)).where(
+                ChatMessage.conversation_id == Conversation.id
+            ).scalar_subquery(),
+            last_message_at=latest.with_only_columns(ChatMessage.created_at).scalar_subquery(),
+            last_message_preview=latest.with_only_columns(
+                func.substr(ChatMessage.content, 1, self.preview_length)
+            ).scalar_subquery(),
+            updated_at=Conversation.updated_at  # A repair is not activity; keep recency order
+        ).execution_options(synchronize_session=False)
+        if user_id is not None:
+            statement = statement.where(Conversation.user_id == user_id)
+
+        if db.get_bind().dialect.name == "postgresql":
+            # Corrected stats would otherwise let the updated_at trigger restamp the row
+            await db.execute(text("SET LOCAL app.keep_updated_at = 'on'"))
+        result = await db.execute(statement)
+        return result.rowcount
+
+    async def _fetch_page(
+        self,
+        db: AsyncSession,
+        query,
+        sort_column,
+        id_column,
+        limit: int,
+        offset: int,
+        cursor: Optional[str],
+        include_total: bool,
+        as_rows: bool = False
+    ) -> Tuple[list, bool, Optional[str], Optional[int]]:
+        """Run a newest-first page query in keyset (``cursor``) or offset mode
+
+        Fetches one extra row to compute ``has_more`` without a count; the
+        total is only counted when ``include_total`` is set. ``as_rows``
+        returns column tuples for queries that select columns, not an entity.
+        """
+        total_count = None
+        if include_total:
+            total_count = await db.scalar(select(func.count()).select_from(query.subquery()))
+
+        page_query = query.order_by(sort_column.desc(), id_column.desc())
+        if cursor:
+            page_query = page_query.where(after_cursor(sort_column, id_column, cursor))
+        else:
+            page_query = page_query.offset(offset)
+
+        result = await db.execute(page_query.limit(limit + 1))
+        rows = list(result.all() if as_rows else result.scalars().all())
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        next_cursor = None
+        if has_more and rows:
+            last = rows[-1]
+            next_cursor = encode_cursor(getattr(last, sort_column.key), last.id)
+        return rows, has_more, next_cursor, total_count
+
+    async def list_conversations(
+        self,
+        db: AsyncSession,
+        user_id,
+        limit: int = 20,
+        offset: int = 0,
+        include_archived: bool = False,
+        cursor: Optional[str] = None,
+        include_total: bool = True
+    ) -> ConversationListResponse:
+        """Page of conversation summaries, most recently updated first, read from the maintained stats columns"""
+        query = select(Conversation).where(Conversation.user_id == user_id)
+        if not include_archived:
+            query = query.where(Conversation.is_archived == False)
+
+        conversations, has_more, next_cursor, total_count = await self._fetch_page(
+            db, query, Conversation.updated_at, Conversation.id, limit, offset, cursor, include_total
+        )
+        return ConversationListResponse(
+            conversations=[self.to_conversation_summary(conv) for conv in conversations],
+            total_count=total_count,
+            has_more=has_more,
+            next_cursor=next_cursor
+        )
+
+    async def get_message_history(
+        self,
+        db: AsyncSession,
+        user_id,
+        conversation_id: Optional[str] = None,
+        limit: int = 50,
+        offset: int = 0,
+        include_system_messages: bool = False,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
+        fallback_used: Optional[bool] = None
+    ) -> Dict[str, Any]:
+        """Page of the user's messages, newest first, shaped like ``ChatHistoryResponse``
+
+        Returns plain values (see ``message_row_to_dict``) for the endpoint
+        to encode directly. ``fallback_used`` filters on the metadata key in
+        the database: ``True`` keeps only canned fallback replies, ``False``
+        leaves them out.
+        """
+        query = select(*MESSAGE_COLUMNS).join(Conversation).where(Conversation.user_id == user_id)
+        if conversation_id:
+            query = query.where(ChatMessage.conversation_id == conversation_id)
+        if not include_system_messages:
+            query = query.where(ChatMessage.role != DBMessageRole.SYSTEM)
+        if fallback_used is not None:
+            flag = func.coalesce(ChatMessage.message_metadata["fallback_used"].as_boolean(), False)
+            query = query.where(flag == fallback_used)
+
+        rows, has_more, next_cursor, total_count = await self._fetch_page(
+            db, query, ChatMessage.created_at, ChatMessage.id, limit, offset, cursor, include_total, as_rows=True
+        )
+        return {
+            "messages": [self.message_row_to_dict(row) for row in rows],
+            "conversation_id": conversation_id,
+            "total_count": total_count,
+            "has_more": has_more,
+            "next_cursor": next_cursor,
+        }
+
+    async def get_conversation_detail(self, db: AsyncSession, user_id, conversation_id: str) -> Dict[str, Any]:
+        """A conversation with all its messages, oldest first, shaped like ``ConversationDetail``"""
+        result = await db.execute(
+            select(Conversation).where(
+                Conversation.id == conversation_id,
+                Conversation.user_id == user_id
+            )
+        )
+        conversation = result.scalars().first()
+        if not conversation:
+            raise NotFoundError("Conversation not found")
+
+        result = await db.execute(
+            select(*MESSAGE_COLUMNS).where(
+                ChatMessage.conversation_id == conversation.id
+            ).order_by(ChatMessage.created_at.asc(), ChatMessage.id.asc())
+        )
+        return {
+            "id": str(conversation.id),
+            "title": conversation.title,
+            "summary": conversation.summary,
+            "is_archived": conversation.is_archived,
+            "created_at": conversation.created_at,
+            "updated_at": conversation.updated_at,
+            "messages": [self.message_row_to_dict(row) for row in result.all()],
+        }
+
+    def message_row_to_dict(self, row) -> Dict[str, Any]:
+        """A ``MESSAGE_COLUMNS`` row as ``MessageResponse`` fields, without per-row validation
+
+        The role and ``created_at`` stay enum and datetime values; orjson
+        encodes them natively, in the same format as FastAPI's encoder. IDs
+        are converted because asyncpg returns its own UUID subclass, which
+        orjson does not encode.
+        """
+        message_id, conversation_id, role, content, metadata, token_count, created_at = row
+        return {
+            "id": str(message_id),
+            "conversation_id": str(conversation_id),
+            "role": role,
+            "content": content,
+            "message_type": "text",
+            "metadata": metadata,
+            "token_count": token_count,
+            "created_at": created_at,
+        }
+
+    def to_conversation_summary(self, conversation: Conversation) -> ConversationSummary:
+        """Convert a conversation to its API representation"""
+        return ConversationSummary(
+            id=str(conversation.id),
+            title=conversation.title,
+            summary=conversation.summary,
+            message_count=conversation.message_count or 0,
+            last_message_at=conversation.last_message_at or conversation.created_at,
+            last_message_preview=conversation.last_message_preview,
+            is_archived=conversation.is_archived,
+            created_at=conversation.created_at
+        )
+
+    def to_message_response(
+        self,
+        message: ChatMessage,
+        metadata: Optional[Dict[str, Any]] = None,
+        message_type: str = "text"
+    ) -> MessageResponse:
+        """Convert a stored message to its API representation; ``metadata`` defaults to the stored value"""
+        return MessageResponse(
+            id=str(message.id),
+            conversation_id=str(message.conversation_id),
+            role=message.role.value,
+            content=message.content,
+            message_type=message_type,
+            metadata=metadata if metadata is not None else message.message_metadata,
+            token_count=message.token_count,
+            created_at=message.created_at
+        )
@@ -0,0 +1,206 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, exists, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from typing import Dict, List, Optional, Tuple
+from datetime import date, datetime, timedelta
+import asyncio
+import logging
+import time
+
+from app.core.config import settings
+from app.database import connection
+from app.jobs import queue as jobs
+from app.models.auth import User
+from app.models.content import DailyMessage
+from app.models.onboarding import OnboardingData
+from app.services.ai_context_service import AIContextService
+from app.services.ollama_service import OllamaService
+
+logger = logging.getLogger(__name__)
+
+
+class DailyMessageService:
+    """Pre-generates each user's daily message in an off-peak batch
+
+    Users are picked by ``OnboardingData.message_frequency`` and walked in
+    id order, ``batch_size`` at a time. Each batch is generated with at most
+    ``concurrency`` Ollama calls in flight and written with one bulk insert,
+    so reading a message later is a single lookup on (user_id, scheduled_for).
+    """
+
+    def __init__(self, ollama_service: Optional[OllamaService] = None):
+        self.ollama_service = ollama_service or OllamaService()
+        self.ai_context_service = AIContextService()
+        self.concurrency = settings.DAILY_MESSAGE_CONCURRENCY
+        self.batch_size = settings.DAILY_MESSAGE_BATCH_SIZE
+        self.message_type = "motivational"
+
+    def frequencies_for(self, day: date) -> List[str]:
+        """Message frequencies that get a message on ``day``"""
+        if day.weekday() == settings.DAILY_MESSAGE_WEEKLY_DAY:
+            return ["daily", "weekly"]
+        return ["daily"]
+
+    async def due_users(self, db: AsyncSession, day: date, after_id=None) -> List:
+        """Next batch of active users due a message on ``day`` who don't have one yet"""
+        already_sent = exists().where(
+            DailyMessage.user_id == User.id,
+            DailyMessage.scheduled_for == day
+        )
+        query = (
+            select(User.id)
+            .join(OnboardingData, OnboardingData.user_id == User.id)
+            .where(
+                User.is_active.is_(True),
+                OnboardingData.message_frequency.in_(self.frequencies_for(day)),
+                ~already_sent
+            )
+            .order_by(User.id)
+            .limit(self.batch_size)
+        )
+        if after_id is not None:
+            query = query.where(User.id > after_id)
+        result = await db.execute(query)
+        return list(result.scalars().all())
+
+    async def generate_for_day(self, db: AsyncSession, day: date) -> Dict[str, int]:
+        """Generate and store messages for every user due on ``day``
+
+        Safe to re-run: users who already have a message are skipped and
+        concurrent inserts for the same day are ignored.
+        """
+        stats = {"users": 0, "generated": 0, "failed": 0}
+        semaphore = asyncio.Semaphore(self.concurrency)
+        last_id = None
+        start_time = time.time()
+
+        while True:
+            user_ids = await self.due_users(db, day, after_id=last_id)
+            if not user_ids:
+                break
+            last_id = user_ids[-1]
+            stats["users"] += len(user_ids)
+
+            # Prompts come from the per-user cache; the session is not shared
+            # across the concurrent generations below
+            prompts = [
+                (user_id, (await self.ai_context_service.get_user_context(db, user_id))[0])
+                for user_id in user_ids
+            ]
+            results = await asyncio.gather(*[
+                self._generate(semaphore, user_id, system_prompt) for user_id, system_prompt in prompts
+            ])
+
+            rows = [
+                {
+                    "user_id": user_id,
+                    "message": message,
+                    "message_type": self.message_type,
+                    "scheduled_for": day,
+                    "is_read": False
+                }
+                for user_id, message in results if message
+            ]
+            stats["failed"] += len(results) - len(rows)
+            if rows:
+                await db.execute(self._insert_ignoring_duplicates(db), rows)
+                await db.commit()
+                stats["generated"] += len(rows)
+
+        logger.info(
+            f"📬 Daily messages for {day}: {stats['generated']} generated, "
+            f"{stats['failed']} failed in {time.time() - start_time:.1f}s"
+        )
+        return stats
+
+    async def _generate(self, semaphore: asyncio.Semaphore, user_id, system_prompt: str) -> Tuple[object, Optional[str]]:
+        async with semaphore:
+            try:
+                return user_id, await self.ollama_service.generate_daily_message(system_prompt, self.message_type)
+            except Exception as e:
+                # Left without a row, so the next run picks the user up again
+                logger.warning(f"⚠️ Daily message for user {user_id} failed: {e}")
+                return user_id, None
+
+    def _insert_ignoring_duplicates(self, db: AsyncSession):
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            return postgresql.insert(DailyMessage).on_conflict_do_nothing(
+                index_elements=["user_id", "scheduled_for"]
+            )
+        if dialect == "sqlite":
+            return sqlite.insert(DailyMessage).on_conflict_do_nothing(
+                index_elements=["user_id", "scheduled_for"]
+            )
+        return insert(DailyMessage)
+
+    async def get_daily_message(self, db: AsyncSession, user_id, day: date) -> Optional[DailyMessage]:
+        """The user's message for ``day`` (index lookup on user_id, scheduled_for)"""
+        result = await db.execute(
+            select(DailyMessage).where(
+                DailyMessage.user_id == user_id,
+                DailyMessage.scheduled_for == day
+            )
+        )
+        return result.scalars().first()
+
+
+class DailyMessageScheduler:
+    """Runs the daily-message batch once a day at ``DAILY_MESSAGE_BATCH_HOUR`` (UTC)
+
+    Every API worker runs a scheduler, so each day's batch is claimed
+    through the job queue's dedup keys (``SET NX EX`` on Redis) and only
+    the first worker to wake up generates messages.
+    """
+
+    def __init__(self, service: DailyMessageService):
+        self.service = service
+        self.lock_ttl = 24 * 3600  # Outlasts the batch; the key is per day anyway
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def seconds_until_next_run(self, now: datetime) -> float:
+        next_run = now.replace(hour=settings.DAILY_MESSAGE_BATCH_HOUR, minute=0, second=0, microsecond=0)
+        if next_run <= now:
+            next_run += timedelta(days=1)
+        return (next_run - now).total_seconds()
+
+    async def _claim(self, day: date) -> bool:
+        """Whether this worker gets to run the batch for ``day``"""
+        if jobs.job_queue is None:
+            return True
+        try:
+            return await jobs.job_queue.claim(f"daily_messages:{day.isoformat()}", self.lock_ttl)
+        except Exception as e:
+            # Re-running is safe (existing messages are skipped), just costlier
+            logger.warning(f"⚠️ Could not lock daily message batch: {e} (running anyway)")
+            return True
+
+    async def run_once(self, day: date, session_factory=None) -> Optional[Dict[str, int]]:
+        """Run the batch for ``day`` unless another worker already has"""
+        if not await self._claim(day):
+            logger.info(f"📬 Daily messages for {day} already handled by another worker")
+            return None
+        async with (session_factory or connection.AsyncSessionLocal)() as db:
+            return await self.service.generate_for_day(db, day)
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.seconds_until_next_run(datetime.utcnow()))
+            try:
+                await self.run_once(datetime.utcnow().date())
+            except Exception as e:
+                logger.error(f"❌ Daily message batch failed: {e}")
+
+
+daily_message_service = DailyMessageService()
+daily_message_scheduler = DailyMessageScheduler(daily_message_service)
@@ -0,0 +1,174 @@
+"""
+Pool of Ollama instances with load-aware, conversation-sticky routing
+"""
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set
+
+import httpx
+
+from app.core.cache import LRUCache
+from app.core.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def create_backend_breaker(url: str) -> CircuitBreaker:
+    """Circuit breaker for one Ollama instance, configured from settings"""
+    return CircuitBreaker(
+        f"ollama@{url}",
+        failure_rate=settings.OLLAMA_BREAKER_FAILURE_RATE,
+        slow_call_seconds=settings.OLLAMA_BREAKER_SLOW_CALL_SECONDS,
+        slow_call_rate=settings.OLLAMA_BREAKER_SLOW_CALL_RATE,
+        window=settings.OLLAMA_BREAKER_WINDOW,
+        min_calls=settings.OLLAMA_BREAKER_MIN_CALLS,
+        open_seconds=settings.OLLAMA_BREAKER_OPEN_SECONDS,
+        probe_failures=settings.OLLAMA_BREAKER_PROBE_FAILURES
+    )
+
+
+class OllamaBackend:
+    """One Ollama instance: its URL, load, loaded models and circuit breaker"""
+
+    def __init__(self, url: str, breaker: CircuitBreaker):
+        self.url = url.rstrip("/")
+        self.breaker = breaker
+        self.outstanding = 0  # Requests currently in flight
+        self.requests = 0
+        self.loaded_models: Set[str] = set()  # From /api/ps
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "loaded_models": sorted(self.loaded_models),
+            "circuit_breaker": self.breaker.stats()
+        }
+
+
+class OllamaPool:
+    """Routes each Ollama call to one of several instances
+
+    An instance is ejected while its circuit breaker is open; breakers are fed
+    by call outcomes and by the periodic ``/api/ps`` refresh. Among the rest,
+    a conversation sticks to the instance that served it last (its KV cache
+    lives there). Other calls go to the least busy instance that already has
+    the model loaded, spilling to instances without it only once those are
+    saturated (``max_outstanding`` each), since loading a model takes far
+    longer than queueing behind one generation.
+
+    Not thread-safe; meant to be used from the event loop.
+    """
+
+    def __init__(
+        self,
+        urls: List[str],
+        max_outstanding: int = 2,
+        breaker_factory: Callable[[str], CircuitBreaker] = create_backend_breaker,
+        sticky_cache_name: str = "ollama_sticky_routes"
+    ):
+        if not urls:
+            raise ValueError("OllamaPool needs at least one URL")
+        self.backends = [OllamaBackend(url, breaker_factory(url)) for url in urls]
+        self.max_outstanding = max_outstanding
+        self.sticky_routes = LRUCache(
+            sticky_cache_name,
+            max_size=settings.OLLAMA_CONTEXT_CACHE_SIZE,
+            ttl=settings.OLLAMA_CONTEXT_TTL
+        )
+        self.short_circuited = 0
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def _available(self) -> List[OllamaBackend]:
+        return [backend for backend in self.backends if backend.breaker.available()]
+
+    def check(self):
+        """Fail fast if every instance is ejected"""
+        if not self._available():
+            self.short_circuited += 1
+            raise CircuitOpenError("All Ollama instances are unavailable")
+
+    def has_available(self) -> bool:
+        return bool(self._available())
+
+    def choose(self, model: str, sticky_key: Optional[Hashable] = None) -> OllamaBackend:
+        """Pick the instance for one call and reserve it with its breaker"""
+        available = self._available()
+        if not available:
+            self.short_circuited += 1
+            raise CircuitOpenError("All Ollama instances are unavailable")
+
+        backend = None
+        if sticky_key is not None:
+            sticky_url = self.sticky_routes.get(sticky_key)
+            backend = next((b for b in available if b.url == sticky_url), None)
+
+        if backend is None:
+            warm = [b for b in available if model in b.loaded_models]
+            if not warm or all(b.outstanding >= self.max_outstanding for b in warm):
+                warm = available
+            backend = min(warm, key=lambda b: (b.outstanding, b.requests))
+
+        backend.breaker.before_call()
+        if sticky_key is not None:
+            self.sticky_routes.set(sticky_key, backend.url)
+        return backend
+
+    @asynccontextmanager
+    async def lease(self, backend: OllamaBackend):
+        """Count a request as outstanding on ``backend`` while it runs"""
+        backend.outstanding += 1
+        backend.requests += 1
+        try:
+            yield backend
+        finally:
+            backend.outstanding -= 1
+
+    async def refresh(self, client: httpx.AsyncClient, timeout: float = 5.0):
+        """Poll every instance's /api/ps for loaded models; doubles as a health probe"""
+        await asyncio.gather(*[self._refresh_backend(client, backend, timeout) for backend in self.backends])
+
+    async def _refresh_backend(self, client: httpx.AsyncClient, backend: OllamaBackend, timeout: float):
+        try:
+            response = await client.get(f"{backend.url}/api/ps", timeout=timeout)
+            if response.status_code != 200:
+                raise Exception(f"/api/ps returned {response.status_code}")
+            models = response.json().get("models", [])
+            backend.loaded_models = {
+                name for model in models for name in (model.get("name"), model.get("model")) if name
+            }
+            backend.breaker.record_probe(True)
+        except Exception as e:
+            backend.loaded_models = set()
+            backend.breaker.record_probe(False, f"Probe failed: {e}")
+
+    def start(self, get_client: Callable[[], httpx.AsyncClient], interval: float):
+        """Refresh the pool in the background every ``interval`` seconds"""
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop(get_client, interval))
+
+    async def stop(self):
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            await asyncio.gather(self._refresh_task, return_exceptions=True)
+            self._refresh_task = None
+
+    async def _refresh_loop(self, get_client: Callable[[], httpx.AsyncClient], interval: float):
+        while True:
+            try:
+                await self.refresh(get_client())
+            except Exception as e:
+                logger.warning(f"⚠️ Ollama pool refresh failed: {e}")
+            await asyncio.sleep(interval)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backends": [backend.stats() for backend in self.backends],
+            "available": len(self._available()),
+            "short_circuited": self.short_circuited,
+            "sticky_routes": self.sticky_routes.stats()
+        }
@@ -2,22 +2,108 @@ import httpx
 import json
 import time
 import asyncio
-from typing import Dict, List, Optional, Any
-from datetime import datetime
+import hashlib
+from array import array
+from typing import AsyncIterator, Dict, List, Optional, Any, Tuple
 
-from app.schemas.chat import AIGenerationRequest, AIGenerationResponse
-from app.core.exceptions import ValidationError
+from app.core.config import settings
+from app.core.cache import LRUCache
+from app.core.admission import AdmissionController
+from app.core.circuit_breaker import CircuitOpenError
+from app.core.singleflight import SingleFlight
+from app.services.ollama_pool import OllamaBackend, OllamaPool
+from app.services.token_budget import token_budget
+from app.schemas.chat import AIGenerationRequest, AIGenerationResponse, AIStreamChunk
+from app.core.exceptions import TooManyRequestsError
+
+# Shared HTTP client, owned by the application lifespan
+ollama_client: Optional[httpx.AsyncClient] = None
+
+# Caps generations in flight across the pool (OLLAMA_MAX_CONCURRENT per
+# instance) and queues the rest fairly per user; summaries and daily messages
+# share one lane
+ollama_admission = AdmissionController(
+    "ollama",
+    max_concurrent=settings.OLLAMA_MAX_CONCURRENT * len(settings.ollama_base_urls),
+    max_per_key=settings.OLLAMA_MAX_PER_USER,
+    max_queue=settings.OLLAMA_MAX_QUEUE,
+    max_queue_per_key=settings.OLLAMA_MAX_QUEUE_PER_USER,
+    max_wait=settings.OLLAMA_QUEUE_TIMEOUT
+)
+BACKGROUND_LANE = "background"
+
+# Every configured Ollama instance; each has its own circuit breaker, so a
+# failing instance is ejected while the others keep serving
+ollama_pool = OllamaPool(
+    settings.ollama_base_urls,
+    max_outstanding=settings.OLLAMA_MAX_CONCURRENT
+)
+
+# Shares one round of health checks between concurrent probes
+ollama_health_flight = SingleFlight("ollama_health", ttl=settings.HEALTH_CHECK_CACHE_TTL)
+
+# Ollama's returned `context` tokens per conversation, so follow-up turns only
+# send (and the model only evaluates) the new message. Stored as int arrays
+# to keep a few thousand tokens per conversation compact.
+conversation_contexts = LRUCache(
+    "ollama_context",
+    max_size=settings.OLLAMA_CONTEXT_CACHE_SIZE,
+    ttl=settings.OLLAMA_CONTEXT_TTL
+)
+
+
+def create_ollama_client() -> httpx.AsyncClient:
+    """Create a pooled keep-alive HTTP client configured from settings"""
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.OLLAMA_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.OLLAMA_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.OLLAMA_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(
+            connect=settings.OLLAMA_CONNECT_TIMEOUT,
+            read=settings.OLLAMA_READ_TIMEOUT,
+            write=settings.OLLAMA_WRITE_TIMEOUT,
+            pool=settings.OLLAMA_POOL_TIMEOUT,
+        ),
+        http2=settings.OLLAMA_HTTP2,
+        headers={"Content-Type": "application/json"},
+    )
+
+
+async def init_ollama_client():
+    """Create the shared Ollama HTTP client"""
+    global ollama_client
+    if ollama_client is None:
+        ollama_client = create_ollama_client()
+
+
+async def close_ollama_client():
+    """Close the shared Ollama HTTP client and its pooled connections"""
+    global ollama_client
+    if ollama_client is not None:
+        await ollama_client.aclose()
+        ollama_client = None
+
+
+def get_ollama_client() -> httpx.AsyncClient:
+    """Get the shared Ollama HTTP client, creating it outside the app lifespan if needed"""
+    global ollama_client
+    if ollama_client is None:
+        ollama_client = create_ollama_client()
+    return ollama_client
 
 
 class OllamaService:
     """Service for integrating with local Ollama server for AI response generation"""
     
     def __init__(self):
-        self.base_url = "http://localhost:11434"  # Default Ollama server
+        self.pool = ollama_pool  # Shared, so load and stickiness are tracked across services
         self.model_name = "mistral:7b"  # Using Mistral model
         self.max_retries = 3
-        self.timeout = 120  # 2 minutes timeout for generation
+        self.timeout = settings.OLLAMA_READ_TIMEOUT  # Timeout for generation
         self.max_context_length = 4096  # Max tokens for context
+        self.prompt_overhead_tokens = 32  # Section tags and the model's chat template
         
         # Response generation settings
         self.generation_params = {
@@ -29,119 +115,470 @@ class OllamaService:
             "stop": ["Human:", "User:", "<|endoftext|>"]
         }
     
+    @property
+    def base_url(self) -> str:
+        """URL of the first Ollama instance in the pool"""
+        return self.pool.backends[0].url
+    
+    @base_url.setter
+    def base_url(self, url: str):
+        self.pool = OllamaPool([url], max_outstanding=settings.OLLAMA_MAX_CONCURRENT)
+    
     async def generate_response(self, request: AIGenerationRequest) -> AIGenerationResponse:
         """Generate AI response using Ollama"""
         start_time = time.time()
         
         try:
-            # Format the conversation for Ollama
-            formatted_prompt = self._format_conversation_prompt(
-                system_prompt=request.system_prompt,
-                conversation_history=request.conversation_history,
-                user_message=request.user_message,
-                user_context=request.user_context
-            )
+            # Format the conversation for Ollama, reusing the saved context when valid
+            formatted_prompt, context = self._prepare_prompt(request)
             
-            # Generate response
-            response_content = await self._call_ollama(formatted_prompt)
+            # Generate response once admitted; fail fast while the breaker is open
+            self.pool.check()
+            async with ollama_admission.slot(self._admission_key(request)):
+                result = await self._call_ollama(formatted_prompt, context, sticky_key=request.conversation_id)
+            response_content = result.get("response", "")
+            self._save_context(request, result)
             
             # Calculate generation time
             generation_time = int((time.time() - start_time) * 1000)
             
-            # Estimate token count (rough approximation)
-            token_count = self._estimate_token_count(response_content)
+            # Exact counts from Ollama where reported
+            token_count, prompt_token_count = self._token_counts(request, response_content, result, context)
             
             return AIGenerationResponse(
                 content=response_content.strip(),
                 token_count=token_count,
+                prompt_token_count=prompt_token_count,
                 model_used=self.model_name,
                 generation_time_ms=generation_time,
                 metadata={
                     "temperature": self.generation_params["temperature"],
-                    "max_tokens": self.generation_params["max_tokens"]
+                    "max_tokens": self.generation_params["max_tokens"],
+                    **self._eval_metadata(result, context)
                 }
             )
             
+        except TooManyRequestsError as e:
+            if settings.OLLAMA_QUEUE_OVERFLOW != "fallback":
+                raise
+            return self._fallback_response(request, start_time, e)
+        
         except Exception as e:
-            # Handle errors gracefully with fallback response
-            fallback_response = self._get_fallback_response(request.user_message)
+            return self._fallback_response(request, start_time, e)
+    
+    def _fallback_response(self, request: AIGenerationRequest, start_time: float, error: Exception) -> AIGenerationResponse:
+        """Handle errors gracefully with a fallback response"""
+        fallback_response = self._get_fallback_response(request.user_message)
+        
+        return AIGenerationResponse(
+            content=fallback_response,
+            token_count=self._estimate_token_count(fallback_response),
+            model_used="fallback",
+            generation_time_ms=int((time.time() - start_time) * 1000),
+            metadata={"error": str(error), "fallback_used": True}
+        )
+    
+    async def stream_response(self, request: AIGenerationRequest) -> AsyncIterator[AIStreamChunk]:
+        """Generate AI response token by token using Ollama's streaming API
+        
+        Yields ``queue_position`` chunks while waiting for a generation slot,
+        then one chunk per partial token and a final chunk (``done=True``)
+        carrying the assembled ``AIGenerationResponse``. Raises
+        ``TooManyRequestsError`` if the wait is over budget, unless
+        ``OLLAMA_QUEUE_OVERFLOW`` is "fallback".
+        """
+        start_time = time.time()
+        formatted_prompt, context = self._prepare_prompt(request)
+        
+        # Skip straight to the fallback while Ollama is known to be down
+        try:
+            self.pool.check()
+        except CircuitOpenError as e:
+            for fallback_chunk in self._fallback_chunks(request, start_time, e):
+                yield fallback_chunk
+            return
+        
+        # Wait for a generation slot, telling the caller where they are in line
+        admission_key = self._admission_key(request)
+        try:
+            async for position in ollama_admission.admit(admission_key):
+                yield AIStreamChunk(queue_position=position)
+        except TooManyRequestsError as e:
+            if settings.OLLAMA_QUEUE_OVERFLOW != "fallback":
+                raise
+            for fallback_chunk in self._fallback_chunks(request, start_time, e):
+                yield fallback_chunk
+            return
+        
+        try:
+            async for chunk in self._stream_admitted(request, formatted_prompt, context, start_time):
+                yield chunk
+        finally:
+            ollama_admission.release(admission_key)
+    
+    async def _stream_admitted(
+        self,
+        request: AIGenerationRequest,
+        formatted_prompt: str,
+        context: Optional[List[int]],
+        start_time: float
+    ) -> AsyncIterator[AIStreamChunk]:
+        """Body of ``stream_response`` once a generation slot is held"""
+        first_token_time = None
+        content_parts: List[str] = []
+        final_chunk: Dict[str, Any] = {}
+        
+        try:
+            async for chunk in self._stream_ollama(formatted_prompt, context, sticky_key=request.conversation_id):
+                if chunk.get("done"):
+                    final_chunk = chunk
+                    continue
+                token = chunk.get("response", "")
+                if not token:
+                    continue
+                if first_token_time is None:
+                    first_token_time = time.time()
+                content_parts.append(token)
+                yield AIStreamChunk(delta=token)
             
-            return AIGenerationResponse(
-                content=fallback_response,
-                token_count=self._estimate_token_count(fallback_response),
-                model_used="fallback",
-                generation_time_ms=int((time.time() - start_time) * 1000),
-                metadata={"error": str(e), "fallback_used": True}
+        except Exception as e:
+            if not content_parts:
+                # Nothing reached the client yet, so fall back like generate_response
+                for fallback_chunk in self._fallback_chunks(request, start_time, e):
+                    yield fallback_chunk
+                return
+        
+            # Stream broke mid-way: keep what was generated and flag it
+            response_content = "".join(content_parts)
+            yield AIStreamChunk(
+                done=True,
+                response=self._build_stream_response(
+                    response_content, start_time, first_token_time,
+                    extra_metadata={"error": str(e), "truncated": True}
+                )
+            )
+            return
+    
+        self._save_context(request, final_chunk)
+        response_content = "".join(content_parts)
+        yield AIStreamChunk(
+            done=True,
+            response=self._build_stream_response(
+                response_content, start_time, first_token_time,
+                extra_metadata=self._eval_metadata(final_chunk, context),
+                token_counts=self._token_counts(request, response_content, final_chunk, context)
             )
+        )
+    
+    def _fallback_chunks(self, request: AIGenerationRequest, start_time: float, error: Exception) -> List[AIStreamChunk]:
+        """The whole fallback reply as one delta plus the final chunk"""
+        response = self._fallback_response(request, start_time, error)
+        response.time_to_first_token_ms = response.generation_time_ms
+        return [AIStreamChunk(delta=response.content), AIStreamChunk(done=True, response=response)]
+    
+    def _admission_key(self, request: AIGenerationRequest) -> str:
+        """Fair-queueing key: the requesting user, or the shared background lane"""
+        return request.user_id or BACKGROUND_LANE
+    
+    def _build_stream_response(
+        self,
+        response_content: str,
+        start_time: float,
+        first_token_time: Optional[float],
+        extra_metadata: Optional[Dict[str, Any]] = None,
+        token_counts: Optional[Tuple[int, Optional[int]]] = None
+    ) -> AIGenerationResponse:
+        """Assemble the final response for a completed stream"""
+        token_count, prompt_token_count = token_counts or (self._estimate_token_count(response_content), None)
+        time_to_first_token = (
+            int((first_token_time - start_time) * 1000) if first_token_time else None
+        )
+        metadata = {
+            "temperature": self.generation_params["temperature"],
+            "max_tokens": self.generation_params["max_tokens"],
+            "streamed": True,
+            "time_to_first_token_ms": time_to_first_token
+        }
+        if extra_metadata:
+            metadata.update(extra_metadata)
+        
+        return AIGenerationResponse(
+            content=response_content.strip(),
+            token_count=token_count,
+            prompt_token_count=prompt_token_count,
+            model_used=self.model_name,
+            generation_time_ms=int((time.time() - start_time) * 1000),
+            time_to_first_token_ms=time_to_first_token,
+            metadata=metadata
+        )
     
-    async def _call_ollama(self, prompt: str) -> str:
-        """Make API call to Ollama server"""
+    def _build_payload(self, prompt: str, stream: bool, context: Optional[List[int]] = None) -> Dict[str, Any]:
+        """Build the /api/generate request body"""
         payload = {
             "model": self.model_name,
             "prompt": prompt,
-            "stream": False,
+            "stream": stream,
+            "keep_alive": settings.OLLAMA_KEEP_ALIVE,  # Keep the model (and its KV cache) loaded between turns
             "options": {
                 "temperature": self.generation_params["temperature"],
                 "top_p": self.generation_params["top_p"],
                 "top_k": self.generation_params["top_k"],
                 "repeat_penalty": self.generation_params["repeat_penalty"],
-                "stop": self.generation_params["stop"]
+                "stop": self.generation_params["stop"],
+                "num_ctx": self.max_context_length  # The window the history budget is computed for
             }
         }
+        if context:
+            payload["context"] = context
+        return payload
+    
+    def _context_version(self, request: AIGenerationRequest) -> Optional[Tuple[str, int]]:
+        """What a saved context must match to be reused: the system prompt and stored history length"""
+        if not settings.OLLAMA_REUSE_CONTEXT or not request.conversation_id or request.history_length is None:
+            return None
+        prompt_hash = hashlib.sha1(request.system_prompt.encode()).hexdigest()
+        return prompt_hash, request.history_length
+    
+    def _prepare_prompt(self, request: AIGenerationRequest) -> Tuple[str, Optional[List[int]]]:
+        """Prompt and optional context for a turn
+        
+        When the conversation's previous turn left a matching context, only the
+        new message is sent; otherwise the full prompt (stable system prompt
+        prefix + recent history) is rebuilt. A context with no room left for
+        the new message and a full reply is dropped instead of letting Ollama
+        shift the oldest tokens out mid-conversation.
+        """
+        version = self._context_version(request)
+        if version is not None:
+            saved = conversation_contexts.get(request.conversation_id, version=version)
+            if saved is not None:
+                turn_prompt = self._format_turn_prompt(request.user_message)
+                if self._fits_window(len(saved), self._estimate_token_count(turn_prompt)):
+                    return turn_prompt, saved.tolist()
+                conversation_contexts.invalidate(request.conversation_id)
+        
+        formatted_prompt = self._format_conversation_prompt(
+            system_prompt=request.system_prompt,
+            conversation_history=request.conversation_history,
+            user_message=request.user_message,
+            user_context=request.user_context,
+            conversation_summary=request.conversation_summary
+        )
+        return formatted_prompt, None
+    
+    def _save_context(self, request: AIGenerationRequest, result: Dict[str, Any]):
+        """Remember the context Ollama returned for the conversation's next turn"""
+        version = self._context_version(request)
+        context = result.get("context")
+        if version is None or not context:
+            return
+        
+        if not self._fits_window(len(context), self.prompt_overhead_tokens):
+            # Even a short follow-up would overflow the window; start fresh next turn
+            conversation_contexts.invalidate(request.conversation_id)
+            return
+        
+        prompt_hash, history_length = version
+        # The next turn's history will include this user message and the reply
+        conversation_contexts.set(
+            request.conversation_id, array("i", context), version=(prompt_hash, history_length + 2)
+        )
+    
+    def _fits_window(self, context_tokens: int, prompt_tokens: int) -> bool:
+        """Whether a saved context plus the next prompt and a full reply fit in num_ctx"""
+        reply_tokens = self.generation_params["max_tokens"]
+        return context_tokens + prompt_tokens + reply_tokens <= self.max_context_length
+    
+    def _token_counts(
+        self,
+        request: AIGenerationRequest,
+        response_content: str,
+        result: Dict[str, Any],
+        context: Optional[List[int]]
+    ) -> Tuple[int, Optional[int]]:
+        """Token counts for the reply and the user's turn, calibrating the estimator
+        
+        ``eval_count`` is exact for the reply. ``prompt_eval_count`` is only
+        exact for the user's turn when it was sent on top of a saved context
+        that Ollama still had cached, so it is kept only when it matches the
+        estimate for the turn prompt; otherwise it covers the whole prompt
+        (or just its uncached suffix) and the estimate is stored instead.
+        """
+        eval_count = result.get("eval_count")
+        token_budget.calibrate(response_content, eval_count)
+        token_count = eval_count or self._estimate_token_count(response_content)
+        
+        if context is not None:
+            turn_prompt = self._format_turn_prompt(request.user_message)
+            prompt_token_count = token_budget.checked_count(turn_prompt, result.get("prompt_eval_count"))
+        else:
+            prompt_token_count = self._estimate_token_count(request.user_message)
+        return token_count, prompt_token_count
+    
+    def _eval_metadata(self, result: Dict[str, Any], context: Optional[List[int]]) -> Dict[str, Any]:
+        """Per-turn prompt evaluation stats reported by Ollama"""
+        return {
+            "context_reused": context is not None,
+            "prompt_eval_count": result.get("prompt_eval_count"),
+            "eval_count": result.get("eval_count")
+        }
+    
+    async def _call_ollama(
+        self,
+        prompt: str,
+        context: Optional[List[int]] = None,
+        sticky_key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Make API call to Ollama server, returning the decoded response body
+        
+        Each attempt goes to the instance the pool picks (the conversation's
+        instance for ``sticky_key``), so a retry can fail over to another one.
+        """
+        payload = self._build_payload(prompt, stream=False, context=context)
         
         last_error = None
         
         for attempt in range(self.max_retries):
+            backend = self.pool.choose(self.model_name, sticky_key)  # Raises CircuitOpenError if all are down
+            call_start = time.monotonic()
             try:
-                async with httpx.AsyncClient(timeout=self.timeout) as client:
-                    response = await client.post(
-                        f"{self.base_url}/api/generate",
-                        json=payload,
-                        headers={"Content-Type": "application/json"}
+                async with self.pool.lease(backend):
+                    response = await get_ollama_client().post(
+                        f"{backend.url}/api/generate",
+                        json=payload
                     )
+                
+                if response.status_code == 200:
+                    backend.breaker.record_success(time.monotonic() - call_start)
+                    return response.json()
+                else:
+                    last_error = f"Ollama server error: {response.status_code} - {response.text}"
                     
-                    if response.status_code == 200:
-                        result = response.json()
-                        return result.get("response", "").strip()
-                    else:
-                        last_error = f"Ollama server error: {response.status_code} - {response.text}"
-                        
             except httpx.TimeoutException:
                 last_error = "Request to Ollama timed out"
             except httpx.ConnectError:
                 last_error = "Could not connect to Ollama server. Make sure Ollama is running."
             except Exception as e:
                 last_error = f"Unexpected error: {str(e)}"
+            backend.breaker.record_failure(last_error)
             
-            # Wait before retry (exponential backoff)
-            if attempt < self.max_retries - 1:
+            # Wait before retry (exponential backoff), unless every instance has been ejected
+            if attempt < self.max_retries - 1 and self.pool.has_available():
                 await asyncio.sleep(2 ** attempt)
+            else:
+                break
         
         # If all retries failed, raise the last error
         raise Exception(last_error)
     
+    async def _stream_ollama(
+        self,
+        prompt: str,
+        context: Optional[List[int]] = None,
+        sticky_key: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream decoded chunks from Ollama's NDJSON /api/generate endpoint
+        
+        Yields every chunk, ending with the ``done`` chunk that carries the
+        eval counts and context. Retries only happen before the first token
+        has been received; once output has started, errors are raised to the
+        caller.
+        """
+        payload = self._build_payload(prompt, stream=True, context=context)
+        
+        last_error = None
+        
+        for attempt in range(self.max_retries):
+            backend = self.pool.choose(self.model_name, sticky_key)  # Raises CircuitOpenError if all are down
+            call_start = time.monotonic()
+            received_any = False
+            try:
+                async with self.pool.lease(backend), get_ollama_client().stream(
+                    "POST",
+                    f"{backend.url}/api/generate",
+                    json=payload
+                ) as response:
+                    if response.status_code != 200:
+                        body = await response.aread()
+                        last_error = f"Ollama server error: {response.status_code} - {body.decode(errors='replace')}"
+                    else:
+                        async for line in response.aiter_lines():
+                            if not line.strip():
+                                continue
+                            chunk = json.loads(line)
+                            if chunk.get("error"):
+                                raise Exception(f"Ollama stream error: {chunk['error']}")
+                            if not received_any and (chunk.get("response") or chunk.get("done")):
+                                # Latency for the breaker is time to first token
+                                received_any = True
+                                backend.breaker.record_success(time.monotonic() - call_start)
+                            yield chunk
+                            if chunk.get("done"):
+                                return
+                        return
+                        
+            except httpx.TimeoutException as e:
+                if received_any:
+                    backend.breaker.record_failure(f"Stream timed out: {e}")
+                    raise
+                last_error = "Request to Ollama timed out"
+            except httpx.ConnectError:
+                last_error = "Could not connect to Ollama server. Make sure Ollama is running."
+            except Exception as e:
+                if received_any:
+                    backend.breaker.record_failure(f"Stream failed: {e}")
+                    raise
+                last_error = f"Unexpected error: {str(e)}"
+            backend.breaker.record_failure(last_error)
+            
+            # Wait before retry (exponential backoff), unless every instance has been ejected
+            if attempt < self.max_retries - 1 and self.pool.has_available():
+                await asyncio.sleep(2 ** attempt)
+            else:
+                break
+        
+        raise Exception(last_error)
+    
     def _format_conversation_prompt(
         self, 
         system_prompt: str, 
-        conversation_history: List[Dict[str, str]], 
+        conversation_history: List[Dict[str, Any]], 
         user_message: str,
-        user_context: Dict[str, Any]
+        user_context: Dict[str, Any],
+        conversation_summary: Optional[str] = None
     ) -> str:
-        """Format the conversation for Ollama input"""
+        """Format the conversation for Ollama input
         
-        # Start with system prompt
-        prompt_parts = [
-            f"<SYSTEM>\n{system_prompt}\n</SYSTEM>",
-            ""
-        ]
+        The system prompt, summary of earlier turns and current message always
+        go in; recent history is filled from newest to oldest with whatever
+        fits in the remaining token budget.
+        """
+        
+        # Start with system prompt, then what happened earlier in the conversation
+        system_block = f"<SYSTEM>\n{system_prompt}\n</SYSTEM>"
+        if conversation_summary:
+            system_block += f"\n\n<CONVERSATION_SUMMARY>\n{conversation_summary}\n</CONVERSATION_SUMMARY>"
+        current_block = "\n".join([
+            "<CURRENT_INTERACTION>",
+            f"Human: {user_message}",
+            "Future Self:"
+        ])
         
-        # Add conversation history (last few messages for context)
-        if conversation_history:
+        history_budget = (
+            self.max_context_length
+            - self.generation_params["max_tokens"]  # Leave room for the reply
+            - self._estimate_token_count(system_block)
+            - self._estimate_token_count(current_block)
+            - self.prompt_overhead_tokens
+        )
+        recent_history = token_budget.fit_history(conversation_history or [], max(0, history_budget))
+        
+        prompt_parts = [system_block, ""]
+        
+        # Add conversation history that fits the context window
+        if recent_history:
             prompt_parts.append("<CONVERSATION_HISTORY>")
             
-            # Only include recent messages to stay within context limits
-            recent_history = conversation_history[-6:]  # Last 6 messages
-            
             for msg in recent_history:
                 role = msg.get("role", "")
                 content = msg.get("content", "")
@@ -154,32 +591,65 @@ class OllamaService:
             prompt_parts.extend(["</CONVERSATION_HISTORY>", ""])
         
         # Add current user message
-        prompt_parts.extend([
-            "<CURRENT_INTERACTION>",
+        prompt_parts.append(current_block)
+        
+        return "\n".join(prompt_parts)
+    
+    async def summarize(self, previous_summary: Optional[str], transcript: List[Dict[str, str]]) -> str:
+        """Fold a slice of conversation into the running summary"""
+        lines = []
+        for msg in transcript:
+            speaker = "Human" if msg.get("role") == "user" else "Future Self"
+            lines.append(f"{speaker}: {msg.get('content', '')}")
+        
+        prompt = "\n".join([
+            "You maintain a running summary of a conversation between a person (Human) and their Future Self.",
+            "Update the summary with the new messages. Keep names, goals, feelings, decisions and open",
+            "threads; drop small talk. Write at most 150 words in third person. Reply with the summary only.",
+            "",
+            "<CURRENT_SUMMARY>",
+            previous_summary or "(none yet)",
+            "</CURRENT_SUMMARY>",
+            "",
+            "<NEW_MESSAGES>",
+            *lines,
+            "</NEW_MESSAGES>",
+            "",
+            "Updated summary:"
+        ])
+        self.pool.check()
+        async with ollama_admission.slot(BACKGROUND_LANE):
+            result = await self._call_ollama(prompt)
+        return result.get("response", "")
+    
+    async def generate_daily_message(self, system_prompt: str, message_type: str = "motivational") -> str:
+        """Write a short daily message from the user's Future Self; raises if Ollama is unavailable"""
+        prompt = "\n".join([
+            "<SYSTEM>",
+            system_prompt,
+            "</SYSTEM>",
+            "",
+            f"Write today's {message_type.replace('_', ' ')} message to them, as their Future Self.",
+            "Two to four sentences, warm and specific to what you know about them. Reply with the message only.",
+            "",
+            "Future Self:"
+        ])
+        self.pool.check()
+        async with ollama_admission.slot(BACKGROUND_LANE):
+            result = await self._call_ollama(prompt)
+        return result.get("response", "").strip()
+    
+    def _format_turn_prompt(self, user_message: str) -> str:
+        """Prompt for a follow-up turn whose earlier conversation is in the saved context"""
+        return "\n".join([
+            "",
             f"Human: {user_message}",
             "Future Self:"
         ])
-        
-        full_prompt = "\n".join(prompt_parts)
-        
-        # Ensure we don't exceed context length
-        if len(full_prompt) > self.max_context_length * 3:  # Rough character limit
-            # Truncate conversation history if needed
-            truncated_prompt = "\n".join([
-                f"<SYSTEM>\n{system_prompt}\n</SYSTEM>",
-                "",
-                "<CURRENT_INTERACTION>",
-                f"Human: {user_message}",
-                "Future Self:"
-            ])
-            return truncated_prompt
-        
-        return full_prompt
     
     def _estimate_token_count(self, text: str) -> int:
-        """Rough estimation of token count (approximate 1.3 tokens per word)"""
-        words = len(text.split())
-        return int(words * 1.3)
+        """Estimated token count, using the ratio calibrated from Ollama's exact counts"""
+        return token_budget.count(text)
     
     def _get_fallback_response(self, user_message: str) -> str:
         """Generate a fallback response when AI service is unavailable"""
@@ -196,75 +666,97 @@ class OllamaService:
         ]
         
         # Simple hash to consistently choose a fallback based on message
-        import hashlib
         message_hash = int(hashlib.md5(user_message.encode()).hexdigest()[:8], 16)
         return fallback_responses[message_hash % len(fallback_responses)]
     
     async def check_ollama_health(self) -> Dict[str, Any]:
-        """Check if Ollama server is running and accessible"""
+        """Check every Ollama instance in the pool; healthy if any of them is
+        
+        Concurrent checks (e.g. load balancer probes) share one round of
+        requests, and its result is reused for ``HEALTH_CHECK_CACHE_TTL``.
+        """
+        urls = tuple(backend.url for backend in self.pool.backends)
+        health = await ollama_health_flight.do(urls, self._check_pool_health)
+        return dict(health)  # Callers may add keys; the cached result is shared
+    
+    async def _check_pool_health(self) -> Dict[str, Any]:
+        results = await asyncio.gather(*[self._check_backend_health(backend) for backend in self.pool.backends])
+        health = next((result for result in results if result["status"] == "healthy"), results[0])
+        return {**health, "backends": results}
+    
+    async def _check_backend_health(self, backend: OllamaBackend) -> Dict[str, Any]:
+        """Check one Ollama instance and feed the result into its circuit breaker"""
         try:
-            async with httpx.AsyncClient(timeout=10) as client:
-                # Check if server is running
-                response = await client.get(f"{self.base_url}/api/tags")
+            # Check if server is running
+            response = await get_ollama_client().get(
+                f"{backend.url}/api/tags",
+                timeout=10
+            )
+            
+            if response.status_code == 200:
+                backend.breaker.record_probe(True)
+                models = response.json().get("models", [])
+                has_mistral = any(self.model_name in model.get("name", "") for model in models)
+                
+                return {
+                    "status": "healthy",
+                    "url": backend.url,
+                    "server_accessible": True,
+                    "mistral_available": has_mistral,
+                    "available_models": [model.get("name") for model in models],
+                    "recommended_action": "pull_mistral" if not has_mistral else "ready"
+                }
+            else:
+                backend.breaker.record_probe(False, f"Health probe: server returned {response.status_code}")
+                return {
+                    "status": "error",
+                    "url": backend.url,
+                    "server_accessible": False,
+                    "error": f"Server returned {response.status_code}"
+                }
                 
-                if response.status_code == 200:
-                    models = response.json().get("models", [])
-                    has_mistral = any(self.model_name in model.get("name", "") for model in models)
-                    
-                    return {
-                        "status": "healthy",
-                        "server_accessible": True,
-                        "mistral_available": has_mistral,
-                        "available_models": [model.get("name") for model in models],
-                        "recommended_action": "pull_mistral" if not has_mistral else "ready"
-                    }
-                else:
-                    return {
-                        "status": "error",
-                        "server_accessible": False,
-                        "error": f"Server returned {response.status_code}"
-                    }
-                    
         except httpx.ConnectError:
+            backend.breaker.record_probe(False, "Health probe: could not connect")
             return {
                 "status": "error",
+                "url": backend.url,
                 "server_accessible": False,
                 "error": "Could not connect to Ollama server",
                 "recommended_action": "start_ollama"
             }
         except Exception as e:
+            backend.breaker.record_probe(False, f"Health probe: {e}")
             return {
                 "status": "error",
+                "url": backend.url,
                 "server_accessible": False,
                 "error": str(e)
             }
     
     async def pull_mistral_model(self) -> Dict[str, Any]:
-        """Pull the Mistral model if it's not available"""
-        try:
-            async with httpx.AsyncClient(timeout=300) as client:  # 5 minute timeout for model pull
-                response = await client.post(
-                    f"{self.base_url}/api/pull",
+        """Pull the Mistral model on every Ollama instance"""
+        failures = []
+        for backend in self.pool.backends:
+            try:
+                response = await get_ollama_client().post(
+                    f"{backend.url}/api/pull",
                     json={"name": self.model_name},
-                    headers={"Content-Type": "application/json"}
+                    timeout=httpx.Timeout(300, connect=settings.OLLAMA_CONNECT_TIMEOUT)  # 5 minute timeout for model pull
                 )
-                
-                if response.status_code == 200:
-                    return {
-                        "status": "success",
-                        "message": f"Successfully pulled {self.model_name}"
-                    }
-                else:
-                    return {
-                        "status": "error",
-                        "message": f"Failed to pull model: {response.text}"
-                    }
-                    
-        except Exception as e:
+                if response.status_code != 200:
+                    failures.append(f"{backend.url}: {response.text}")
+            except Exception as e:
+                failures.append(f"{backend.url}: {str(e)}")
+        
+        if failures:
             return {
                 "status": "error",
-                "message": f"Error pulling model: {str(e)}"
+                "message": f"Failed to pull model: {'; '.join(failures)}"
             }
+        return {
+            "status": "success",
+            "message": f"Successfully pulled {self.model_name}"
+        }
     
     def update_generation_params(self, **kwargs):
         """Update generation parameters"""
@@ -277,7 +769,9 @@ class OllamaService:
         return {
             "model_name": self.model_name,
             "base_url": self.base_url,
+            "base_urls": [backend.url for backend in self.pool.backends],
             "generation_params": self.generation_params,
             "max_context_length": self.max_context_length,
-            "timeout": self.timeout
+            "timeout": self.timeout,
+            "token_budget": token_budget.stats()
         } 
\ No newline at end of file
@@ -1,4 +1,5 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 from typing import Optional, Dict, Any, List
 from datetime import datetime, date
 
@@ -13,6 +14,7 @@ from app.schemas.onboarding import (
     MessageFrequency
 )
 from app.core.exceptions import ValidationError, NotFoundError
+from app.services.ai_context_service import invalidate_user_context
 
 
 class OnboardingService:
@@ -37,11 +39,12 @@ class OnboardingService:
             6: "Additional Context"
         }
     
-    def get_or_create_onboarding(self, db: Session, user_id: str) -> OnboardingData:
+    async def get_or_create_onboarding(self, db: AsyncSession, user_id: str) -> OnboardingData:
         """Get existing onboarding data or create new record"""
-        onboarding = db.query(OnboardingData).filter(
-            OnboardingData.user_id == user_id
-        ).first()
+        result = await db.execute(
+            select(OnboardingData).where(OnboardingData.user_id == user_id)
+        )
+        onboarding = result.scalars().first()
         
         if not onboarding:
             # Create new onboarding record
@@ -51,26 +54,27 @@ class OnboardingService:
                 is_complete=False
             )
             db.add(onboarding)
-            db.commit()
-            db.refresh(onboarding)
+            await db.commit()
+            await db.refresh(onboarding)
         
         return onboarding
     
-    def start_onboarding(self, db: Session, user_id: str) -> OnboardingData:
+    async def start_onboarding(self, db: AsyncSession, user_id: str) -> OnboardingData:
         """Initialize onboarding process for user"""
         # Verify user exists
-        user = db.query(User).filter(User.id == user_id).first()
+        result = await db.execute(select(User).where(User.id == user_id))
+        user = result.scalars().first()
         if not user:
             raise NotFoundError("User not found")
         
         # Get or create onboarding record
-        onboarding = self.get_or_create_onboarding(db, user_id)
+        onboarding = await self.get_or_create_onboarding(db, user_id)
         
         return onboarding
     
-    def update_step(
+    async def update_step(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         user_id: str, 
         step_number: int, 
         step_data: Dict[str, Any]
@@ -79,7 +83,7 @@ class OnboardingService:
         if step_number not in range(1, 7):
             raise ValidationError("Step number must be between 1 and 6")
         
-        onboarding = self.get_or_create_onboarding(db, user_id)
+        onboarding = await self.get_or_create_onboarding(db, user_id)
         
         # Validate and update step data
         self._validate_step_data(step_number, step_data)
@@ -96,14 +100,15 @@ class OnboardingService:
             onboarding.is_complete = True
             onboarding.completed_at = datetime.utcnow()
         
-        db.commit()
-        db.refresh(onboarding)
+        await db.commit()
+        await db.refresh(onboarding)
+        invalidate_user_context(user_id)
         
         return onboarding
     
-    def get_progress(self, db: Session, user_id: str) -> OnboardingProgress:
+    async def get_progress(self, db: AsyncSession, user_id: str) -> OnboardingProgress:
         """Get current onboarding progress"""
-        onboarding = self.get_or_create_onboarding(db, user_id)
+        onboarding = await self.get_or_create_onboarding(db, user_id)
         
         current_step = min(onboarding.completed_steps + 1, 6)
         completion_percentage = onboarding.get_completion_percentage()
@@ -116,17 +121,17 @@ class OnboardingService:
             current_step=current_step
         )
     
-    def get_onboarding_data(self, db: Session, user_id: str) -> OnboardingDataResponse:
+    async def get_onboarding_data(self, db: AsyncSession, user_id: str) -> OnboardingDataResponse:
         """Get complete onboarding data"""
-        onboarding = self.get_or_create_onboarding(db, user_id)
+        onboarding = await self.get_or_create_onboarding(db, user_id)
         return OnboardingDataResponse.model_validate(onboarding)
     
-    def validate_step(self, db: Session, user_id: str, step_number: int) -> OnboardingStepValidation:
+    async def validate_step(self, db: AsyncSession, user_id: str, step_number: int) -> OnboardingStepValidation:
         """Validate if a specific step is complete and identify missing fields"""
         if step_number not in range(1, 7):
             raise ValidationError("Step number must be between 1 and 6")
         
-        onboarding = self.get_or_create_onboarding(db, user_id)
+        onboarding = await self.get_or_create_onboarding(db, user_id)
         
         # Check step completion
         is_complete = onboarding.is_step_complete(step_number)
@@ -148,9 +153,9 @@ class OnboardingService:
             completion_percentage=completion_percentage
         )
     
-    def complete_onboarding(self, db: Session, user_id: str) -> OnboardingData:
+    async def complete_onboarding(self, db: AsyncSession, user_id: str) -> OnboardingData:
         """Mark onboarding as complete if requirements are met"""
-        onboarding = self.get_or_create_onboarding(db, user_id)
+        onboarding = await self.get_or_create_onboarding(db, user_id)
         
         # Check if minimum requirements are met (steps 1-5)
         if onboarding.completed_steps < 5:
@@ -167,8 +172,9 @@ class OnboardingService:
         onboarding.is_complete = True
         onboarding.completed_at = datetime.utcnow()
         
-        db.commit()
-        db.refresh(onboarding)
+        await db.commit()
+        await db.refresh(onboarding)
+        invalidate_user_context(user_id)
         
         return onboarding
     
@@ -253,9 +259,9 @@ class OnboardingService:
         
         return updated_fields
     
-    def get_next_step(self, db: Session, user_id: str) -> int:
+    async def get_next_step(self, db: AsyncSession, user_id: str) -> int:
         """Get the next incomplete step number"""
-        onboarding = self.get_or_create_onboarding(db, user_id)
+        onboarding = await self.get_or_create_onboarding(db, user_id)
         
         # Check each step to find the first incomplete one
         for step in range(1, 7):
@@ -265,9 +271,9 @@ class OnboardingService:
         # All steps complete
         return 6
     
-    def get_step_summary(self, db: Session, user_id: str) -> Dict[int, Dict[str, Any]]:
+    async def get_step_summary(self, db: AsyncSession, user_id: str) -> Dict[int, Dict[str, Any]]:
         """Get summary of all steps with completion status"""
-        onboarding = self.get_or_create_onboarding(db, user_id)
+        onboarding = await self.get_or_create_onboarding(db, user_id)
         
         summary = {}
         for step in range(1, 7):
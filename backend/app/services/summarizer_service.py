@@ -0,0 +1,92 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update
+from typing import Optional
+import logging
+
+from app.jobs import enqueue_job
+from app.models.chat import Conversation, ChatMessage
+from app.services.ollama_service import OllamaService
+
+logger = logging.getLogger(__name__)
+
+
+class ConversationSummarizer:
+    """Folds older turns into ``Conversation.summary`` in the background
+
+    The summary covers the oldest ``summary_message_count`` messages of a
+    conversation (the checkpoint). Each run only summarizes the messages
+    between the checkpoint and the most recent ``keep_recent`` turns, which
+    stay verbatim in the prompt, so prompt size stays bounded no matter how
+    long the conversation gets.
+    """
+
+    def __init__(self, ollama_service: Optional[OllamaService] = None):
+        self.ollama_service = ollama_service or OllamaService()
+        self.keep_recent = 10  # Newest messages always sent verbatim
+        self.min_new_messages = 6  # Unsummarized older messages needed before a run
+        self.max_summary_chars = 2000
+
+    def pending_messages(self, conversation: Conversation) -> int:
+        """Older messages not yet folded into the summary"""
+        total = conversation.message_count or 0
+        checkpoint = conversation.summary_message_count or 0
+        return max(0, total - self.keep_recent - checkpoint)
+
+    async def schedule(self, conversation: Conversation):
+        """Queue a summarization job if enough older turns have piled up
+
+        At most one job per conversation is pending at a time; turns that
+        arrive while it waits or runs don't queue more Ollama calls.
+        """
+        if self.pending_messages(conversation) < self.min_new_messages:
+            return
+        conversation_id = str(conversation.id)
+        await enqueue_job(
+            "summarize_conversation", dedup_key=f"summarize:{conversation_id}", conversation_id=conversation_id
+        )
+
+    async def summarize_conversation(self, db: AsyncSession, conversation_id: str) -> bool:
+        """Fold the delta since the last checkpoint into the summary; returns whether it changed"""
+        result = await db.execute(select(Conversation).where(Conversation.id == conversation_id))
+        conversation = result.scalars().first()
+        if not conversation:
+            return False
+
+        checkpoint = conversation.summary_message_count or 0
+        # Duplicate jobs for the same turn find too little left to fold and stop here
+        pending = self.pending_messages(conversation)
+        if pending < self.min_new_messages:
+            return False
+
+        result = await db.execute(
+            select(ChatMessage).where(ChatMessage.conversation_id == conversation.id)
+            .order_by(ChatMessage.created_at.asc(), ChatMessage.id.asc())
+            .offset(checkpoint).limit(pending)
+        )
+        messages = result.scalars().all()
+        if not messages:
+            return False
+
+        transcript = [{"role": msg.role.value, "content": msg.content} for msg in messages]
+        summary = await self.ollama_service.summarize(conversation.summary, transcript)
+        summary = summary.strip()[:self.max_summary_chars]
+        if not summary:
+            return False
+
+        # Only advance from the checkpoint we read, in case another run got there first
+        result = await db.execute(
+            update(Conversation)
+            .where(Conversation.id == conversation.id, Conversation.summary_message_count == checkpoint)
+            .values(
+                summary=summary,
+                summary_message_count=checkpoint + len(messages),
+                updated_at=Conversation.updated_at  # Summarizing is not user activity
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return result.rowcount == 1
+
+
+# Shared by the chat endpoints and the job handler
+conversation_summarizer = ConversationSummarizer()
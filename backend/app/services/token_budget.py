@@ -0,0 +1,85 @@
+import math
+from typing import Any, Dict, List, Optional
+
+
+class TokenBudget:
+    """Token counting and context-window budgeting for prompts
+
+    Exact counts come from Ollama (``eval_count`` for generated replies,
+    ``prompt_eval_count`` for a turn sent on top of a saved context) and are
+    stored on each ``ChatMessage``, so old messages are never re-counted.
+    Text without a reported count is estimated with a characters-per-token
+    ratio calibrated from those same exact counts.
+    """
+
+    def __init__(self, chars_per_token: float = 4.0):
+        self.chars_per_token = chars_per_token
+        self.min_chars_per_token = 1.5
+        self.max_chars_per_token = 8.0
+        self.calibration_weight = 0.1  # Weight of each new sample in the running ratio
+        self.min_calibration_tokens = 8  # Ignore tiny replies; their ratio is noisy
+        self.message_overhead = 4  # Role prefix and newline around each history message
+        self.max_reported_ratio = 2.0  # Reported counts further above the estimate describe other text
+        self.reported_slack = 16  # Tokens of leeway for short texts
+        self.samples = 0
+
+    def count(self, text: str) -> int:
+        """Estimated number of tokens in ``text``"""
+        if not text:
+            return 0
+        return max(1, math.ceil(len(text) / self.chars_per_token))
+
+    def calibrate(self, text: str, token_count: Optional[int]):
+        """Fold an exact (text, token count) pair reported by the model into the ratio"""
+        if not text or not token_count or token_count < self.min_calibration_tokens:
+            return
+        ratio = len(text) / token_count
+        ratio = min(self.max_chars_per_token, max(self.min_chars_per_token, ratio))
+        self.chars_per_token += self.calibration_weight * (ratio - self.chars_per_token)
+        self.samples += 1
+
+    def checked_count(self, text: str, reported: Optional[int]) -> int:
+        """``reported`` if it plausibly counts ``text``, otherwise the estimate
+
+        A turn sent on top of a saved context reports ``prompt_eval_count``
+        for just that turn only while Ollama still holds the KV cache; after
+        an eviction it re-evaluates the whole context and reports thousands
+        of tokens, which would make the message look too big for any budget.
+        """
+        estimate = self.count(text)
+        if not reported or reported > max(estimate * self.max_reported_ratio, estimate + self.reported_slack):
+            return estimate
+        return reported
+
+    def message_tokens(self, message: Dict[str, Any]) -> int:
+        """Stored exact count for a history message, falling back to an estimate"""
+        stored = message.get("token_count")
+        if stored is not None:
+            try:
+                return int(stored)
+            except (TypeError, ValueError):
+                pass
+        return self.count(message.get("content", ""))
+
+    def fit_history(self, history: List[Dict[str, Any]], budget: int) -> List[Dict[str, Any]]:
+        """Newest contiguous messages of ``history`` (chronological) that fit in ``budget`` tokens"""
+        selected = []
+        used = 0
+        for message in reversed(history):
+            cost = self.message_tokens(message) + self.message_overhead
+            if used + cost > budget:
+                break
+            selected.append(message)
+            used += cost
+        selected.reverse()
+        return selected
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "chars_per_token": round(self.chars_per_token, 3),
+            "calibration_samples": self.samples
+        }
+
+
+# Shared so calibration from every reply benefits every request
+token_budget = TokenBudget()
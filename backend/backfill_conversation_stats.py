@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Backfill / repair the denormalized message stats on conversations
+
+Recomputes message_count, last_message_at and last_message_preview from
+chat_messages. Safe to re-run at any time.
+
+Usage:
+    python backfill_conversation_stats.py [--user-id <uuid>]
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the backend directory to Python path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from app.database import connection  # noqa: E402
+from app.services.chat_service import ChatService  # noqa: E402
+
+
+async def backfill(user_id=None) -> int:
+    connection.init_database()
+    await connection.init_async_database()
+    try:
+        async with connection.AsyncSessionLocal() as db:
+            updated = await ChatService().repair_conversation_stats(db, user_id=user_id)
+            await db.commit()
+            return updated
+    finally:
+        await connection.close_async_database()
+        connection.close_database()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Repair conversation message stats")
+    parser.add_argument("--user-id", help="Only repair this user's conversations")
+    args = parser.parse_args()
+
+    print("🔧 Recomputing conversation message stats...")
+    updated = asyncio.run(backfill(args.user_id))
+    print(f"✅ Updated {updated} conversations")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark: get_current_user vs. the cached get_current_user_snapshot.
+
+Calls each auth dependency directly (no HTTP stack) with a valid JWT for a
+user in an on-disk SQLite database and reports per-call latency plus the
+number of SQL statements executed. get_current_user loads the ORM User on
+every call; get_current_user_snapshot only does so when its cache is cold.
+
+Usage:
+    python benchmarks/bench_auth_dependency.py [--calls 5000]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+# Allow running from the backend directory or the benchmarks directory
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.core.auth import get_current_user, get_current_user_snapshot  # noqa: E402
+from app.models.auth import User  # noqa: E402
+from app.models.base import Base  # noqa: E402
+from app.services.auth_service import AuthService, invalidate_user_snapshot  # noqa: E402
+import app.models  # noqa: E402,F401  (register all mappers)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_calls(dependency, SessionLocal, credentials, calls: int):
+    """Call ``dependency`` ``calls`` times, each with a fresh session like a request would"""
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        async with SessionLocal() as db:
+            await dependency(credentials=credentials, db=db)
+        latencies.append((time.perf_counter() - start) * 1_000_000)
+    return latencies
+
+
+async def benchmark(calls: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp}/bench.db")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+
+        statements = 0
+
+        def count(*args):
+            nonlocal statements
+            statements += 1
+
+        event.listen(engine.sync_engine, "before_cursor_execute", count)
+
+        async with SessionLocal() as db:
+            user = User(email="bench@test.com", hashed_password="x", full_name="Bench User")
+            db.add(user)
+            await db.commit()
+        token = AuthService().create_access_token({"sub": str(user.id)})
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+        invalidate_user_snapshot(user.id)
+
+        results = {}
+        for name, dependency in (("orm_user", get_current_user), ("snapshot", get_current_user_snapshot)):
+            await run_calls(dependency, SessionLocal, credentials, 50)  # Warm up
+            statements = 0
+            latencies = await run_calls(dependency, SessionLocal, credentials, calls)
+            results[name] = (statements, latencies)
+
+        await engine.dispose()
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--calls", type=int, default=5000)
+    args = parser.parse_args()
+
+    results = asyncio.run(benchmark(args.calls))
+
+    print(f"📊 {args.calls} calls per dependency")
+    print(f"{'dependency':<14}{'queries':>10}{'p50 us':>10}{'p99 us':>10}{'mean us':>10}")
+    for name, (statements, latencies) in results.items():
+        print(
+            f"{name:<14}{statements:>10}{percentile(latencies, 50):>10.1f}"
+            f"{percentile(latencies, 99):>10.1f}{statistics.mean(latencies):>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Load test: event-loop lag under concurrent chat turns, sync vs. async DB.
+
+Each simulated chat turn performs the statements a real turn does (insert the
+user message, read recent history, insert the assistant message, commit).
+Network latency to the database is emulated with a ``sleep_ms()`` SQL function
+executed once per statement. A monitor task measures how late the event loop
+wakes it up; with the sync Session that lag grows with concurrency because
+every query blocks the loop, with AsyncSession it should stay flat.
+
+Usage:
+    python benchmarks/bench_event_loop_lag.py [--latency-ms 5] [--turns 200]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from sqlalchemy import create_engine, event, select, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.models.base import Base  # noqa: E402
+from app.models.auth import User  # noqa: E402
+from app.models.chat import Conversation, ChatMessage, MessageRole  # noqa: E402
+import app.models  # noqa: E402,F401  (register all mappers)
+
+LATENCY = text("SELECT sleep_ms(:ms)")
+
+
+def _sleep_ms(ms):
+    time.sleep(ms / 1000)
+    return 0
+
+
+def install_sleep_function(sync_engine):
+    @event.listens_for(sync_engine, "connect")
+    def register(dbapi_connection, _):
+        dbapi_connection.create_function("sleep_ms", 1, _sleep_ms)
+
+
+async def monitor_lag(stop: asyncio.Event, samples: list, interval: float = 0.005):
+    """Record how late the loop resumes a task that asked to sleep ``interval``"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append((time.perf_counter() - start - interval) * 1000)
+
+
+def seed(database_path: str):
+    engine = create_engine(f"sqlite:///{database_path}")
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as db:
+        user = User(email="load@test.com", hashed_password="x", full_name="Load Test")
+        db.add(user)
+        db.flush()
+        conversation = Conversation(user_id=user.id, title="Load test")
+        db.add(conversation)
+        db.commit()
+        conversation_id = conversation.id
+    engine.dispose()
+    return conversation_id
+
+
+def sync_turn(SessionLocal, conversation_id, latency_ms):
+    with SessionLocal() as db:
+        db.add(ChatMessage(id=uuid.uuid4(), conversation_id=conversation_id, role=MessageRole.USER, content="hi"))
+        db.execute(LATENCY, {"ms": latency_ms})
+        db.flush()
+        db.execute(LATENCY, {"ms": latency_ms})
+        db.execute(
+            select(ChatMessage).where(ChatMessage.conversation_id == conversation_id)
+            .order_by(ChatMessage.created_at.desc()).limit(10)
+        ).scalars().all()
+        db.add(ChatMessage(id=uuid.uuid4(), conversation_id=conversation_id, role=MessageRole.ASSISTANT, content="hey"))
+        db.execute(LATENCY, {"ms": latency_ms})
+        db.commit()
+
+
+async def async_turn(AsyncSessionLocal, conversation_id, latency_ms):
+    async with AsyncSessionLocal() as db:
+        db.add(ChatMessage(id=uuid.uuid4(), conversation_id=conversation_id, role=MessageRole.USER, content="hi"))
+        await db.execute(LATENCY, {"ms": latency_ms})
+        await db.flush()
+        await db.execute(LATENCY, {"ms": latency_ms})
+        result = await db.execute(
+            select(ChatMessage).where(ChatMessage.conversation_id == conversation_id)
+            .order_by(ChatMessage.created_at.desc()).limit(10)
+        )
+        result.scalars().all()
+        db.add(ChatMessage(id=uuid.uuid4(), conversation_id=conversation_id, role=MessageRole.ASSISTANT, content="hey"))
+        await db.execute(LATENCY, {"ms": latency_ms})
+        await db.commit()
+
+
+async def run(mode: str, database_path: str, conversation_id, turns: int, concurrency: int, latency_ms: float):
+    if mode == "sync":
+        engine = create_engine(f"sqlite:///{database_path}", connect_args={"timeout": 30, "check_same_thread": False})
+        install_sleep_function(engine)
+        SessionLocal = sessionmaker(bind=engine)
+
+        async def turn():
+            # What an async endpoint calling a sync Session does: yield once
+            # (request arrival), then run every query on the loop thread
+            await asyncio.sleep(0)
+            sync_turn(SessionLocal, conversation_id, latency_ms)
+    else:
+        # Same pool as the app's SQLite fallback: one pooled connection per session
+        engine = create_async_engine(
+            f"sqlite+aiosqlite:///{database_path}",
+            connect_args={"timeout": 30},
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=20,
+            max_overflow=0,
+        )
+        install_sleep_function(engine.sync_engine)
+        AsyncSessionLocal = async_sessionmaker(bind=engine, expire_on_commit=False)
+
+        async def turn():
+            await async_turn(AsyncSessionLocal, conversation_id, latency_ms)
+
+    samples = []
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(monitor_lag(stop, samples))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited():
+        async with semaphore:
+            await turn()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(limited() for _ in range(turns)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await monitor
+    if mode == "sync":
+        engine.dispose()
+    else:
+        await engine.dispose()
+
+    samples.sort()
+    return {
+        "elapsed_s": elapsed,
+        "samples": len(samples),
+        "lag_p50": statistics.median(samples) if samples else 0.0,
+        "lag_p99": samples[int(round(0.99 * (len(samples) - 1)))] if samples else 0.0,
+        "lag_max": samples[-1] if samples else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    args = parser.parse_args()
+
+    fd, database_path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        conversation_id = seed(database_path)
+        with create_engine(f"sqlite:///{database_path}").connect() as conn:
+            conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+
+        print(f"📊 {args.turns} chat turns, {args.latency_ms} ms emulated DB latency per statement")
+        print(f"{'mode':<8}{'concurrency':>12}{'elapsed s':>11}{'ticks':>7}{'lag p50 ms':>12}{'lag p99 ms':>12}{'lag max ms':>12}")
+        for concurrency in args.concurrency:
+            for mode in ("sync", "async"):
+                stats = asyncio.run(run(mode, database_path, conversation_id, args.turns, concurrency, args.latency_ms))
+                print(
+                    f"{mode:<8}{concurrency:>12}{stats['elapsed_s']:>11.2f}{stats['samples']:>7}{stats['lag_p50']:>12.2f}"
+                    f"{stats['lag_p99']:>12.2f}{stats['lag_max']:>12.2f}"
+                )
+    finally:
+        os.remove(database_path)
+        for suffix in ("-wal", "-shm"):
+            if os.path.exists(database_path + suffix):
+                os.remove(database_path + suffix)
+
+
+if __name__ == "__main__":
+    main()
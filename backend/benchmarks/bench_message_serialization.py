@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Benchmark: serializing a conversation's messages, Pydantic vs. plain rows + orjson.
+
+For conversations of increasing length in an on-disk SQLite database,
+compares the old GET /chat/conversations/{id} path (ORM entities, one
+MessageResponse per row, FastAPI re-validating against response_model,
+JSONResponse) with the current one (column tuples, dicts, ORJSONResponse).
+Fetch and serialization are timed separately; each figure is the median of
+several runs.
+
+Usage:
+    python benchmarks/bench_message_serialization.py [--counts 100 500 2000 5000] [--runs 7]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+# Allow running from the backend directory or the benchmarks directory
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from app.models.auth import User  # noqa: E402
+from app.models.base import Base  # noqa: E402
+from app.models.chat import ChatMessage, Conversation, MessageRole  # noqa: E402
+from app.schemas.chat import ConversationDetail  # noqa: E402
+from app.services.chat_service import MESSAGE_COLUMNS, ChatService  # noqa: E402
+import app.models  # noqa: E402,F401  (register all mappers)
+
+chat_service = ChatService()
+response_field = create_response_field("Response_get_conversation_detail", ConversationDetail)
+
+
+async def seed(SessionLocal, count: int):
+    base_time = datetime(2024, 1, 1)
+    async with SessionLocal() as db:
+        user = User(email=f"bench{count}@test.com", hashed_password="x", full_name="Bench User")
+        db.add(user)
+        await db.flush()
+        conversation = Conversation(user_id=user.id, title=f"{count} messages", message_count=count)
+        db.add(conversation)
+        await db.flush()
+        db.add_all([
+            ChatMessage(
+                conversation_id=conversation.id,
+                role=MessageRole.USER if i % 2 == 0 else MessageRole.ASSISTANT,
+                content=f"Message {i}: " + "I want to keep building the habits we talked about. " * 4,
+                message_metadata=None if i % 2 == 0 else {
+                    "model_used": "llama3.1:8b", "fallback_used": False, "generation_time_ms": 1200 + i
+                },
+                token_count=str(40 + i % 30),
+                created_at=base_time + timedelta(seconds=i)
+            )
+            for i in range(count)
+        ])
+        await db.commit()
+        return conversation
+
+
+async def pydantic_path(SessionLocal, conversation):
+    """The previous endpoint: ORM rows -> MessageResponse each -> response_model validation -> JSONResponse"""
+    async with SessionLocal() as db:
+        start = time.perf_counter()
+        result = await db.execute(
+            select(ChatMessage).where(ChatMessage.conversation_id == conversation.id).order_by(ChatMessage.created_at.asc())
+        )
+        messages = result.scalars().all()
+        fetched = time.perf_counter()
+
+        detail = ConversationDetail(
+            id=str(conversation.id),
+            title=conversation.title,
+            summary=conversation.summary,
+            is_archived=bool(conversation.is_archived),
+            created_at=conversation.created_at,
+            updated_at=conversation.updated_at,
+            messages=[chat_service.to_message_response(message) for message in messages]
+        )
+        content = await serialize_response(field=response_field, response_content=detail)
+        body = JSONResponse(content).body
+        return fetched - start, time.perf_counter() - fetched, len(body)
+
+
+async def orjson_path(SessionLocal, conversation):
+    """The current endpoint: column tuples -> dicts -> ORJSONResponse"""
+    async with SessionLocal() as db:
+        start = time.perf_counter()
+        result = await db.execute(
+            select(*MESSAGE_COLUMNS).where(ChatMessage.conversation_id == conversation.id).order_by(ChatMessage.created_at.asc())
+        )
+        rows = result.all()
+        fetched = time.perf_counter()
+
+        body = ORJSONResponse({
+            "id": str(conversation.id),
+            "title": conversation.title,
+            "summary": conversation.summary,
+            "is_archived": bool(conversation.is_archived),
+            "created_at": conversation.created_at,
+            "updated_at": conversation.updated_at,
+            "messages": [chat_service.message_row_to_dict(row) for row in rows],
+        }).body
+        return fetched - start, time.perf_counter() - fetched, len(body)
+
+
+async def benchmark(counts, runs: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp}/bench.db")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+
+        results = []
+        for count in counts:
+            conversation = await seed(SessionLocal, count)
+            row = {"messages": count}
+            for name, path in (("pydantic", pydantic_path), ("orjson", orjson_path)):
+                await path(SessionLocal, conversation)  # Warm up
+                samples = [await path(SessionLocal, conversation) for _ in range(runs)]
+                row[f"{name}_fetch"] = statistics.median(sample[0] for sample in samples) * 1000
+                row[f"{name}_serialize"] = statistics.median(sample[1] for sample in samples) * 1000
+                row[f"{name}_bytes"] = samples[0][2]
+            results.append(row)
+
+        await engine.dispose()
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--counts", type=int, nargs="+", default=[100, 500, 2000, 5000])
+    parser.add_argument("--runs", type=int, default=7)
+    args = parser.parse_args()
+
+    results = asyncio.run(benchmark(args.counts, args.runs))
+
+    print(f"📊 Median of {args.runs} runs, milliseconds")
+    print(
+        f"{'messages':>9}{'fetch orm':>12}{'fetch rows':>12}"
+        f"{'ser pydantic':>14}{'ser orjson':>12}{'speedup':>9}{'total speedup':>15}"
+    )
+    for row in results:
+        old_total = row["pydantic_fetch"] + row["pydantic_serialize"]
+        new_total = row["orjson_fetch"] + row["orjson_serialize"]
+        print(
+            f"{row['messages']:>9}{row['pydantic_fetch']:>12.2f}{row['orjson_fetch']:>12.2f}"
+            f"{row['pydantic_serialize']:>14.2f}{row['orjson_serialize']:>12.2f}"
+            f"{row['pydantic_serialize'] / row['orjson_serialize']:>8.1f}x"
+            f"{old_total / new_total:>14.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
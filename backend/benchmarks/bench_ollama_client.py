@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-call httpx clients vs. the shared pooled Ollama client.
+
+Runs the same non-streaming /api/generate call against a local fake Ollama
+server twice - once opening a fresh AsyncClient per call (the previous
+behaviour) and once through OllamaService's shared client - and reports the
+number of TCP connections the server saw plus p50/p99 request overhead.
+
+Usage:
+    python benchmarks/bench_ollama_client.py [--requests 500] [--concurrency 10]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+# Allow running from the backend directory or the benchmarks directory
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from benchmarks.fake_ollama import FakeOllamaServer  # noqa: E402
+from app.services import ollama_service as ollama_module  # noqa: E402
+from app.services.ollama_service import OllamaService  # noqa: E402
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_load(call, total: int, concurrency: int):
+    """Run ``total`` calls with at most ``concurrency`` in flight, returning latencies in ms"""
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await call()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(one() for _ in range(total)))
+    return latencies
+
+
+async def benchmark(server: FakeOllamaServer, total: int, concurrency: int):
+    service = OllamaService()
+    service.base_url = server.base_url
+    payload = service._build_payload("Human: hi\nFuture Self:", stream=False)
+
+    async def per_call_client():
+        # Previous behaviour: a brand new client (and TCP connection) per call
+        async with httpx.AsyncClient(timeout=service.timeout) as client:
+            response = await client.post(f"{service.base_url}/api/generate", json=payload)
+            response.raise_for_status()
+
+    async def pooled_client():
+        await service._call_ollama(payload["prompt"])
+
+    results = {}
+    for name, call in (("per-call client", per_call_client), ("pooled client", pooled_client)):
+        # Warm up outside the measurement
+        await call()
+        server.reset_stats()
+
+        latencies = await run_load(call, total, concurrency)
+        results[name] = {
+            "connections": server.connection_count,
+            "requests": server.request_count,
+            "p50": percentile(latencies, 50),
+            "p99": percentile(latencies, 99),
+            "mean": statistics.mean(latencies),
+        }
+
+    await ollama_module.close_ollama_client()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--port", type=int, default=11501)
+    args = parser.parse_args()
+
+    server = FakeOllamaServer(port=args.port).start()
+    try:
+        results = asyncio.run(benchmark(server, args.requests, args.concurrency))
+    finally:
+        server.stop()
+
+    print(f"📊 {args.requests} requests, concurrency {args.concurrency}")
+    print(f"{'mode':<18}{'connections':>12}{'p50 ms':>10}{'p99 ms':>10}{'mean ms':>10}")
+    for name, stats in results.items():
+        print(
+            f"{name:<18}{stats['connections']:>12}{stats['p50']:>10.2f}"
+            f"{stats['p99']:>10.2f}{stats['mean']:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
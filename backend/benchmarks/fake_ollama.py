@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Minimal fake Ollama server for benchmarks and local tests.
+
+Implements just enough of the Ollama HTTP API (/api/generate, /api/tags,
+/api/ps, /api/pull) to exercise OllamaService without a real model, and
+records how many requests and distinct TCP connections it has seen.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from typing import List, Optional
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+
+class FakeOllamaServer:
+    """Fake Ollama server running uvicorn in a background thread"""
+
+    def __init__(
+        self,
+        port: int,
+        host: str = "127.0.0.1",
+        reply: str = "Hey! How's it going?",
+        token_delay: float = 0.0,
+        models: Optional[List[str]] = None,
+        loaded_models: Optional[List[str]] = None,
+    ):
+        self.host = host
+        self.port = port
+        self.reply = reply
+        self.token_delay = token_delay
+        self.models = models if models is not None else ["mistral:7b"]
+        self.loaded_models = loaded_models if loaded_models is not None else list(self.models)
+        self.fail_status: Optional[int] = None  # Set to make /api/generate fail
+
+        self.request_count = 0
+        self.connections = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.prompts: List[dict] = []
+
+        self._server: Optional[uvicorn.Server] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def connection_count(self) -> int:
+        return len(self.connections)
+
+    def reset_stats(self):
+        self.request_count = 0
+        self.connections = set()
+        self.max_in_flight = 0
+        self.prompts = []
+
+    def _track(self, request: Request):
+        self.request_count += 1
+        if request.client:
+            self.connections.add((request.client.host, request.client.port))
+
+    def _tokens(self) -> List[str]:
+        words = self.reply.split(" ")
+        return [words[0]] + [f" {word}" for word in words[1:]]
+
+    def _final_chunk(self, body: dict) -> dict:
+        prompt = body.get("prompt", "")
+        context = list(body.get("context") or [])
+        prompt_tokens = max(1, len(prompt) // 4)
+        context.extend(range(prompt_tokens + len(self._tokens())))
+        return {
+            "model": body.get("model"),
+            "response": "",
+            "done": True,
+            "prompt_eval_count": prompt_tokens,
+            "eval_count": len(self._tokens()),
+            "context": context,
+        }
+
+    async def generate(self, request: Request):
+        self._track(request)
+        body = await request.json()
+        self.prompts.append(body)
+
+        if self.fail_status:
+            return JSONResponse({"error": "fake failure"}, status_code=self.fail_status)
+
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+        if not body.get("stream", True):
+            try:
+                await asyncio.sleep(self.token_delay * len(self._tokens()))
+                result = self._final_chunk(body)
+                result["response"] = self.reply
+                return JSONResponse(result)
+            finally:
+                self.in_flight -= 1
+
+        async def ndjson():
+            try:
+                for token in self._tokens():
+                    if self.token_delay:
+                        await asyncio.sleep(self.token_delay)
+                    yield json.dumps({"model": body.get("model"), "response": token, "done": False}) + "\n"
+                yield json.dumps(self._final_chunk(body)) + "\n"
+            finally:
+                self.in_flight -= 1
+
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+    async def tags(self, request: Request):
+        self._track(request)
+        return JSONResponse({"models": [{"name": name} for name in self.models]})
+
+    async def ps(self, request: Request):
+        self._track(request)
+        return JSONResponse({"models": [{"name": name} for name in self.loaded_models]})
+
+    async def pull(self, request: Request):
+        self._track(request)
+        body = await request.json()
+        if body.get("name") not in self.models:
+            self.models.append(body.get("name"))
+        return JSONResponse({"status": "success"})
+
+    def app(self) -> Starlette:
+        return Starlette(routes=[
+            Route("/api/generate", self.generate, methods=["POST"]),
+            Route("/api/tags", self.tags, methods=["GET"]),
+            Route("/api/ps", self.ps, methods=["GET"]),
+            Route("/api/pull", self.pull, methods=["POST"]),
+        ])
+
+    def start(self) -> "FakeOllamaServer":
+        config = uvicorn.Config(self.app(), host=self.host, port=self.port, log_level="error")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+        self._thread.start()
+
+        for _ in range(100):
+            if self._server.started:
+                return self
+            time.sleep(0.05)
+        raise RuntimeError(f"Fake Ollama server failed to start on port {self.port}")
+
+    def stop(self):
+        if self._server:
+            self._server.should_exit = True
+        if self._thread:
+            self._thread.join(timeout=5)
+
+
+if __name__ == "__main__":
+    server = FakeOllamaServer(port=11434, token_delay=0.02).start()
+    print(f"🤖 Fake Ollama listening on {server.base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
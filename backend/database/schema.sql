@@ -96,9 +96,14 @@ CREATE TABLE public.conversations (
     id UUID DEFAULT uuid_generate_v4() PRIMARY KEY,
     user_id UUID REFERENCES public.users(id) ON DELETE CASCADE NOT NULL,
     title VARCHAR(255),
+    summary TEXT,
+    summary_message_count INTEGER NOT NULL DEFAULT 0,
+    is_archived BOOLEAN DEFAULT FALSE,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-    last_message_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+    message_count INTEGER NOT NULL DEFAULT 0,
+    last_message_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    last_message_preview VARCHAR(255)
 );
 
 -- Chat messages table
@@ -210,12 +215,13 @@ CREATE INDEX idx_users_email ON public.users(email);
 CREATE INDEX idx_refresh_tokens_user_id ON public.refresh_tokens(user_id);
 CREATE INDEX idx_refresh_tokens_token ON public.refresh_tokens(token);
 CREATE INDEX idx_onboarding_data_user_id ON public.onboarding_data(user_id);
-CREATE INDEX idx_conversations_user_id ON public.conversations(user_id);
-CREATE INDEX idx_chat_messages_conversation_id ON public.chat_messages(conversation_id);
-CREATE INDEX idx_chat_messages_user_id ON public.chat_messages(user_id);
-CREATE INDEX idx_chat_messages_created_at ON public.chat_messages(created_at);
+-- Conversation list: WHERE user_id = ? AND is_archived = ? ORDER BY updated_at DESC, id DESC
+CREATE INDEX idx_conversations_user_archived_updated ON public.conversations(user_id, is_archived, updated_at DESC, id DESC);
+-- Message history, detail and pages: WHERE conversation_id = ? ORDER BY created_at, id
+CREATE INDEX idx_chat_messages_conversation_created ON public.chat_messages(conversation_id, created_at DESC, id DESC);
 CREATE INDEX idx_daily_messages_user_id ON public.daily_messages(user_id);
 CREATE INDEX idx_daily_messages_scheduled_for ON public.daily_messages(scheduled_for);
+CREATE UNIQUE INDEX idx_daily_messages_user_scheduled ON public.daily_messages(user_id, scheduled_for);
 CREATE INDEX idx_user_goals_user_id ON public.user_goals(user_id);
 CREATE INDEX idx_journal_entries_user_id ON public.journal_entries(user_id);
 CREATE INDEX idx_journal_entries_created_at ON public.journal_entries(created_at);
@@ -234,6 +240,23 @@ BEGIN
 END;
 $$ language 'plpgsql';
 
+-- Conversations are listed and paged by updated_at, so only message activity
+-- restamps it. Updates that leave the message stats alone (background title
+-- and summary jobs) keep the updated_at they were given: the app's own value
+-- for a user's rename or archive, the old one otherwise. A stats repair sets
+-- app.keep_updated_at for its transaction so corrected rows don't move either.
+CREATE OR REPLACE FUNCTION update_conversation_updated_at_column()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF (NEW.message_count IS DISTINCT FROM OLD.message_count
+        OR NEW.last_message_at IS DISTINCT FROM OLD.last_message_at)
+        AND current_setting('app.keep_updated_at', true) IS DISTINCT FROM 'on' THEN
+        NEW.updated_at = NOW();
+    END IF;
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
 -- Apply updated_at triggers to relevant tables
 CREATE TRIGGER update_users_updated_at BEFORE UPDATE ON public.users 
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
@@ -245,7 +268,7 @@ CREATE TRIGGER update_onboarding_data_updated_at BEFORE UPDATE ON public.onboard
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
 CREATE TRIGGER update_conversations_updated_at BEFORE UPDATE ON public.conversations 
-    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+    FOR EACH ROW EXECUTE FUNCTION update_conversation_updated_at_column();
 
 CREATE TRIGGER update_chat_messages_updated_at BEFORE UPDATE ON public.chat_messages 
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
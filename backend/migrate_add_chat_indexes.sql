@@ -0,0 +1,29 @@
+-- Migration: Composite indexes for the conversation list and message history queries
+-- Run this if you have an existing database
+
+-- Used by the conversation list filter (older databases may lack it)
+ALTER TABLE public.conversations
+ADD COLUMN IF NOT EXISTS is_archived BOOLEAN DEFAULT FALSE;
+
+-- On a large live database, run each CREATE INDEX as CREATE INDEX CONCURRENTLY
+-- (outside a transaction) to avoid blocking writes while it builds.
+
+-- Conversation list: WHERE user_id = ? AND is_archived = ? ORDER BY updated_at DESC, id DESC
+CREATE INDEX IF NOT EXISTS idx_conversations_user_archived_updated
+ON public.conversations(user_id, is_archived, updated_at DESC, id DESC);
+
+-- Message history, detail and pages: WHERE conversation_id = ? ORDER BY created_at, id
+CREATE INDEX IF NOT EXISTS idx_chat_messages_conversation_created
+ON public.chat_messages(conversation_id, created_at DESC, id DESC);
+
+-- Superseded by the composite indexes above (each was a prefix of one, or unused)
+DROP INDEX IF EXISTS public.idx_conversations_user_id;
+DROP INDEX IF EXISTS public.idx_chat_messages_conversation_id;
+DROP INDEX IF EXISTS public.idx_chat_messages_created_at;
+
+-- The app never queries chat_messages.user_id; messages are reached through their conversation
+DROP INDEX IF EXISTS public.idx_chat_messages_user_id;
+
+-- Refresh planner statistics for the new indexes
+ANALYZE public.conversations;
+ANALYZE public.chat_messages;
@@ -0,0 +1,29 @@
+-- Migration: Add denormalized message stats to conversations table
+-- Run this if you have an existing database
+
+ALTER TABLE public.conversations
+ADD COLUMN IF NOT EXISTS message_count INTEGER NOT NULL DEFAULT 0,
+ADD COLUMN IF NOT EXISTS last_message_at TIMESTAMP WITH TIME ZONE,
+ADD COLUMN IF NOT EXISTS last_message_preview VARCHAR(255);
+
+-- Backfill from existing messages (same as: python backfill_conversation_stats.py).
+-- The updated_at trigger is disabled so the backfill doesn't restamp every
+-- conversation and lose the conversation list's recency order.
+ALTER TABLE public.conversations DISABLE TRIGGER update_conversations_updated_at;
+
+UPDATE public.conversations c SET
+    message_count = (SELECT COUNT(*) FROM public.chat_messages m WHERE m.conversation_id = c.id),
+    last_message_at = (SELECT MAX(m.created_at) FROM public.chat_messages m WHERE m.conversation_id = c.id),
+    last_message_preview = (
+        SELECT SUBSTR(m.content, 1, 100) FROM public.chat_messages m
+        WHERE m.conversation_id = c.id
+        ORDER BY m.created_at DESC
+        LIMIT 1
+    );
+
+ALTER TABLE public.conversations ENABLE TRIGGER update_conversations_updated_at;
+
+-- Add comments for documentation
+COMMENT ON COLUMN public.conversations.message_count IS 'Number of messages, maintained on insert';
+COMMENT ON COLUMN public.conversations.last_message_at IS 'Timestamp of the newest message';
+COMMENT ON COLUMN public.conversations.last_message_preview IS 'First 100 characters of the newest message';
@@ -0,0 +1,10 @@
+-- Migration: Add rolling summary checkpoint to conversations table
+-- Run this if you have an existing database
+
+ALTER TABLE public.conversations
+ADD COLUMN IF NOT EXISTS summary TEXT,
+ADD COLUMN IF NOT EXISTS summary_message_count INTEGER NOT NULL DEFAULT 0;
+
+-- Add comments for documentation
+COMMENT ON COLUMN public.conversations.summary IS 'Rolling summary of the oldest messages';
+COMMENT ON COLUMN public.conversations.summary_message_count IS 'Number of oldest messages folded into summary (checkpoint)';
@@ -0,0 +1,14 @@
+-- Migration: Daily message pre-generation (one message per user per day)
+-- Run this if you have an existing database
+
+ALTER TABLE public.daily_messages
+ADD COLUMN IF NOT EXISTS scheduled_for DATE,
+ADD COLUMN IF NOT EXISTS message_type VARCHAR(20) DEFAULT 'motivational';
+
+-- Lets the nightly batch skip users who already have a message, and serves
+-- GET /chat/daily-message as a single index lookup
+CREATE UNIQUE INDEX IF NOT EXISTS idx_daily_messages_user_scheduled
+ON public.daily_messages(user_id, scheduled_for);
+
+-- Add comment for documentation
+COMMENT ON COLUMN public.daily_messages.scheduled_for IS 'Day the message is for (filled by the nightly batch)';
@@ -0,0 +1,23 @@
+-- Migration: Only restamp conversations.updated_at on message activity
+-- Run this if you have an existing database
+
+-- The generic trigger set updated_at = NOW() on every UPDATE, so background
+-- title, summary and stats-repair jobs moved conversations to the top of the
+-- list (and shifted keyset cursors) although they are not user activity.
+-- Now only changes to the message stats restamp it, unless the transaction
+-- sets app.keep_updated_at (as the stats repair does).
+CREATE OR REPLACE FUNCTION update_conversation_updated_at_column()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF (NEW.message_count IS DISTINCT FROM OLD.message_count
+        OR NEW.last_message_at IS DISTINCT FROM OLD.last_message_at)
+        AND current_setting('app.keep_updated_at', true) IS DISTINCT FROM 'on' THEN
+        NEW.updated_at = NOW();
+    END IF;
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS update_conversations_updated_at ON public.conversations;
+CREATE TRIGGER update_conversations_updated_at BEFORE UPDATE ON public.conversations
+    FOR EACH ROW EXECUTE FUNCTION update_conversation_updated_at_column();
@@ -0,0 +1,51 @@
+-- Migration: Store message, activity and file metadata as JSONB
+-- Run this if you have an existing database
+
+-- Columns that are already JSONB are left alone. Text values that aren't
+-- valid JSON become NULL instead of failing the migration.
+CREATE OR REPLACE FUNCTION pg_temp.try_jsonb(value TEXT) RETURNS JSONB AS $$
+BEGIN
+    RETURN value::jsonb;
+EXCEPTION WHEN others THEN
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+DO $$
+DECLARE
+    target RECORD;
+BEGIN
+    FOR target IN
+        SELECT * FROM (VALUES
+            ('chat_messages', 'message_metadata'),
+            ('user_activities', 'activity_data'),
+            ('file_uploads', 'file_metadata'),
+            ('ai_personality_profiles', 'core_values'),
+            ('ai_personality_profiles', 'speaking_patterns')
+        ) AS t(table_name, column_name)
+    LOOP
+        IF EXISTS (
+            SELECT 1 FROM information_schema.columns c
+            WHERE c.table_schema = 'public'
+              AND c.table_name = target.table_name
+              AND c.column_name = target.column_name
+              AND c.data_type IN ('text', 'character varying')
+        ) THEN
+            EXECUTE format('ALTER TABLE public.%I ALTER COLUMN %I DROP DEFAULT', target.table_name, target.column_name);
+            EXECUTE format(
+                'ALTER TABLE public.%I ALTER COLUMN %I TYPE JSONB USING pg_temp.try_jsonb(%I)',
+                target.table_name, target.column_name, target.column_name
+            );
+        ELSIF EXISTS (
+            SELECT 1 FROM information_schema.tables t
+            WHERE t.table_schema = 'public' AND t.table_name = target.table_name
+        ) THEN
+            EXECUTE format('ALTER TABLE public.%I ADD COLUMN IF NOT EXISTS %I JSONB', target.table_name, target.column_name);
+        END IF;
+    END LOOP;
+END $$;
+
+-- Add comments for documentation
+COMMENT ON COLUMN public.chat_messages.message_metadata IS 'Message metadata, e.g. model_used and fallback_used; queried with ->>';
+COMMENT ON COLUMN public.user_activities.activity_data IS 'Activity details as JSON';
+COMMENT ON COLUMN public.file_uploads.file_metadata IS 'File metadata as JSON';
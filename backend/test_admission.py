@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Tests for the admission controller in front of Ollama.
+
+Checks the concurrency cap, round-robin fairness between users, queue
+position reporting, and fast rejection when the queue is full or a caller
+has waited longer than its budget.
+"""
+
+import asyncio
+
+from app.core.admission import AdmissionController
+from app.core.exceptions import TooManyRequestsError
+
+
+async def _fairness_checks():
+    admission = AdmissionController("test", max_concurrent=1, max_per_key=1, max_queue=10, max_queue_per_key=5)
+    order = []
+    positions = {}
+    peak = 0
+
+    async def job(key, n):
+        nonlocal peak
+        seen = []
+        async for position in admission.admit(key):
+            seen.append(position)
+        try:
+            peak = max(peak, admission.active)
+            order.append(f"{key}{n}")
+            await asyncio.sleep(0.01)
+        finally:
+            admission.release(key)
+        positions[f"{key}{n}"] = seen
+
+    # One user floods the queue before another user arrives
+    tasks = [asyncio.create_task(job("a", n)) for n in range(4)]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(job("b", 0)))
+    await asyncio.gather(*tasks)
+
+    assert peak == 1
+    assert order == ["a0", "a1", "b0", "a2", "a3"], order
+    assert positions["a0"] == []  # Admitted straight away
+    assert positions["b0"][0] == 2  # Behind a1 only, not every queued "a"
+    assert positions["a3"][0] == 3
+    assert admission.active == 0 and admission.waiting == 0
+    return order
+
+
+async def _rejection_checks():
+    admission = AdmissionController("test", max_concurrent=1, max_queue=2, max_queue_per_key=1, max_wait=0.05, poll_interval=0.01)
+    await admission.acquire("holder")
+
+    # Waits past its budget
+    try:
+        await admission.acquire("slow")
+        raise AssertionError("expected a timeout rejection")
+    except TooManyRequestsError as e:
+        assert e.status_code == 429 and "Retry-After" in e.headers
+    assert admission.timed_out == 1 and admission.waiting == 0
+
+    async def assert_rejected(key):
+        try:
+            await admission.acquire(key)
+            raise AssertionError(f"expected {key} to be rejected")
+        except TooManyRequestsError:
+            pass
+
+    # Per-user queue limit
+    waiter_b = asyncio.create_task(admission.acquire("b", max_wait=5))
+    await asyncio.sleep(0)
+    await assert_rejected("b")
+
+    # Global queue limit
+    waiter_c = asyncio.create_task(admission.acquire("c", max_wait=5))
+    await asyncio.sleep(0)
+    await assert_rejected("d")
+    assert admission.rejected == 2
+
+    # A cancelled waiter leaves the queue; the slot goes to the next one
+    waiter_b.cancel()
+    await asyncio.gather(waiter_b, return_exceptions=True)
+    admission.release("holder")
+    await waiter_c
+    assert admission.stats()["active"] == 1 and admission.waiting == 0
+    admission.release("c")
+    return admission.stats()
+
+
+def test_admission_fairness():
+    asyncio.run(_fairness_checks())
+
+
+def test_admission_rejection():
+    asyncio.run(_rejection_checks())
+
+
+if __name__ == "__main__":
+    print("🧪 Testing fair admission order")
+    print(f"✅ Order: {asyncio.run(_fairness_checks())}")
+    print("🧪 Testing queue limits and wait budget")
+    print(f"✅ Stats: {asyncio.run(_rejection_checks())}")
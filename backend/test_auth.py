@@ -4,7 +4,7 @@ Simple test script to debug authentication registration
 """
 
 import asyncio
-from app.database.connection import init_database
+from app.database.connection import init_database, init_async_database, close_async_database
 from app.services.auth_service import AuthService
 from app.schemas.auth import UserCreate
 import traceback
@@ -19,6 +19,7 @@ async def test_auth_registration():
         # Step 1: Initialize database
         print("1️⃣ Initializing database...")
         init_database()
+        await init_async_database()
         print("✅ Database initialized successfully")
         
         # Step 2: Create auth service
@@ -48,29 +49,26 @@ async def test_auth_registration():
         
         # Step 6: Test database session
         print("\n6️⃣ Testing database session...")
-        from app.database.connection import SessionLocal
-        db = SessionLocal()
-        try:
+        from app.database.connection import AsyncSessionLocal
+        async with AsyncSessionLocal() as db:
             from sqlalchemy import text
-            result = db.execute(text("SELECT 1"))
+            result = await db.execute(text("SELECT 1"))
             print(f"✅ Database query successful: {result.fetchone()}")
-        finally:
-            db.close()
         
         # Step 7: Test user creation (this is where it might fail)
         print("\n7️⃣ Testing user creation...")
-        db = SessionLocal()
-        try:
-            user = auth_service.create_user(db, user_data)
-            print(f"✅ User created successfully: {user.email}")
-            print(f"   User ID: {user.id}")
-            print(f"   Full name: {user.full_name}")
-            print(f"   Is active: {user.is_active}")
-        except Exception as e:
-            print(f"❌ User creation failed: {e}")
-            traceback.print_exc()
-        finally:
-            db.close()
+        async with AsyncSessionLocal() as db:
+            try:
+                user = await auth_service.create_user(db, user_data)
+                print(f"✅ User created successfully: {user.email}")
+                print(f"   User ID: {user.id}")
+                print(f"   Full name: {user.full_name}")
+                print(f"   Is active: {user.is_active}")
+            except Exception as e:
+                print(f"❌ User creation failed: {e}")
+                traceback.print_exc()
+        
+        await close_async_database()
         
         print("\n🎉 All tests completed!")
         
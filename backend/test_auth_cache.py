@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tests for the cached user snapshot behind get_current_user_snapshot.
+
+Checks that a repeat request with the same JWT skips the database, that
+revoking a user's tokens or deactivating them drops the cached snapshot,
+and that bad tokens and disabled accounts are still rejected.
+"""
+
+import asyncio
+
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.api.v1.endpoints.auth import deactivate_account
+from app.core.auth import get_current_user_snapshot
+from app.models.base import Base
+from app.models.auth import User
+from app.services.auth_service import AuthService, invalidate_user_snapshot
+import app.models  # noqa: F401  (register all mappers)
+
+
+class QueryCounter:
+    """Counts statements executed on an engine"""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    def reset(self):
+        self.count = 0
+
+
+def _bearer(token):
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+async def _expect_status(SessionLocal, token, status_code):
+    async with SessionLocal() as db:
+        try:
+            await get_current_user_snapshot(credentials=_bearer(token), db=db)
+            raise AssertionError(f"expected HTTP {status_code}")
+        except HTTPException as e:
+            assert e.status_code == status_code, e.status_code
+
+
+async def _snapshot_checks():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+    counter = QueryCounter(engine)
+    auth_service = AuthService()
+
+    async with SessionLocal() as db:
+        user = User(email="fastpath@test.com", hashed_password="x", full_name="Fast Path")
+        db.add(user)
+        await db.commit()
+    user_id = str(user.id)
+    token = auth_service.create_access_token({"sub": user_id})
+    invalidate_user_snapshot(user_id)
+
+    async def authenticate():
+        async with SessionLocal() as db:
+            return await get_current_user_snapshot(credentials=_bearer(token), db=db)
+
+    try:
+        counter.reset()
+        snapshot = await authenticate()
+        assert snapshot.id == user.id and snapshot.email == "fastpath@test.com"
+        assert counter.count == 1
+
+        # Repeat requests and concurrent WebSocket-style bursts are served from the cache
+        counter.reset()
+        await asyncio.gather(*[authenticate() for _ in range(20)])
+        assert counter.count == 0, counter.count
+
+        # Revoking tokens (password change / reset) drops the snapshot
+        async with SessionLocal() as db:
+            await auth_service.revoke_all_user_tokens(db, user_id)
+        counter.reset()
+        await authenticate()
+        assert counter.count == 1, counter.count
+
+        # Deactivation is seen on the very next request
+        async with SessionLocal() as db:
+            await deactivate_account(current_user=user, db=db)
+        await _expect_status(SessionLocal, token, 403)
+
+        await _expect_status(SessionLocal, "not-a-jwt", 401)
+        await _expect_status(SessionLocal, auth_service.create_access_token({"sub": "00000000-0000-0000-0000-000000000000"}), 401)
+    finally:
+        invalidate_user_snapshot(user_id)
+        await engine.dispose()
+
+
+def test_snapshot_cache_and_invalidation():
+    asyncio.run(_snapshot_checks())
+
+
+if __name__ == "__main__":
+    print("🧪 Testing cached auth snapshots")
+    asyncio.run(_snapshot_checks())
+    print("✅ Cached, invalidated on revoke/deactivate, bad tokens rejected")
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Round-trip regression test for chat turn persistence.
+
+A turn used to flush the new conversation and the user's message, re-read
+the history (including that message, only to drop it), then update and
+insert again before committing: 8 round trips for a turn in an existing
+conversation. This test counts the statements and commits each transport
+issues per turn, checks that both messages land in one batched INSERT and
+one COMMIT, that two turns started from the same conversation state both
+count, and that a failed generation writes nothing.
+"""
+
+import asyncio
+
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.models.base import Base
+from app.models.auth import User
+from app.models.chat import Conversation, ChatMessage
+from app.schemas.auth import UserSnapshot
+from app.schemas.chat import AIGenerationResponse, AIStreamChunk, SendMessageRequest, WebSocketMessage
+from app.api.v1.endpoints import chat as chat_module
+import app.models  # noqa: F401  (register all mappers)
+
+
+class RoundTripCounter:
+    """Records the verb of every statement and each COMMIT on an engine"""
+
+    def __init__(self, engine):
+        self.trips = []
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+        event.listen(engine.sync_engine, "commit", self._on_commit)
+
+    def _on_execute(self, conn, cursor, statement, *args):
+        self.trips.append(statement.split()[0])
+
+    def _on_commit(self, *args):
+        self.trips.append("COMMIT")
+
+    def reset(self):
+        self.trips = []
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, message):
+        self.sent.append(message)
+
+
+class FakeOllama:
+    """Stands in for the Ollama service, recording the history each turn was given"""
+
+    def __init__(self):
+        self.histories = []
+        self.fail = False
+
+    def _response(self, request):
+        self.histories.append([entry["content"] for entry in request.conversation_history])
+        if self.fail:
+            raise RuntimeError("model unavailable")
+        return AIGenerationResponse(
+            content=f"Reply to {request.user_message}",
+            token_count=5,
+            prompt_token_count=7,
+            model_used="fake",
+            generation_time_ms=1,
+            metadata={"fallback_used": False}
+        )
+
+    async def generate_response(self, request):
+        return self._response(request)
+
+    async def stream_response(self, request):
+        response = self._response(request)
+        yield AIStreamChunk(delta=response.content)
+        yield AIStreamChunk(done=True, response=response)
+
+
+async def _setup():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+
+    async with SessionLocal() as db:
+        user = User(email="turns@test.com", hashed_password="x", full_name="Turn Test")
+        db.add(user)
+        await db.commit()
+    return engine, SessionLocal, UserSnapshot.model_validate(user)
+
+
+async def _run_checks():
+    engine, SessionLocal, user = await _setup()
+    fake = FakeOllama()
+    original = chat_module.ollama_service
+    chat_module.ollama_service = fake
+    counter = RoundTripCounter(engine)
+    trips = {}
+    try:
+        # A new conversation: no history read, one INSERT each for the conversation and both messages
+        async with SessionLocal() as db:
+            await chat_module.send_message(SendMessageRequest(content="First message"), current_user=user, db=db)
+        async with SessionLocal() as db:
+            counter.reset()
+            response = await chat_module.send_message(SendMessageRequest(content="Start over"), current_user=user, db=db)
+        writes = [trip for trip in counter.trips if trip != "SELECT"]
+        assert writes == ["INSERT", "INSERT", "COMMIT"], counter.trips
+        trips["new_conversation"] = len(counter.trips)
+        conversation_id = response.conversation_id
+
+        # An existing conversation over REST: load it, then UPDATE + INSERT + COMMIT
+        async with SessionLocal() as db:
+            counter.reset()
+            await chat_module.send_message(
+                SendMessageRequest(content="Second message", conversation_id=conversation_id), current_user=user, db=db
+            )
+        assert counter.trips == ["SELECT", "UPDATE", "INSERT", "COMMIT"], counter.trips
+        assert fake.histories[-1] == ["Start over", "Reply to Start over"]
+        trips["rest_turn"] = len(counter.trips)
+
+        # The same over a WebSocket
+        async with SessionLocal() as db:
+            counter.reset()
+            await chat_module.process_websocket_message(
+                FakeWebSocket(),
+                WebSocketMessage(type="message", content="Over the socket", conversation_id=conversation_id),
+                user,
+                db
+            )
+        assert counter.trips == ["SELECT", "UPDATE", "INSERT", "COMMIT"], counter.trips
+        assert fake.histories[-1][-2:] == ["Second message", "Reply to Second message"]
+        trips["websocket_turn"] = len(counter.trips)
+
+        # Two tabs answering from the same conversation state: the SQL increment keeps both turns
+        chat_service = chat_module.chat_service
+        async with SessionLocal() as first_db, SessionLocal() as second_db:
+            turns = []
+            for db, content in ((first_db, "Tab one"), (second_db, "Tab two")):
+                conversation, is_new = await chat_service.get_or_create_conversation(db, user.id, conversation_id)
+                turns.append((db, await chat_service.start_turn(db, conversation, is_new, content)))
+            for db, turn in turns:
+                reply = AIGenerationResponse(
+                    content="Reply", token_count=1, model_used="fake", generation_time_ms=1, metadata=None
+                )
+                await chat_service.persist_turn(db, turn, reply)
+        assert turns[-1][1].conversation.message_count == 10
+
+        # A failed generation leaves neither the conversation nor the user's message behind
+        fake.fail = True
+        async with SessionLocal() as db:
+            counter.reset()
+            try:
+                await chat_module.send_message(SendMessageRequest(content="Lost turn"), current_user=user, db=db)
+                raise AssertionError("expected the turn to fail")
+            except Exception as e:
+                assert getattr(e, "status_code", None) == 500
+        assert "INSERT" not in counter.trips
+
+        async with SessionLocal() as db:
+            conversation = await db.get(Conversation, conversation_id)
+            stored = await db.scalar(
+                select(func.count(ChatMessage.id)).where(ChatMessage.conversation_id == conversation.id)
+            )
+            assert conversation.message_count == stored == 10
+            assert await db.scalar(select(func.count(Conversation.id))) == 2
+        return trips
+    finally:
+        chat_module.ollama_service = original
+        await engine.dispose()
+
+
+def test_chat_turn_round_trips():
+    asyncio.run(_run_checks())
+
+
+if __name__ == "__main__":
+    print("🧪 Counting database round trips per chat turn")
+    for name, count in asyncio.run(_run_checks()).items():
+        print(f"✅ {name}: {count} round trips")
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Tests for the Ollama circuit breaker.
+
+Drives the breaker through closed -> open -> half-open -> closed with a fake
+clock, checks that slow calls and repeated failed health probes trip it (a
+single failed probe does not), and that an open breaker makes OllamaService
+answer with the fallback without touching the network.
+"""
+
+import asyncio
+import time
+
+from app.core.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.schemas.chat import AIGenerationRequest
+from app.services.ollama_service import OllamaService
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _breaker(clock):
+    return CircuitBreaker("test", failure_rate=0.5, slow_call_seconds=5.0, slow_call_rate=0.8,
+                          window=10, min_calls=4, open_seconds=30.0, clock=clock)
+
+
+def _assert_short_circuits(breaker):
+    try:
+        breaker.before_call()
+        raise AssertionError("expected CircuitOpenError")
+    except CircuitOpenError:
+        pass
+
+
+def test_breaker_opens_on_error_rate_and_recovers():
+    clock = FakeClock()
+    breaker = _breaker(clock)
+
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_success(0.1)
+    breaker.before_call()
+    breaker.record_failure("boom")
+    assert breaker.state == CircuitBreaker.CLOSED  # Below min_calls
+    breaker.before_call()
+    breaker.record_failure("boom")
+    assert breaker.state == CircuitBreaker.OPEN  # 2 of 4 failed
+
+    _assert_short_circuits(breaker)
+    clock.now += 31
+
+    # One trial call at a time while half-open
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    _assert_short_circuits(breaker)
+    breaker.record_failure("still down")
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.now += 31
+    breaker.before_call()
+    breaker.record_success(0.2)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.stats()["times_opened"] == 2
+    assert breaker.stats()["short_circuited"] == 2
+
+
+def test_breaker_opens_on_slow_calls_and_probes():
+    clock = FakeClock()
+    breaker = _breaker(clock)
+    for _ in range(4):
+        breaker.before_call()
+        breaker.record_success(6.0)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # A passing probe lets the next call through as a trial
+    breaker.record_probe(True)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.before_call()
+    breaker.record_success(0.5)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    # One failed probe (e.g. a slow poll) doesn't open it, and an answered
+    # probe or call in between starts the count again
+    breaker.record_probe(False, "timed out")
+    breaker.record_probe(False, "timed out")
+    breaker.record_probe(True)
+    breaker.record_probe(False, "timed out")
+    breaker.before_call()
+    breaker.record_success(0.5)
+    breaker.record_probe(False, "timed out")
+    breaker.record_probe(False, "timed out")
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    # Three failed probes in a row open it
+    breaker.record_probe(False, "connection refused")
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.stats()["last_error"] == "connection refused"
+
+    # Half-open, a single failed probe reopens it
+    clock.now += 30.0
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.record_probe(False, "connection refused")
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+async def _fallback_checks():
+    service = OllamaService()
+    service.base_url = "http://127.0.0.1:9"  # Nothing listens here; gives the service its own pool
+    breaker = service.pool.backends[0].breaker
+    for _ in range(breaker.probe_failures):
+        breaker.record_probe(False, "down")
+    request = AIGenerationRequest(user_message="Hello there", system_prompt="You are my future self")
+    start = time.perf_counter()
+    response = await service.generate_response(request)
+    elapsed = time.perf_counter() - start
+
+    assert response.model_used == "fallback"
+    assert response.metadata["fallback_used"] is True
+
+    chunks = [chunk async for chunk in service.stream_response(request)]
+    assert chunks[-1].done and chunks[-1].response.model_used == "fallback"
+    return elapsed
+
+def test_open_breaker_skips_ollama():
+    elapsed = asyncio.run(_fallback_checks())
+    assert elapsed < 0.5  # No retries, sleeps or connection attempts
+
+
+if __name__ == "__main__":
+    print("🧪 Testing circuit breaker transitions")
+    test_breaker_opens_on_error_rate_and_recovers()
+    test_breaker_opens_on_slow_calls_and_probes()
+    print("✅ Closed -> open -> half-open -> closed")
+    print("🧪 Testing fallback while open")
+    elapsed = asyncio.run(_fallback_checks())
+    print(f"✅ Fallback returned in {elapsed * 1000:.1f} ms")
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Tests for reusing Ollama's context between turns of a conversation.
+
+Checks that a saved context is only reused while it, the next turn's prompt
+and a full-length reply fit in ``num_ctx`` (one token over and the full
+prompt is rebuilt from budgeted history instead), and that a context with
+no room left for any follow-up is not saved at all.
+"""
+
+from app.schemas.chat import AIGenerationRequest
+from app.services.ollama_service import OllamaService, conversation_contexts
+
+
+def _request(message, history_length):
+    return AIGenerationRequest(
+        user_message=message,
+        system_prompt="You are the user's future self.",
+        conversation_id="conversation-1",
+        history_length=history_length,
+        conversation_history=[{"role": "user", "content": "Earlier", "token_count": None}]
+    )
+
+
+def test_context_reuse_reserves_room_for_turn_and_reply():
+    service = OllamaService()
+    conversation_contexts.clear()
+    message = "Tell me how the habits we talked about are going this week, and what to focus on next. " * 3
+    turn_tokens = service._estimate_token_count(service._format_turn_prompt(message))
+    room = service.max_context_length - service.generation_params["max_tokens"]
+
+    # Exactly enough room for the new message and a full reply: reused
+    service._save_context(_request("Earlier", 0), {"context": [1] * (room - turn_tokens)})
+    prompt, context = service._prepare_prompt(_request(message, 2))
+    assert context is not None and len(context) == room - turn_tokens
+    assert "Earlier" not in prompt
+
+    # One token more and the reply could push the start of the context out: rebuilt
+    service._save_context(_request("Earlier", 0), {"context": [1] * (room - turn_tokens + 1)})
+    prompt, context = service._prepare_prompt(_request(message, 2))
+    assert context is None and "Earlier" in prompt
+    assert conversation_contexts.get("conversation-1", version=service._context_version(_request(message, 2))) is None
+
+    # No room for even a short follow-up: not saved
+    service._save_context(_request("Earlier", 0), {"context": [1] * (room - service.prompt_overhead_tokens + 1)})
+    assert service._prepare_prompt(_request("Hi", 2))[1] is None
+    conversation_contexts.clear()
+
+
+if __name__ == "__main__":
+    print("🧪 Testing context reuse against the context window")
+    test_context_reuse_reserves_room_for_turn_and_reply()
+    print("✅ Contexts are reused only while the next turn and a full reply fit")
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Query-count regression test for the conversation list endpoints.
+
+GET /chat/conversations and PUT /chat/conversations/{id} used to issue two
+extra queries per conversation (message count + last message). This test
+seeds an in-memory SQLite database, counts the statements each endpoint
+executes and checks that the count no longer depends on the page size. It
+also checks the denormalized message stats that the list reads from, and
+that cursor pagination walks every row exactly once (including cursors
+built from the timezone-aware timestamps PostgreSQL returns).
+"""
+
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.core.pagination import decode_cursor, encode_cursor
+from app.models.base import Base
+from app.models.auth import User
+from app.models.chat import Conversation, ChatMessage, MessageRole
+from app.schemas.chat import ChatHistoryResponse, ConversationUpdate
+from app.services.chat_service import ChatService
+from app.api.v1.endpoints.chat import get_conversations, update_conversation, get_chat_history
+import app.models  # noqa: F401  (register all mappers)
+
+CONVERSATIONS = 25
+MESSAGES_PER_CONVERSATION = 3
+
+
+class QueryCounter:
+    """Counts statements executed on an engine"""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    def reset(self):
+        self.count = 0
+
+
+async def _seed(SessionLocal):
+    base_time = datetime(2024, 1, 1)
+    async with SessionLocal() as db:
+        user = User(email="queries@test.com", hashed_password="x", full_name="Query Test")
+        other = User(email="other@test.com", hashed_password="x", full_name="Other User")
+        db.add_all([user, other])
+        await db.flush()
+
+        for i in range(CONVERSATIONS):
+            conversation = Conversation(user_id=user.id, title=f"Chat {i}", updated_at=base_time + timedelta(hours=i))
+            db.add(conversation)
+            await db.flush()
+            for j in range(MESSAGES_PER_CONVERSATION):
+                db.add(ChatMessage(
+                    conversation_id=conversation.id,
+                    role=MessageRole.USER if j % 2 == 0 else MessageRole.ASSISTANT,
+                    content=f"Message {j}",
+                    created_at=base_time + timedelta(hours=i, minutes=j)
+                ))
+
+        # Messages in another user's conversation must not leak into the counts
+        other_conversation = Conversation(user_id=other.id, title="Other chat")
+        db.add(other_conversation)
+        await db.flush()
+        db.add(ChatMessage(conversation_id=other_conversation.id, role=MessageRole.USER, content="Not yours"))
+
+        # An empty conversation falls back to created_at for last_message_at
+        empty = Conversation(user_id=user.id, title="Empty chat", updated_at=base_time - timedelta(days=1))
+        db.add(empty)
+        await db.flush()
+
+        # Messages were inserted directly, so derive the stats like the backfill script
+        await ChatService().repair_conversation_stats(db)
+        await db.commit()
+        return user.id
+
+
+async def _setup():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    SessionLocal = async_sessionmaker(bind=engine, expire_on_commit=False)
+    user_id = await _seed(SessionLocal)
+    return engine, SessionLocal, user_id
+
+
+async def _run_checks():
+    engine, SessionLocal, user_id = await _setup()
+    try:
+        counter = QueryCounter(engine)
+
+        async with SessionLocal() as db:
+            user = await db.get(User, user_id)
+
+            query_counts = {}
+            for limit in (5, 20):
+                counter.reset()
+                page = await get_conversations(limit=limit, offset=0, include_archived=False, current_user=user, db=db)
+                query_counts[limit] = counter.count
+                assert len(page.conversations) == limit
+
+            assert query_counts[5] == query_counts[20], f"Query count grows with page size: {query_counts}"
+            assert query_counts[20] <= 2, f"Expected at most 2 queries per page, got {query_counts[20]}"
+
+            page = await get_conversations(limit=50, offset=0, include_archived=False, current_user=user, db=db)
+            assert page.total_count == CONVERSATIONS + 1
+            assert not page.has_more
+            newest = page.conversations[0]
+            assert newest.title == f"Chat {CONVERSATIONS - 1}"
+            assert newest.message_count == MESSAGES_PER_CONVERSATION
+            assert newest.last_message_preview == f"Message {MESSAGES_PER_CONVERSATION - 1}"
+            assert newest.last_message_at == datetime(2024, 1, 1) + timedelta(
+                hours=CONVERSATIONS - 1, minutes=MESSAGES_PER_CONVERSATION - 1
+            )
+            empty = page.conversations[-1]
+            assert empty.message_count == 0
+            assert empty.last_message_at == empty.created_at
+
+            counter.reset()
+            summary = await update_conversation(
+                conversation_id=newest.id,
+                request=ConversationUpdate(title="Renamed"),
+                current_user=user,
+                db=db
+            )
+            assert summary.title == "Renamed"
+            assert summary.message_count == MESSAGES_PER_CONVERSATION
+            # Load + update
+            assert counter.count <= 2, f"Expected at most 2 queries for update, got {counter.count}"
+
+            # New messages keep the stats current without a recount
+            chat_service = ChatService()
+            conversation = await db.get(Conversation, empty.id)
+            await chat_service.add_user_message(db, conversation, "Hello there")
+            await db.commit()
+            page = await get_conversations(limit=50, offset=0, include_archived=False, current_user=user, db=db)
+            refreshed = next(c for c in page.conversations if c.id == empty.id)
+            assert refreshed.message_count == 1
+            assert refreshed.last_message_preview == "Hello there"
+
+        return query_counts
+    finally:
+        await engine.dispose()
+
+
+async def _run_cursor_checks():
+    engine, SessionLocal, user_id = await _setup()
+    try:
+        async with SessionLocal() as db:
+            user = await db.get(User, user_id)
+            offset_page = await get_conversations(limit=100, offset=0, include_archived=False, current_user=user, db=db)
+            expected = [c.id for c in offset_page.conversations]
+
+            seen, cursor, pages = [], None, 0
+            while True:
+                page = await get_conversations(
+                    limit=7, offset=0, include_archived=False, cursor=cursor, current_user=user, db=db
+                )
+                pages += 1
+                seen.extend(c.id for c in page.conversations)
+                if pages > 1:
+                    assert page.total_count is None  # Only counted on request in cursor mode
+                if not page.has_more:
+                    assert page.next_cursor is None
+                    break
+                cursor = page.next_cursor
+            assert seen == expected, "Cursor pages must match offset order without gaps or duplicates"
+
+            # Messages sharing a timestamp are ordered by id, so none are skipped
+            conversation = Conversation(user_id=user.id, title="Burst")
+            db.add(conversation)
+            await db.flush()
+            burst_time = datetime(2024, 6, 1)
+            for i in range(9):
+                db.add(ChatMessage(
+                    conversation_id=conversation.id, role=MessageRole.USER, content=f"Burst {i}", created_at=burst_time
+                ))
+            await db.commit()
+
+            seen, cursor = [], None
+            while True:
+                response = await get_chat_history(
+                    conversation_id=str(conversation.id), limit=4, offset=0, include_system_messages=False,
+                    cursor=cursor, include_total=True, current_user=user, db=db
+                )
+                page = ChatHistoryResponse.model_validate_json(response.body)
+                assert page.total_count == 9
+                seen.extend(m.id for m in page.messages)
+                if not page.has_more:
+                    break
+                cursor = page.next_cursor
+            assert len(seen) == len(set(seen)) == 9
+    finally:
+        await engine.dispose()
+
+
+def test_conversation_list_query_count():
+    asyncio.run(_run_checks())
+
+
+def test_cursor_pagination():
+    asyncio.run(_run_cursor_checks())
+
+
+def test_cursor_from_aware_timestamp():
+    # PostgreSQL's TIMESTAMPTZ columns load as aware datetimes
+    row_id = uuid.uuid4()
+    aware = datetime(2024, 3, 1, 14, 30, 5, 123456, tzinfo=timezone(timedelta(hours=2)))
+    sort_value, decoded_id = decode_cursor(encode_cursor(aware, row_id))
+    assert sort_value == datetime(2024, 3, 1, 12, 30, 5, 123456) and sort_value.tzinfo is None
+    assert decoded_id == row_id
+
+    naive = datetime(2024, 3, 1, 12, 30, 5)
+    assert decode_cursor(encode_cursor(naive, row_id))[0] == naive
+
+
+if __name__ == "__main__":
+    print("🧪 Testing conversation list query counts")
+    counts = asyncio.run(_run_checks())
+    print(f"✅ Queries per page: {counts}")
+    print("🧪 Testing cursor pagination")
+    asyncio.run(_run_cursor_checks())
+    print("✅ Cursor pages cover every row exactly once")
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-conversation hot window of recent messages.
+
+Checks that turns in an active conversation build their history without
+reading chat_messages, that a turn written elsewhere (another worker) or a
+new summary makes the window stale so it is reloaded once, that an evicted
+or expired window falls back to the same history from the database, that
+the ring buffer never grows past the history window, and that a session
+kept open across turns (as the WebSocket handler does) still sees turns
+written by other sessions.
+"""
+
+import asyncio
+
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.models.base import Base
+from app.models.auth import User
+from app.models.chat import Conversation, ChatMessage
+from app.schemas.chat import AIGenerationResponse
+from app.services.chat_service import ChatService, conversation_windows
+import app.models  # noqa: F401  (register all mappers)
+
+
+class HistoryReadCounter:
+    """Counts SELECTs against chat_messages on an engine"""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, *args):
+        if statement.startswith("SELECT") and "FROM chat_messages" in statement:
+            self.count += 1
+
+    def reset(self):
+        self.count = 0
+
+
+def _reply(content):
+    return AIGenerationResponse(
+        content=f"Reply to {content}", token_count=3, model_used="fake", generation_time_ms=1, metadata=None
+    )
+
+
+async def _turn_in(chat_service, db, user_id, conversation_id, content):
+    """Run one turn on ``db`` the way the chat endpoints do and return the history it was given"""
+    conversation, is_new = await chat_service.get_or_create_conversation(db, user_id, conversation_id)
+    turn = await chat_service.start_turn(db, conversation, is_new, content)
+    await chat_service.persist_turn(db, turn, _reply(content))
+    return conversation.id, [entry["content"] for entry in turn.history]
+
+
+async def _turn(chat_service, SessionLocal, user_id, conversation_id, content):
+    """Run one turn in a session of its own, like a REST request"""
+    async with SessionLocal() as db:
+        return await _turn_in(chat_service, db, user_id, conversation_id, content)
+
+
+async def _run_checks():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+    counter = HistoryReadCounter(engine)
+    conversation_windows.clear()
+
+    chat_service = ChatService()
+    chat_service.history_window = 4
+    try:
+        async with SessionLocal() as db:
+            user = User(email="window@test.com", hashed_password="x", full_name="Window Test")
+            db.add(user)
+            await db.commit()
+
+        # An active conversation never reads its history back
+        conversation_id, _ = await _turn(chat_service, SessionLocal, user.id, None, "One")
+        for content in ("Two", "Three", "Four"):
+            _, history = await _turn(chat_service, SessionLocal, user.id, conversation_id, content)
+        assert counter.count == 0, counter.count
+        # Bounded to the last history_window messages
+        assert history == ["Two", "Reply to Two", "Three", "Reply to Three"]
+        assert len(conversation_windows.get(conversation_id)) == 4
+
+        # A message written without this worker's window (as another worker would) bumps the version
+        async with SessionLocal() as db:
+            conversation = await db.get(Conversation, conversation_id)
+            await chat_service.add_user_message(db, conversation, "From another worker")
+            await db.commit()
+        stale_before = conversation_windows.stale
+        _, history = await _turn(chat_service, SessionLocal, user.id, conversation_id, "Five")
+        assert counter.count == 1 and conversation_windows.stale == stale_before + 1
+        assert history == ["Reply to Three", "Four", "Reply to Four", "From another worker"]
+        _, history = await _turn(chat_service, SessionLocal, user.id, conversation_id, "Six")
+        assert counter.count == 1  # Warm again
+        assert history[-2:] == ["Five", "Reply to Five"]
+
+        # An evicted or expired window is rebuilt from the database with the same contents
+        conversation_windows.invalidate(conversation_id)
+        async with SessionLocal() as db:
+            conversation = await db.get(Conversation, conversation_id)
+            rebuilt = await chat_service.get_recent_history(db, conversation)
+        assert counter.count == 2
+        assert [entry["content"] for entry in rebuilt] == ["Five", "Reply to Five", "Six", "Reply to Six"]
+
+        # A new summary checkpoint also invalidates, and summarized messages drop out
+        async with SessionLocal() as db:
+            conversation = await db.get(Conversation, conversation_id)
+            conversation.summary = "Earlier turns"
+            conversation.summary_message_count = conversation.message_count - 2
+            await db.commit()
+        _, history = await _turn(chat_service, SessionLocal, user.id, conversation_id, "Seven")
+        assert counter.count == 3
+        assert history == ["Six", "Reply to Six"]
+
+        # One session held across turns, like a WebSocket, interleaved with turns from another tab
+        conversation_windows.clear()
+        conversation_id, _ = await _turn(chat_service, SessionLocal, user.id, None, "Socket")
+        async with SessionLocal() as socket_db:
+            # Holding the loaded row keeps it in the session's identity map between turns
+            socket_conversation = await socket_db.get(Conversation, conversation_id)
+            for i in range(3):
+                _, history = await _turn_in(chat_service, socket_db, user.id, conversation_id, f"Socket {i}")
+                assert history[-2:] == [f"Tab {i - 1}", f"Reply to Tab {i - 1}"] if i else history[-1] == "Reply to Socket"
+                await _turn(chat_service, SessionLocal, user.id, conversation_id, f"Tab {i}")
+        async with SessionLocal() as db:
+            conversation = await db.get(Conversation, conversation_id)
+            stored = await db.scalar(
+                select(func.count(ChatMessage.id)).where(ChatMessage.conversation_id == conversation_id)
+            )
+            assert conversation.message_count == stored == 14, (conversation.message_count, stored)
+        assert socket_conversation.message_count == 12  # Refreshed by each turn's load, before the last tab turn
+        return conversation_windows.stats()
+    finally:
+        await engine.dispose()
+
+
+def test_conversation_window():
+    asyncio.run(_run_checks())
+
+
+if __name__ == "__main__":
+    print("🧪 Testing the hot conversation window")
+    print(f"✅ Window cache stats: {asyncio.run(_run_checks())}")
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Tests for the daily message batch generator.
+
+Seeds users with each message frequency into an in-memory SQLite database
+and runs the batch against a stand-in for Ollama. Checks who gets a message
+on a weekly day and an ordinary day, that concurrent generations stay within
+the limit, that a failed generation is retried by the next run, that a
+re-run does not duplicate messages, and that only one of several workers'
+schedulers runs a given day's batch.
+"""
+
+import asyncio
+from datetime import date
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.core.config import settings
+from app.models.base import Base
+from app.models.auth import User
+from app.models.content import DailyMessage
+from app.models.onboarding import OnboardingData
+from app.jobs import InMemoryJobQueue
+from app.jobs import queue as jobs
+from app.services.daily_message_service import DailyMessageScheduler, DailyMessageService
+import app.models  # noqa: F401  (register all mappers)
+
+WEEKLY_DAY = date(2024, 1, 1)  # a Monday
+ORDINARY_DAY = date(2024, 1, 2)
+
+
+class StubOllama:
+    """Records peak concurrency and can fail chosen prompts once"""
+
+    def __init__(self, fail_once_for=()):
+        self.in_flight = 0
+        self.peak = 0
+        self.calls = 0
+        self.fail_once_for = set(fail_once_for)
+
+    async def generate_daily_message(self, system_prompt, message_type="motivational"):
+        self.calls += 1
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            for name in list(self.fail_once_for):
+                if name in system_prompt:
+                    self.fail_once_for.discard(name)
+                    raise RuntimeError("Ollama unavailable")
+            return "You are closer than you think."
+        finally:
+            self.in_flight -= 1
+
+
+async def _seed(SessionLocal):
+    frequencies = ["daily"] * 7 + ["weekly"] * 3 + ["as_needed"] * 2
+    async with SessionLocal() as db:
+        for i, frequency in enumerate(frequencies):
+            user = User(email=f"daily{i}@test.com", hashed_password="x", full_name=f"Daily {i}")
+            db.add(user)
+            await db.flush()
+            db.add(OnboardingData(user_id=user.id, name=f"Person{i:02d}", message_frequency=frequency))
+
+        # Inactive users and users without onboarding get nothing
+        db.add(User(email="inactive@test.com", hashed_password="x", full_name="Inactive", is_active=False))
+        db.add(User(email="new@test.com", hashed_password="x", full_name="New"))
+        await db.commit()
+
+
+async def _count(db, day):
+    return await db.scalar(
+        select(func.count()).select_from(DailyMessage).where(DailyMessage.scheduled_for == day)
+    )
+
+
+async def _run_checks():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    SessionLocal = async_sessionmaker(bind=engine, expire_on_commit=False)
+    await _seed(SessionLocal)
+
+    weekly_day = settings.DAILY_MESSAGE_WEEKLY_DAY
+    settings.DAILY_MESSAGE_WEEKLY_DAY = WEEKLY_DAY.weekday()
+    stub = StubOllama(fail_once_for=["Person01"])
+    service = DailyMessageService(ollama_service=stub)
+    service.concurrency = 3
+    service.batch_size = 4  # several bulk inserts
+
+    try:
+        async with SessionLocal() as db:
+            stats = await service.generate_for_day(db, WEEKLY_DAY)
+            assert stats == {"users": 10, "generated": 9, "failed": 1}, stats
+            assert stub.peak <= 3, stub.peak
+
+            # The failed user is picked up again; nobody else is regenerated
+            stats = await service.generate_for_day(db, WEEKLY_DAY)
+            assert stats == {"users": 1, "generated": 1, "failed": 0}, stats
+            assert await _count(db, WEEKLY_DAY) == 10
+
+            stats = await service.generate_for_day(db, WEEKLY_DAY)
+            assert stats["users"] == 0
+
+            # Weekly users are skipped on other days
+            stats = await service.generate_for_day(db, ORDINARY_DAY)
+            assert stats["generated"] == 7, stats
+
+            user_id = await db.scalar(select(User.id).where(User.email == "daily0@test.com"))
+            message = await service.get_daily_message(db, user_id, ORDINARY_DAY)
+            assert message is not None and message.message
+            inactive_id = await db.scalar(select(User.id).where(User.email == "inactive@test.com"))
+            assert await service.get_daily_message(db, inactive_id, ORDINARY_DAY) is None
+        return stub.calls, stub.peak
+    finally:
+        settings.DAILY_MESSAGE_WEEKLY_DAY = weekly_day
+        await engine.dispose()
+
+
+def test_daily_message_batch():
+    asyncio.run(_run_checks())
+
+
+async def _scheduler_checks():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    SessionLocal = async_sessionmaker(bind=engine, expire_on_commit=False)
+    await _seed(SessionLocal)
+
+    stub = StubOllama()
+    # One scheduler per API worker, all sharing the broker
+    schedulers = [DailyMessageScheduler(DailyMessageService(ollama_service=stub)) for _ in range(3)]
+    jobs.job_queue = InMemoryJobQueue()
+    try:
+        results = await asyncio.gather(*[
+            scheduler.run_once(ORDINARY_DAY, SessionLocal) for scheduler in schedulers
+        ])
+        assert sorted(results, key=bool) == [None, None, {"users": 7, "generated": 7, "failed": 0}], results
+        assert stub.calls == 7, stub.calls
+
+        # The next day is claimed afresh
+        assert await schedulers[1].run_once(date(2024, 1, 3), SessionLocal) is not None
+    finally:
+        await jobs.job_queue.close()
+        jobs.job_queue = None
+        await engine.dispose()
+
+
+def test_scheduler_runs_batch_on_one_worker():
+    asyncio.run(_scheduler_checks())
+
+
+if __name__ == "__main__":
+    print("🧪 Testing daily message batch generation")
+    calls, peak = asyncio.run(_run_checks())
+    print(f"✅ {calls} generations, at most {peak} in flight")
+    asyncio.run(_scheduler_checks())
+    print("✅ Only one worker runs each day's batch")
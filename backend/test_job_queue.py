@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Tests for the background job worker on the in-process queue.
+
+Covers a job that succeeds first time, one that fails once and succeeds on
+its retry, and one that keeps failing until it is dead-lettered; that a
+worker survives the broker failing to ack a job; that a
+summarization job is queued once per conversation while one is pending; and
+(when a Redis server is reachable) that a job whose worker died mid-run is
+requeued once its lease expires.
+"""
+
+import asyncio
+import uuid
+
+from app.core.config import settings
+from app.jobs import InMemoryJobQueue, Job, JobWorker, job_handler
+from app.jobs import queue as queue_module
+from app.models.chat import Conversation
+from app.services.summarizer_service import conversation_summarizer
+
+calls = {"ok": 0, "flaky": 0, "broken": 0}
+
+
+@job_handler("test_ok")
+async def ok_job(value: int):
+    calls["ok"] += value
+
+
+@job_handler("test_flaky")
+async def flaky_job():
+    calls["flaky"] += 1
+    if calls["flaky"] == 1:
+        raise RuntimeError("transient failure")
+
+
+@job_handler("test_broken")
+async def broken_job():
+    calls["broken"] += 1
+    raise RuntimeError("permanent failure")
+
+
+async def _drain(queue: InMemoryJobQueue, timeout: float = 5.0):
+    """Wait until nothing is queued or waiting for a retry"""
+    async def empty():
+        while True:
+            await queue.join()
+            # Retries are scheduled before the failed attempt is acked, so
+            # once joined an empty queue means no more work is coming
+            if not await queue.size():
+                return
+            await asyncio.sleep(0.01)
+    await asyncio.wait_for(empty(), timeout)
+
+
+async def _run_checks():
+    queue = InMemoryJobQueue()
+    worker = JobWorker(queue, concurrency=2, retry_base_delay=0.01)
+    worker.start()
+    try:
+        await queue.enqueue(Job(name="test_ok", payload={"value": 2}))
+        await queue.enqueue(Job(name="test_flaky"))
+        await queue.enqueue(Job(name="test_broken", max_attempts=3))
+        await queue.enqueue(Job(name="test_missing"))
+        await _drain(queue)
+
+        assert calls == {"ok": 2, "flaky": 2, "broken": 3}, calls
+        dead = await queue.dead_letters()
+        assert sorted(job.name for job in dead) == ["test_broken", "test_missing"]
+        assert all(job.last_error for job in dead)
+        stats = worker.stats()
+        assert stats["succeeded"] == 2
+        assert stats["retried"] == 3  # flaky once, broken twice
+        assert stats["dead_lettered"] == 2
+        return stats
+    finally:
+        await worker.stop()
+        await queue.close()
+
+
+class FlakyAckQueue(InMemoryJobQueue):
+    """Fails the first ack, as a broker connection drop would"""
+
+    def __init__(self):
+        super().__init__()
+        self.failed_acks = 0
+
+    async def ack(self, job: Job):
+        if not self.failed_acks:
+            self.failed_acks += 1
+            raise ConnectionError("broker connection lost")
+        await super().ack(job)
+
+
+async def _ack_failure_checks():
+    queue = FlakyAckQueue()
+    worker = JobWorker(queue, concurrency=1, retry_base_delay=0.01)
+    calls["ok"] = 0
+    worker.start()
+    try:
+        await queue.enqueue(Job(name="test_ok", payload={"value": 1}))
+        await queue.enqueue(Job(name="test_ok", payload={"value": 1}))
+
+        async def both_ran():
+            while calls["ok"] < 2:
+                await asyncio.sleep(0.01)
+        await asyncio.wait_for(both_ran(), 5.0)
+        assert queue.failed_acks == 1
+        assert all(not task.done() for task in worker._tasks)
+    finally:
+        await worker.stop()
+        await queue.close()
+
+
+async def _dedup_checks():
+    queue = InMemoryJobQueue()
+    original = queue_module.job_queue
+    queue_module.job_queue = queue
+    try:
+        conversation = Conversation(id=uuid.uuid4(), message_count=30, summary_message_count=0)
+        # Every turn past the threshold schedules, but only the first queues a job
+        for _ in range(5):
+            await conversation_summarizer.schedule(conversation)
+        assert await queue.size() == 1
+
+        # The key is held through retries and released once the job is finished
+        job = await queue.dequeue()
+        worker = JobWorker(queue, retry_base_delay=0.01)
+        job.name, job.payload = "test_flaky", {}
+        calls["flaky"] = 0
+        await worker.run(job)
+        await conversation_summarizer.schedule(conversation)
+        assert await queue.size() == 1  # Only the retry
+        await worker.run(await queue.dequeue())
+        await conversation_summarizer.schedule(conversation)
+        assert await queue.size() == 1 and (await queue.dequeue()).name == "summarize_conversation"
+    finally:
+        queue_module.job_queue = original
+        await queue.close()
+
+
+async def _redis_reaper_checks():
+    """A crashed worker's job comes back after its lease; returns None when no Redis server is reachable"""
+    from app.jobs.redis_queue import RedisJobQueue
+
+    queue = RedisJobQueue(settings.REDIS_URL, prefix=f"test:jobs:{uuid.uuid4()}", visibility_timeout=60)
+    try:
+        await asyncio.wait_for(queue.ping(), 1.0)
+    except Exception:
+        await queue.close()
+        return None
+
+    try:
+        await queue.enqueue(Job(name="test_ok", payload={"value": 1}))
+        crashed = await queue.dequeue()  # Never acked, as if the worker died
+        assert await queue.requeue_expired() == 0  # Lease still valid
+        assert await queue.requeue_expired(now=queue._next_reap + 60) == 1
+        again = await queue.dequeue()
+        assert again.id == crashed.id
+        await queue.ack(again)
+        assert await queue.requeue_expired(now=queue._next_reap + 120) == 0
+        return True
+    finally:
+        await queue.client.delete(queue.ready_key, queue.processing_key, queue.leases_key)
+        await queue.close()
+
+
+def test_job_retries_and_dead_letters():
+    asyncio.run(_run_checks())
+
+
+def test_worker_survives_ack_failure():
+    asyncio.run(_ack_failure_checks())
+
+
+def test_summarize_jobs_deduplicated():
+    asyncio.run(_dedup_checks())
+
+
+def test_redis_requeues_expired_jobs():
+    asyncio.run(_redis_reaper_checks())
+
+
+if __name__ == "__main__":
+    print("🧪 Testing background job retries and dead-lettering")
+    stats = asyncio.run(_run_checks())
+    print(f"✅ Worker stats: {stats}")
+    asyncio.run(_ack_failure_checks())
+    print("✅ Workers keep running when the broker fails to ack")
+    asyncio.run(_dedup_checks())
+    print("✅ One summarization job per conversation while one is pending")
+    print("🧪 Testing crashed-worker recovery over Redis")
+    print("✅ Expired jobs are requeued" if asyncio.run(_redis_reaper_checks()) else "⚠️ Redis not reachable, skipped")
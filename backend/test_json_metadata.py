@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Tests for native JSON metadata columns.
+
+Checks that message and activity metadata round-trip as dicts without
+per-row parsing in the read paths, that None is stored as SQL NULL, that
+rows written as JSON text before the column type changed still load, and
+that GET /chat/history can filter on ``fallback_used`` in the database
+(JSON_EXTRACT on SQLite, ``->>`` on PostgreSQL's JSONB).
+"""
+
+import asyncio
+
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.models.base import Base
+from app.models.auth import User
+from app.models.chat import Conversation, ChatMessage, MessageRole
+from app.models.ai_personality import UserActivity
+from app.schemas.chat import ChatHistoryResponse, ConversationDetail
+from app.api.v1.endpoints.chat import get_conversation_detail, get_chat_history
+import app.models  # noqa: F401  (register all mappers)
+
+
+async def _run_checks():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+    try:
+        async with SessionLocal() as db:
+            user = User(email="json@test.com", hashed_password="x", full_name="JSON Test")
+            db.add(user)
+            await db.flush()
+            conversation = Conversation(user_id=user.id, title="Metadata")
+            db.add(conversation)
+            await db.flush()
+            db.add_all([
+                ChatMessage(conversation_id=conversation.id, role=MessageRole.USER, content="Hi"),
+                ChatMessage(
+                    conversation_id=conversation.id, role=MessageRole.ASSISTANT, content="Sorry, I'm offline",
+                    message_metadata={"fallback_used": True, "error": "connection refused"}
+                ),
+                ChatMessage(
+                    conversation_id=conversation.id, role=MessageRole.ASSISTANT, content="Real reply",
+                    message_metadata={"fallback_used": False, "model_used": "llama3.1:8b"}
+                ),
+            ])
+            activity = UserActivity(user_id=user.id, activity_type="chat")
+            activity.add_activity_data("conversation_id", str(conversation.id))
+            db.add(activity)
+            await db.commit()
+
+            # A row written as JSON text by the previous column type still loads as a dict
+            await db.execute(text(
+                "INSERT INTO chat_messages (id, conversation_id, role, content, message_metadata, created_at, updated_at) "
+                "VALUES ('00000000-0000-0000-0000-000000000001', :conversation_id, 'ASSISTANT', 'Legacy', "
+                "'{\"fallback_used\": true}', CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"
+            ), {"conversation_id": str(conversation.id)})
+            await db.commit()
+
+            null_count = await db.scalar(
+                select(func.count()).select_from(ChatMessage).where(ChatMessage.message_metadata.is_(None))
+            )
+            assert null_count == 1  # The user message's None became SQL NULL
+
+            stored = await db.get(UserActivity, activity.id)
+            assert stored.activity_data == {"conversation_id": str(conversation.id)}
+
+        async with SessionLocal() as db:
+            response = await get_conversation_detail(conversation_id=str(conversation.id), current_user=user, db=db)
+            detail = ConversationDetail.model_validate_json(response.body)
+            by_content = {message.content: message.metadata for message in detail.messages}
+            assert by_content["Hi"] is None
+            assert by_content["Sorry, I'm offline"]["error"] == "connection refused"
+            assert by_content["Legacy"] == {"fallback_used": True}
+
+            async def history(fallback_used):
+                response = await get_chat_history(
+                    conversation_id=str(conversation.id), limit=10, offset=0, include_system_messages=False,
+                    cursor=None, include_total=True, fallback_used=fallback_used, current_user=user, db=db
+                )
+                page = ChatHistoryResponse.model_validate_json(response.body)
+                return page.total_count, sorted(message.content for message in page.messages)
+
+            assert await history(True) == (2, ["Legacy", "Sorry, I'm offline"])
+            assert await history(False) == (2, ["Hi", "Real reply"])  # Messages without the key count as False
+            assert (await history(None))[0] == 4
+
+        # On PostgreSQL the same filter is a JSONB key lookup
+        flag = func.coalesce(ChatMessage.message_metadata["fallback_used"].as_boolean(), False)
+        compiled = str(select(ChatMessage.id).where(flag == True).compile(dialect=postgresql.dialect()))  # noqa: E712
+        assert "message_metadata ->> " in compiled and "AS BOOLEAN" in compiled
+        return compiled
+    finally:
+        await engine.dispose()
+
+
+def test_json_metadata():
+    asyncio.run(_run_checks())
+
+
+if __name__ == "__main__":
+    print("🧪 Testing native JSON metadata")
+    compiled = asyncio.run(_run_checks())
+    print(f"✅ PostgreSQL filter: {' '.join(compiled.split())}")
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Tests for routing Ollama calls across several instances.
+
+Checks the routing rules on a pool with no network (warm model preference,
+least outstanding requests, sticky conversations, ejection of an unhealthy
+instance), then runs OllamaService against three fake Ollama servers to see
+load spread out, conversations stay put, and a stopped server get skipped.
+"""
+
+import asyncio
+
+from app.core.config import Settings
+from app.core.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.services.ollama_pool import OllamaPool
+from app.services.ollama_service import OllamaService, close_ollama_client, get_ollama_client, init_ollama_client
+from benchmarks.fake_ollama import FakeOllamaServer
+
+MODEL = "mistral:7b"
+
+
+def _pool(urls, max_outstanding=2):
+    return OllamaPool(urls, max_outstanding=max_outstanding,
+                      breaker_factory=lambda url: CircuitBreaker(url, min_calls=2, open_seconds=30.0, probe_failures=1),
+                      sticky_cache_name="test_sticky_routes")
+
+
+def test_pool_prefers_warm_then_least_outstanding():
+    pool = _pool([f"http://ollama-{n}:11434" for n in range(3)])
+    cold, warm_a, warm_b = pool.backends
+    warm_a.loaded_models = {MODEL}
+    warm_b.loaded_models = {MODEL}
+
+    warm_a.outstanding = 1
+    assert pool.choose(MODEL) is warm_b  # Least busy of the instances holding the model
+
+    warm_b.outstanding = 2
+    assert pool.choose(MODEL) is warm_a  # Still warm and under max_outstanding
+
+    warm_a.outstanding = 2
+    assert pool.choose(MODEL) is cold  # Warm ones are saturated; spill over
+
+    assert pool.choose("other:1b") is cold  # Nobody has it loaded; least outstanding wins
+
+
+def test_pool_sticky_routing_and_ejection():
+    pool = _pool([f"http://ollama-{n}:11434" for n in range(3)])
+    first = pool.choose(MODEL, sticky_key="conversation-1")
+    first.outstanding = 5  # Busier than the rest, but holds the conversation's cache
+    assert pool.choose(MODEL, sticky_key="conversation-1") is first
+
+    first.breaker.record_probe(False, "connection refused")
+    moved = pool.choose(MODEL, sticky_key="conversation-1")
+    assert moved is not first
+    assert pool.choose(MODEL, sticky_key="conversation-1") is moved  # Sticks to its new home
+
+    for backend in pool.backends:
+        backend.breaker.record_probe(False, "down")
+    assert not pool.has_available()
+    try:
+        pool.choose(MODEL)
+        raise AssertionError("expected CircuitOpenError")
+    except CircuitOpenError:
+        pass
+    assert pool.stats()["short_circuited"] == 1
+
+
+def test_base_urls_setting_forms(monkeypatch):
+    for value in ("http://a:11434, http://b:11434", '["http://a:11434", "http://b:11434"]'):
+        monkeypatch.setenv("OLLAMA_BASE_URLS", value)
+        assert Settings().ollama_base_urls == ["http://a:11434", "http://b:11434"]
+    monkeypatch.setenv("OLLAMA_BASE_URLS", "")
+    assert Settings().ollama_base_urls == [Settings().OLLAMA_BASE_URL]
+
+
+def _server_for(servers, conversation_id):
+    return [server for server in servers if any(
+        f"[{conversation_id}]" in body.get("prompt", "") for body in server.prompts)]
+
+
+async def _end_to_end_checks(servers):
+    await init_ollama_client()
+    try:
+        service = OllamaService()
+        service.pool = _pool([server.base_url for server in servers], max_outstanding=1)
+        service.max_retries = 2
+        await service.pool.refresh(get_ollama_client())
+        warm = [backend for backend in service.pool.backends if MODEL in backend.loaded_models]
+        assert len(warm) == 2
+
+        # Concurrent conversations spread over the warm instances first
+        await asyncio.gather(*[
+            service._call_ollama(f"[conv-{n}] hello", sticky_key=f"conv-{n}") for n in range(2)
+        ])
+        assert [len(server.prompts) for server in servers] == [1, 1, 0]
+
+        # Follow-up turns go back to the instance that served the conversation
+        for n in range(2):
+            await service._call_ollama(f"[conv-{n}] again", sticky_key=f"conv-{n}")
+            assert len(_server_for(servers, f"conv-{n}")) == 1
+
+        # A stopped instance is ejected after the next refresh and its conversation moves
+        home = _server_for(servers, "conv-0")[0]
+        home.stop()
+        await service.pool.refresh(get_ollama_client())
+        result = await service._call_ollama("[conv-0] still there?", sticky_key="conv-0")
+        assert result["response"]
+        assert service.pool.stats()["available"] == 2
+        return service.pool.stats()
+    finally:
+        await close_ollama_client()
+
+
+def _start_servers():
+    return [
+        FakeOllamaServer(port=11561, token_delay=0.02).start(),
+        FakeOllamaServer(port=11562, token_delay=0.02).start(),
+        FakeOllamaServer(port=11563, token_delay=0.02, loaded_models=[]).start(),  # Model not in memory
+    ]
+
+
+def test_pool_end_to_end():
+    servers = _start_servers()
+    try:
+        asyncio.run(_end_to_end_checks(servers))
+    finally:
+        for server in servers:
+            server.stop()
+
+
+if __name__ == "__main__":
+    print("🧪 Testing routing rules")
+    test_pool_prefers_warm_then_least_outstanding()
+    test_pool_sticky_routing_and_ejection()
+    print("✅ Warm, least-outstanding, sticky and ejection rules hold")
+    print("🧪 Testing against three fake Ollama servers")
+    servers = _start_servers()
+    try:
+        stats = asyncio.run(_end_to_end_checks(servers))
+    finally:
+        for server in servers:
+            server.stop()
+    for backend in stats["backends"]:
+        print(f"✅ {backend['url']}: {backend['requests']} requests, breaker {backend['circuit_breaker']['state']}")
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Tests for the bcrypt worker pool.
+
+Checks that hashing no longer stalls the event loop, that the pool never
+runs more than its worker count (or one client's share) at once, and that
+per-account and queue limits turn excess attempts away with HTTP 429.
+"""
+
+import asyncio
+import time
+
+from passlib.context import CryptContext
+
+from app.core.exceptions import TooManyRequestsError
+from app.core.password_hashing import PasswordHasher
+
+# Fewer rounds than production to keep the test quick; still ~15-60 ms of CPU each
+context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=10)
+
+
+async def _loop_lag_checks():
+    hasher = PasswordHasher(context, workers=2, max_per_client=1)
+    max_lag = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal max_lag
+        while not done:
+            start = time.perf_counter()
+            await asyncio.sleep(0.005)
+            max_lag = max(max_lag, time.perf_counter() - start - 0.005)
+
+    inline_start = time.perf_counter()
+    context.hash("inline")
+    inline = time.perf_counter() - inline_start
+
+    tick = asyncio.create_task(ticker())
+    hashes = await asyncio.gather(*[hasher.hash(f"password-{n}", client=f"10.0.0.{n}") for n in range(6)])
+    done = True
+    await tick
+
+    assert all(context.verify(f"password-{n}", hashed) for n, hashed in enumerate(hashes))
+    assert await hasher.verify("password-0", hashes[0], client="10.0.0.1", email="a@test.com")
+    assert not await hasher.verify("wrong", hashes[0], client="10.0.0.1", email="a@test.com")
+    assert max_lag < inline, (max_lag, inline)  # The loop kept ticking while bcrypt ran
+    stats = hasher.stats()
+    assert stats["completed"] == 8 and stats["running"] == 0 and stats["queue_depth"] == 0
+    hasher.shutdown()
+    return max_lag, inline
+
+
+async def _limit_checks():
+    hasher = PasswordHasher(context, workers=2, max_per_client=1, max_per_email=1,
+                            max_queue=3, max_queue_per_client=2, max_wait=5.0)
+    hashed = context.hash("secret")
+    peak_running = 0
+    peak_queue = 0
+
+    async def watch():
+        nonlocal peak_running, peak_queue
+        while True:
+            stats = hasher.stats()
+            peak_running = max(peak_running, stats["running"])
+            peak_queue = max(peak_queue, stats["queue_depth"])
+            await asyncio.sleep(0.001)
+
+    watcher = asyncio.create_task(watch())
+
+    # One client's burst runs one at a time, leaving the other worker for someone else
+    burst = [asyncio.create_task(hasher.verify("secret", hashed, client="storm", email=f"u{n}@test.com")) for n in range(3)]
+    other = asyncio.create_task(hasher.verify("secret", hashed, client="regular", email="me@test.com"))
+    await asyncio.sleep(0)
+
+    # A second concurrent attempt on the same account is refused
+    try:
+        await hasher.verify("guess", hashed, client="elsewhere", email="ME@test.com")
+        raise AssertionError("expected a per-account rejection")
+    except TooManyRequestsError as e:
+        assert e.status_code == 429
+
+    # The storm client's queue is full
+    try:
+        await hasher.verify("secret", hashed, client="storm", email="u9@test.com")
+        raise AssertionError("expected a per-client queue rejection")
+    except TooManyRequestsError:
+        pass
+
+    assert all(await asyncio.gather(*burst, other))
+    watcher.cancel()
+    await asyncio.gather(watcher, return_exceptions=True)
+
+    stats = hasher.stats()
+    assert peak_running == 2 and peak_queue >= 1, (peak_running, peak_queue)
+    assert stats["rejected_per_account"] == 1 and stats["rejected_queue_full"] == 1
+    assert stats["completed"] == 4
+    hasher.shutdown()
+    return stats
+
+
+def test_client_key_behind_proxies(monkeypatch):
+    from starlette.requests import Request
+    from app.api.v1.endpoints import auth as auth_module
+
+    def request(forwarded=None):
+        headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+        return Request({"type": "http", "headers": headers, "client": ("10.0.0.2", 443)})
+
+    # Direct connections (or uvicorn --proxy-headers) key by the peer
+    assert auth_module._client_key(request("203.0.113.7")) == "10.0.0.2"
+    # One trusted load balancer: the entry it appended, not what the client sent
+    monkeypatch.setattr(auth_module.settings, "FORWARDED_TRUSTED_HOPS", 1)
+    assert auth_module._client_key(request("203.0.113.7")) == "203.0.113.7"
+    assert auth_module._client_key(request("1.2.3.4, 203.0.113.7")) == "203.0.113.7"
+    assert auth_module._client_key(request()) == "10.0.0.2"
+
+
+def test_hashing_keeps_loop_responsive():
+    asyncio.run(_loop_lag_checks())
+
+
+def test_hashing_limits():
+    asyncio.run(_limit_checks())
+
+
+if __name__ == "__main__":
+    print("🧪 Testing event loop lag while hashing")
+    max_lag, inline = asyncio.run(_loop_lag_checks())
+    print(f"✅ Max loop lag {max_lag * 1000:.1f} ms vs {inline * 1000:.1f} ms for one inline hash")
+    print("🧪 Testing per-client and per-account limits")
+    print(f"✅ Stats: {asyncio.run(_limit_checks())}")
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Query-plan regression test for the hot chat queries.
+
+Creates the schema from the ORM models (as the SQLite fallback does), runs
+each hot endpoint while capturing the SQL it emits, and checks with
+EXPLAIN QUERY PLAN that every read of conversations and chat_messages is
+served by an index, with no full table scan and no separate sort step.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.models.base import Base
+from app.models.auth import User
+from app.models.chat import Conversation, ChatMessage, MessageRole
+from app.services.chat_service import ChatService
+from app.api.v1.endpoints.chat import get_conversations, get_conversation_detail, get_chat_history
+import app.models  # noqa: F401  (register all mappers)
+
+HOT_TABLES = ("conversations", "chat_messages")
+
+
+class StatementRecorder:
+    """Keeps the SELECTs (and their parameters) executed on an engine"""
+
+    def __init__(self, engine):
+        self.statements = []
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, *args):
+        if statement.lstrip().startswith("SELECT") and any(table in statement for table in HOT_TABLES):
+            self.statements.append((statement, parameters))
+
+    def take(self):
+        statements, self.statements = self.statements, []
+        return statements
+
+
+async def _setup():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+
+    base_time = datetime(2024, 1, 1)
+    async with SessionLocal() as db:
+        user = User(email="plans@test.com", hashed_password="x", full_name="Plan Test")
+        other = User(email="plans-other@test.com", hashed_password="x", full_name="Other")
+        db.add_all([user, other])
+        await db.flush()
+        for owner in (user, other):
+            for i in range(20):
+                conversation = Conversation(
+                    user_id=owner.id, title=f"Chat {i}", is_archived=i % 5 == 0, message_count=10,
+                    updated_at=base_time + timedelta(hours=i)
+                )
+                db.add(conversation)
+                await db.flush()
+                for j in range(10):
+                    db.add(ChatMessage(
+                        conversation_id=conversation.id,
+                        role=MessageRole.USER if j % 2 == 0 else MessageRole.ASSISTANT,
+                        content=f"Message {j}",
+                        created_at=base_time + timedelta(hours=i, minutes=j)
+                    ))
+        await db.commit()
+    return engine, SessionLocal, user.id
+
+
+async def _plans(engine, statements):
+    """EXPLAIN QUERY PLAN detail lines for each captured statement"""
+    plans = []
+    async with engine.connect() as conn:
+        for statement, parameters in statements:
+            result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            plans.append((statement, [row[-1] for row in result.fetchall()]))
+    return plans
+
+
+def _assert_indexed(name, plans):
+    assert plans, f"{name}: no statements captured"
+    for statement, details in plans:
+        for detail in details:
+            for table in HOT_TABLES:
+                assert not detail.startswith(f"SCAN {table}") or "USING" in detail, (
+                    f"{name}: full scan of {table}\n{statement}\n{details}"
+                )
+            assert "TEMP B-TREE" not in detail, f"{name}: sorts instead of reading in index order\n{statement}\n{details}"
+
+
+async def _run_checks():
+    engine, SessionLocal, user_id = await _setup()
+    recorder = StatementRecorder(engine)
+    results = {}
+    try:
+        async with SessionLocal() as db:
+            user = await db.get(User, user_id)
+            first_page = await get_conversations(limit=5, offset=0, include_archived=False, current_user=user, db=db)
+            conversation_id = first_page.conversations[0].id
+            recorder.take()
+
+            checks = {
+                "conversation list": lambda: get_conversations(
+                    limit=5, offset=0, include_archived=False, current_user=user, db=db
+                ),
+                "conversation list (cursor)": lambda: get_conversations(
+                    limit=5, offset=0, include_archived=False, cursor=first_page.next_cursor,
+                    include_total=False, current_user=user, db=db
+                ),
+                "conversation detail": lambda: get_conversation_detail(
+                    conversation_id=conversation_id, current_user=user, db=db
+                ),
+                "conversation history page": lambda: get_chat_history(
+                    conversation_id=conversation_id, limit=4, offset=0, include_system_messages=False,
+                    cursor=None, include_total=True, current_user=user, db=db
+                ),
+            }
+            for name, call in checks.items():
+                await call()
+                plans = await _plans(engine, recorder.take())
+                _assert_indexed(name, plans)
+                results[name] = plans
+
+            # The AI history read used when a conversation's window is cold
+            stored = await db.get(Conversation, conversation_id)
+            await ChatService().get_conversation_history(db, stored)
+            plans = await _plans(engine, recorder.take())
+            _assert_indexed("turn history", plans)
+            results["turn history"] = plans
+        return results
+    finally:
+        await engine.dispose()
+
+
+def test_hot_queries_use_indexes():
+    asyncio.run(_run_checks())
+
+
+if __name__ == "__main__":
+    print("🧪 Checking query plans for the hot chat queries")
+    for name, plans in asyncio.run(_run_checks()).items():
+        for _, details in plans:
+            print(f"✅ {name}: {' | '.join(details)}")
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Tests for single-flight request coalescing.
+
+Checks that concurrent calls for one key share a single execution (and its
+error), that results are reused for the TTL but errors are not, that a
+cancelled caller doesn't cancel the others (and that a coalesced load runs
+on a session of its own, not the first caller's), and that GET /chat/starter now loads the user's
+onboarding data once instead of twice.
+"""
+
+import asyncio
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.core.singleflight import SingleFlight
+from app.models.base import Base
+from app.models.auth import User
+from app.models.onboarding import OnboardingData
+from app.services import ai_context_service as context_module
+from app.services import auth_service as auth_module
+from app.api.v1.endpoints.chat import get_conversation_starter
+import app.models  # noqa: F401  (register all mappers)
+
+
+async def _coalescing_checks():
+    group = SingleFlight("test_coalescing", ttl=0.2)
+    runs = 0
+
+    async def slow_value():
+        nonlocal runs
+        runs += 1
+        await asyncio.sleep(0.05)
+        return {"value": runs}
+
+    results = await asyncio.gather(*[group.do("key", slow_value) for _ in range(10)])
+    assert runs == 1 and all(result is results[0] for result in results)
+    assert group.stats()["shared"] == 9
+
+    # Served from the TTL cache, then recomputed once it expires or is forgotten
+    assert (await group.do("key", slow_value))["value"] == 1
+    group.forget("key")
+    assert (await group.do("key", slow_value))["value"] == 2
+    await asyncio.sleep(0.25)
+    assert (await group.do("key", slow_value))["value"] == 3
+    assert group.stats()["cached"] == 1
+
+    # Errors reach every waiter but are not cached
+    async def failing():
+        nonlocal runs
+        runs += 1
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    runs = 0
+    outcomes = await asyncio.gather(*[group.do("bad", failing) for _ in range(3)], return_exceptions=True)
+    assert runs == 1 and all(isinstance(outcome, ValueError) for outcome in outcomes)
+    await asyncio.gather(group.do("bad", failing), return_exceptions=True)
+    assert runs == 2
+
+    # Cancelling the caller that started the computation doesn't fail the others
+    first = asyncio.create_task(group.do("cancel", slow_value))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(group.do("cancel", slow_value))
+    await asyncio.sleep(0)
+    first.cancel()
+    assert (await second)["value"] >= 1
+    assert first.cancelled()
+    return group.stats()
+
+
+class QueryCounter:
+    """Counts statements executed on an engine"""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    def reset(self):
+        self.count = 0
+
+
+async def _starter_checks():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+    counter = QueryCounter(engine)
+
+    async with SessionLocal() as db:
+        user = User(email="starter@test.com", hashed_password="x", full_name="Starter Test")
+        db.add(user)
+        await db.flush()
+        db.add(OnboardingData(user_id=user.id, name="Sam", change_you_want="Run a marathon"))
+        await db.commit()
+
+    context_module.prompt_cache.clear()
+    context_module.invalidate_user_context(str(user.id))
+    try:
+        # Several concurrent starter requests, each with its own session
+        counter.reset()
+
+        async def request():
+            async with SessionLocal() as db:
+                return await get_conversation_starter(current_user=user, db=db)
+
+        starters = await asyncio.gather(*[request() for _ in range(5)])
+        cold_queries = counter.count
+        assert all(starter.message == "Hey Sam! How's your day going?" for starter in starters)
+        assert starters[0].context["current_goals"] == ["Run a marathon"]
+        assert cold_queries == 3, cold_queries  # Version check, onboarding, user: once for all five
+
+        # Once the coalescing window has passed, a request costs one version check
+        context_module.context_flight.forget(str(user.id))
+        counter.reset()
+        await request()
+        assert counter.count == 1, counter.count
+        return cold_queries
+    finally:
+        context_module.invalidate_user_context(str(user.id))
+        await engine.dispose()
+
+
+async def _closed_session_checks():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    SessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+
+    async with SessionLocal() as db:
+        user = User(email="flight@test.com", hashed_password="x", full_name="Flight Test")
+        db.add(user)
+        await db.commit()
+
+    auth_module.invalidate_user_snapshot(user.id)
+    service = auth_module.AuthService()
+    try:
+        # The request that started the load goes away; the load never used its session
+        first_db, second_db = SessionLocal(), SessionLocal()
+        first = asyncio.create_task(service.get_user_snapshot(first_db, str(user.id)))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(service.get_user_snapshot(second_db, str(user.id)))
+        await asyncio.sleep(0)
+        first.cancel()
+        snapshot = await second
+        assert snapshot is not None and snapshot.email == "flight@test.com"
+        assert not first_db.in_transaction() and not second_db.in_transaction()
+        await first_db.close()
+        await second_db.close()
+    finally:
+        auth_module.invalidate_user_snapshot(user.id)
+        await engine.dispose()
+
+
+def test_singleflight_coalesces():
+    asyncio.run(_coalescing_checks())
+
+
+def test_singleflight_survives_first_caller_session_closing():
+    asyncio.run(_closed_session_checks())
+
+
+def test_starter_loads_onboarding_once():
+    asyncio.run(_starter_checks())
+
+
+if __name__ == "__main__":
+    print("🧪 Testing single-flight coalescing")
+    print(f"✅ Stats: {asyncio.run(_coalescing_checks())}")
+    asyncio.run(_closed_session_checks())
+    print("✅ Coalesced callers survive the first caller's session closing")
+    print("🧪 Testing /chat/starter query count")
+    print(f"✅ Five concurrent starter requests ran {asyncio.run(_starter_checks())} queries")
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Tests for token counting and history budgeting.
+
+Checks the characters-per-token estimate, that calibration ignores tiny
+and absurd samples, that history is trimmed to the newest messages that
+fit, and that a ``prompt_eval_count`` covering a whole re-evaluated
+context is not stored as the count of a single turn.
+"""
+
+from app.schemas.chat import AIGenerationRequest
+from app.services.ollama_service import OllamaService
+from app.services.token_budget import TokenBudget, token_budget
+
+
+def test_count_estimates_from_ratio():
+    budget = TokenBudget(chars_per_token=4.0)
+    assert budget.count("") == 0
+    assert budget.count("a") == 1
+    assert budget.count("a" * 8) == 2
+    assert budget.count("a" * 9) == 3
+
+
+def test_calibrate_moves_ratio_within_bounds():
+    budget = TokenBudget(chars_per_token=4.0)
+
+    # Too few tokens to be a useful sample
+    budget.calibrate("a" * 40, 4)
+    assert budget.chars_per_token == 4.0 and budget.samples == 0
+
+    # 3 chars per token pulls the ratio a tenth of the way towards it
+    budget.calibrate("a" * 300, 100)
+    assert abs(budget.chars_per_token - 3.9) < 1e-9
+    assert budget.samples == 1
+
+    # Absurd ratios are clamped before being folded in
+    budget.calibrate("a" * 10, 1000)
+    assert abs(budget.chars_per_token - (3.9 + 0.1 * (1.5 - 3.9))) < 1e-9
+
+
+def test_fit_history_keeps_newest_contiguous_messages():
+    budget = TokenBudget(chars_per_token=4.0)
+    history = [
+        {"role": "user", "content": "oldest", "token_count": "10"},
+        {"role": "assistant", "content": "a" * 400, "token_count": None},  # Estimated: 100
+        {"role": "user", "content": "newer", "token_count": "6"},
+        {"role": "assistant", "content": "newest", "token_count": 20},
+    ]
+
+    assert budget.fit_history(history, 1000) == history
+    assert budget.fit_history(history, (20 + 4) + (6 + 4)) == history[2:]
+    # The oldest message would fit on its own, but not past the one that doesn't
+    assert budget.fit_history(history, (20 + 4) + (6 + 4) + 50) == history[2:]
+    assert budget.fit_history(history, 23) == []
+
+
+def test_reported_prompt_count_checked_against_turn():
+    service = OllamaService()
+    message = "How did the interview go?"
+    request = AIGenerationRequest(
+        user_message=message,
+        system_prompt="You are the user's future self.",
+        conversation_id="conversation-1",
+        history_length=2,
+        conversation_history=[]
+    )
+    estimate = token_budget.count(service._format_turn_prompt(message))
+
+    # Cached context: the count is for this turn alone and is kept
+    _, prompt_tokens = service._token_counts(request, "Fine", {"prompt_eval_count": estimate + 3}, [1, 2])
+    assert prompt_tokens == estimate + 3
+
+    # Evicted cache: the whole context was re-evaluated, so the estimate is stored
+    _, prompt_tokens = service._token_counts(request, "Fine", {"prompt_eval_count": 4000}, [1, 2])
+    assert prompt_tokens == estimate
+
+    # No saved context: the prompt count covers the whole prompt
+    _, prompt_tokens = service._token_counts(request, "Fine", {"prompt_eval_count": 12}, None)
+    assert prompt_tokens == service._estimate_token_count(message)
+
+
+if __name__ == "__main__":
+    print("🧪 Testing token budget")
+    test_count_estimates_from_ratio()
+    test_calibrate_moves_ratio_within_bounds()
+    test_fit_history_keeps_newest_contiguous_messages()
+    print("✅ Counting, calibration and history trimming behave")
+    test_reported_prompt_count_checked_against_turn()
+    print("✅ Whole-context prompt counts are not stored for a single turn")
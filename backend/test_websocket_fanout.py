@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Tests for the WebSocket connection manager and cross-worker fan-out.
+
+Runs three "workers" (ConnectionManagers) on one in-memory broker, connects
+a user from several devices spread over them, and checks that a message
+sent from any worker reaches every one of that user's sockets exactly once,
+that other users get nothing, and that disconnects and dead sockets clean
+up their subscriptions. The same scenario runs over Redis pub/sub when a
+Redis server is reachable at REDIS_URL.
+"""
+
+import asyncio
+
+from app.core.config import settings
+from app.realtime import ConnectionManager, InMemoryBroker, InMemoryPubSub
+
+
+class FakeWebSocket:
+    def __init__(self, name, fail=False):
+        self.name = name
+        self.fail = fail
+        self.accepted = False
+        self.sent = []
+
+    async def accept(self):
+        self.accepted = True
+
+    async def send_text(self, message):
+        if self.fail:
+            raise RuntimeError("socket closed")
+        self.sent.append(message)
+
+
+async def _fanout_scenario(workers, settle):
+    a, b, c = workers
+    phone, laptop, tablet, other = (FakeWebSocket(name) for name in ("phone", "laptop", "tablet", "other"))
+
+    await a.connect(phone, "user-1")
+    await b.connect(laptop, "user-1")
+    await b.connect(tablet, "user-1")  # A second device on one worker doesn't replace the first
+    await c.connect(other, "user-2")
+    await settle()
+    assert b.active_connections == 2 and len(b.user_connections["user-1"]) == 2
+
+    # Sent from a worker that holds none of user-1's sockets
+    await c.send_personal_message("hello", "user-1")
+    await settle()
+    assert phone.sent == laptop.sent == tablet.sent == ["hello"]
+    assert other.sent == []
+
+    # A reply mirrored to the user's other devices skips the socket it answers
+    await a.send_personal_message("mirror", "user-1", exclude=phone)
+    await settle()
+    assert phone.sent == ["hello"] and laptop.sent[-1] == "mirror" and tablet.sent[-1] == "mirror"
+
+    # Once a worker holds none of the user's sockets it stops receiving their messages
+    await b.disconnect(laptop, "user-1")
+    await b.disconnect(tablet, "user-1")
+    await settle()
+    assert "user-1" not in b.user_connections
+    await c.send_personal_message("after", "user-1")
+    await settle()
+    assert phone.sent[-1] == "after" and laptop.sent[-1] == "mirror"
+    assert b.received == 2
+
+    # A dead socket is dropped on the first failed send
+    dead = FakeWebSocket("dead", fail=True)
+    await a.connect(dead, "user-1")
+    await c.send_personal_message("ping", "user-1")
+    await settle()
+    assert a.failed_sends == 1 and a.user_connections["user-1"] == {phone}
+    return [worker.stats() for worker in workers]
+
+
+async def _in_memory_checks():
+    broker = InMemoryBroker()
+    workers = [ConnectionManager(channel_prefix="test:ws") for _ in range(3)]
+    for worker in workers:
+        await worker.start(InMemoryPubSub(broker))
+
+    async def settle():
+        await asyncio.sleep(0)
+
+    try:
+        stats = await _fanout_scenario(workers, settle)
+        # Only the worker still holding user-1's phone is subscribed to their channel
+        assert len(broker.subscribers["test:ws:user:user-1"]) == 1
+        return stats
+    finally:
+        for worker in workers:
+            await worker.stop()
+
+
+async def _redis_checks():
+    """Same scenario over Redis; returns None when no Redis server is reachable"""
+    from app.realtime.redis_pubsub import RedisPubSub
+
+    probe = RedisPubSub(settings.REDIS_URL)
+    try:
+        await asyncio.wait_for(probe.ping(), 1.0)
+    except Exception:
+        return None
+    finally:
+        await probe.close()
+
+    workers = [ConnectionManager(channel_prefix="test:ws") for _ in range(3)]
+    for worker in workers:
+        await worker.start(RedisPubSub(settings.REDIS_URL))
+
+    async def settle():
+        await asyncio.sleep(0.2)
+
+    try:
+        return await _fanout_scenario(workers, settle)
+    finally:
+        for worker in workers:
+            await worker.stop()
+
+
+def test_fanout_in_memory():
+    asyncio.run(_in_memory_checks())
+
+
+def test_fanout_redis():
+    asyncio.run(_redis_checks())
+
+
+if __name__ == "__main__":
+    print("🧪 Testing fan-out across three in-memory workers")
+    for stats in asyncio.run(_in_memory_checks()):
+        print(f"✅ Worker {stats['worker_id'][:8]}: delivered {stats['delivered']}, received {stats['received']}")
+    print("🧪 Testing fan-out over Redis")
+    redis_stats = asyncio.run(_redis_checks())
+    print("✅ Redis fan-out works" if redis_stats else "⚠️ Redis not reachable, skipped")